@@ -7,6 +7,8 @@ import json
 import numpy as np
 import time
 from docplex.mp.model import Model
+from docplex.mp.relax_linear import LinearRelaxer
+from docplex.mp.utils import DOcplexLimitsExceeded
 
 # Charger les données depuis le fichier JSON
 with open('datay.json') as f:
@@ -138,6 +140,11 @@ for m in machines:
                 )
 
 
+# Big-M resserré : x est déjà borné par tlot[p] et par la capacité machine MC[m]
+M_lien = {(p, m): min(big_m, tlot[p-1], MC[m-1]) for p in products for m in machines}
+print(f"Big-M resserré : {big_m} -> max {max(M_lien.values())}")
+liens = {}
+
 for o in operations:
     for p in products:
         for m in machines:
@@ -145,7 +152,8 @@ for o in operations:
                 for c in cells:
                     for t in periods:
                         model.add_constraint(x[o, p, m, f, c, t] <= tlot[p-1])
-                        model.add_constraint(x[o, p, m, f, c, t] <= Z[o, p, m, f, c, t] * big_m)
+                        liens[o, p, m, f, c, t] = model.add_constraint(
+                            x[o, p, m, f, c, t] <= Z[o, p, m, f, c, t] * M_lien[p, m])
 
 
 
@@ -176,6 +184,25 @@ for c in cells:
         model.add_constraint(model.sum(MN[m, c, t] for m in machines) >= LP)
         model.add_constraint(model.sum(MN[m, c, t] for m in machines) <= CL)
 
+# Borne LP racine (relaxation continue) avec le big-M d'origine, puis avec le big-M resserré
+def lier(M):
+    for (o, p, m, f, c, t), ct in liens.items():
+        ct.right_expr = Z[o, p, m, f, c, t] * M[p, m]
+
+def borne_lp():
+    relaxe = LinearRelaxer.make_relaxed_model(model)
+    return relaxe.objective_value if relaxe.solve() else None
+
+try:
+    lier(dict.fromkeys(M_lien, big_m))
+    borne_avant = borne_lp()
+    lier(M_lien)
+    print(f"Borne LP racine : {borne_avant} -> {borne_lp()} (big-M resserré)")
+except DOcplexLimitsExceeded:
+    print("[AVERTISSEMENT] Borne LP racine non mesurée : modèle au-delà des limites de CPLEX Community Edition")
+finally:
+    lier(M_lien)
+
 # Résolution avec mesure du temps
 start_time = time.time()
 solution = model.solve()
@@ -0,0 +1,359 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark_CMS.py
+----------------
+Mesure du passage à l'échelle du modèle CMS sur une grille de tailles (P, M, C, T).
+
+Pour chaque taille et chaque étape : construction du modèle matriciel, resserrement
+des big-M, transmission à docplex et export LP, résolution (si un solveur est
+demandé), écriture des résultats (.txt / .npz), lecture (process_txt, process_npz,
+process_ltf) et écriture du classeur Excel depuis la base de résultats.
+On relève aussi les tailles (variables, contraintes, nonzeros) et le pic mémoire
+Python de la construction (tracemalloc).
+
+--formulation arcs mesure la formulation à graphe d'arcs creux de CMS_Matrices
+(comparée à une référence de même formulation seulement).
+
+Avec --symetrie, chaque taille est résolue avec et sans l'ordre lexicographique
+entre cellules interchangeables (CMS_Matrices.casser_symetrie_cellules) : temps,
+nœuds explorés et objectif des deux variantes (grille par défaut GRILLE_SYMETRIE),
+écrits dans benchmark_symetrie.json (jamais dans la référence de régression).
+
+Sans --solveur, aucune résolution n'est lancée : la solution écrite puis relue est
+synthétique (toutes les variables à min(ub, 1)), ce qui donne des fichiers de
+taille maximale. Le .ltf est lui aussi synthétique, au format du rapport LINGO.
+
+Usage :
+    python Benchmark_CMS.py [--grille "4,3,2,2;8,5,3,4"] [--solveur highs] [--formulation arcs] [--sortie bench.json]
+    python Benchmark_CMS.py --reference bench_reference.json [--seuil 0.25]
+    python Benchmark_CMS.py --symetrie --solveur highs [--grille "6,4,3,3"] [--temps-limite 120]
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from CMS_Matrices import (BLOCS, FORMULATIONS, casser_symetrie_cellules, construire_modele_matriciel,
+                          nombre_nonzeros, resserrer_big_m)
+from Generateur_Donnees import instance_du_lot, tirer_lot
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SORTIE_JSON = os.path.join(BASE_DIR, "benchmark_resultats.json")
+SORTIE_SYMETRIE = os.path.join(BASE_DIR, "benchmark_symetrie.json")
+GRILLE_DEFAUT = [(4, 3, 2, 2), (8, 5, 3, 4), (12, 6, 4, 8), (20, 8, 4, 13)]
+GRILLE_SYMETRIE = [(4, 3, 4, 3), (5, 3, 5, 4), (6, 4, 4, 4)]
+NB_SOUS_TRAITANTS = 4
+LIGNES_EXCEL = 1000
+SEUIL_REGRESSION = 0.25
+# Les étapes plus rapides que ce temps ne sont pas comparées (bruit de mesure)
+TEMPS_MIN_COMPARAISON = 0.005
+
+# Compteurs comparés exactement à la référence
+COMPTEURS = ["variables", "contraintes", "nonzeros"]
+
+
+def _chronometrer(fonction, *args, **kwargs):
+    start_time = time.perf_counter()
+    valeur = fonction(*args, **kwargs)
+    return valeur, time.perf_counter() - start_time
+
+
+def _pic_memoire(fonction, *args, **kwargs):
+    """Pic d'allocation Python (Mo) pendant l'appel."""
+    tracemalloc.start()
+    try:
+        fonction(*args, **kwargs)
+        return tracemalloc.get_traced_memory()[1] / 2 ** 20
+    finally:
+        tracemalloc.stop()
+
+
+def _resultat_synthetique(mm):
+    """Solution factice (toutes les variables à min(ub, 1)) pour le chemin sans solveur."""
+    x = np.minimum(mm["ub"], 1.0)
+    return {
+        "trouve": True, "statut": "non résolu (benchmark)", "objectif": 0.0, "iterations": 0,
+        "temps": 0.0, "x": x, "variables": mm["n"],
+        "contraintes": sum(fam["A"].shape[0] for fam in mm["familles"]),
+        "nonzeros": nombre_nonzeros(mm),
+    }
+
+
+def ecrire_ltf_synthetique(chemin, mm, demande, resultat):
+    """Rapport au format LINGO (.ltf) pour la solution donnée, relu par process_ltf."""
+    x = resultat["x"]
+    with open(chemin, "w", encoding="latin-1") as f:
+        f.write("  Global optimal solution found.\n")
+        f.write(f"  Objective value:{resultat['objectif']:38.2f}\n")
+        f.write(f"  Objective bound:{resultat['objectif']:38.2f}\n")
+        f.write(f"  Total solver iterations:{resultat['iterations']:30d}\n")
+        f.write(f"  Elapsed runtime seconds:{resultat['temps']:30.2f}\n\n")
+        f.write(f"  Total variables:{resultat['variables']:19d}\n")
+        f.write(f"  Integer variables:{resultat['variables']:17d}\n\n")
+        f.write(f"  Total constraints:{resultat['contraintes']:17d}\n\n")
+        f.write(f"  Total nonzeros:{resultat['nonzeros']:20d}\n\n")
+        f.write(f"{'LP':>40}{0.0:16.6f}{0.0:20.6f}\n")
+        f.write(f"{'CL':>40}{30.0:16.5f}{0.0:20.6f}\n")
+        for (p, t), v in sorted(demande.items()):
+            f.write(f"{f'DEM( {p}, {t})':>40}{float(v):16.5f}{0.0:20.6f}\n")
+        for bloc in BLOCS:
+            if bloc == "Z":
+                continue
+            d = mm["offsets"][bloc][0]
+            for i, k in enumerate(mm["index"][bloc].tolist()):
+                nom = f"{bloc}( " + ", ".join(str(v) for v in k) + ")"
+                f.write(f"{nom:>40}{x[d + i]:16.5f}{0.0:20.6f}\n")
+
+
+def mesurer_taille(P, M, C, T, solveur=None, temps_limite=None, seed=0, lignes_excel=LIGNES_EXCEL,
+                   formulation="tenseur"):
+    """Mesures de toutes les étapes pour une instance de taille (P, M, C, T)."""
+    from CMS_Optimization import ecrire_artefact, ecrire_resultats, load_demande_from_json
+    from Lecture_Resultats import process_ltf, process_npz, process_txt
+    from MainPrincipale import FEUILLES, headers_txt, ligne_txt
+    from Stockage_Resultats import ajouter_lignes, exporter_excel, ouvrir_base
+
+    donnees = instance_du_lot(tirer_lot(1, P, M, C, T, NB_SOUS_TRAITANTS, seed=seed), 0)
+    demande = load_demande_from_json(donnees["params"], donnees["periods"])
+    mesure = {"taille": {"P": P, "M": M, "C": C, "T": T, "L": NB_SOUS_TRAITANTS}, "formulation": formulation,
+              "temps": {}}
+    temps = mesure["temps"]
+
+    # --- Construction ---
+    mm, temps["construction"] = _chronometrer(construire_modele_matriciel, donnees, demande,
+                                              formulation=formulation)
+    mesure["memoire_pic_construction_mo"] = round(
+        _pic_memoire(construire_modele_matriciel, donnees, demande, formulation=formulation), 3)
+    _, temps["big_m"] = _chronometrer(resserrer_big_m, mm, donnees)
+    mesure["variables"] = mm["n"]
+    mesure["contraintes"] = sum(fam["A"].shape[0] for fam in mm["familles"])
+    mesure["nonzeros"] = nombre_nonzeros(mm)
+
+    dossier = tempfile.mkdtemp(prefix="bench_cms_")
+    try:
+        # --- Transmission docplex et export LP (sans résolution) ---
+        try:
+            from Solveurs import modele_docplex
+            (mdl, _, _, _), temps["docplex"] = _chronometrer(modele_docplex, mm)
+            _, temps["export_lp"] = _chronometrer(mdl.export_as_lp, os.path.join(dossier, "cms.lp"))
+            mdl.end()
+        except ImportError:
+            mesure["docplex"] = "absent"
+
+        # --- Résolution ---
+        if solveur:
+            from Solveurs import resoudre
+            resultat = resoudre(mm, solveur, temps_limite=temps_limite)
+            temps["resolution"] = resultat["temps"]
+            mesure["statut"] = resultat["statut"]
+            mesure["objectif"] = resultat["objectif"]
+            mesure["iterations"] = resultat["iterations"]
+            if not resultat["trouve"]:
+                resultat = _resultat_synthetique(mm)
+        else:
+            resultat = _resultat_synthetique(mm)
+
+        # --- Écriture et lecture des résultats ---
+        txt = os.path.join(dossier, "resultats.txt")
+        npz = os.path.join(dossier, "resultats.npz")
+        ltf = os.path.join(dossier, "resultats.ltf")
+        _, temps["ecriture_txt"] = _chronometrer(ecrire_resultats, txt, mm, demande, resultat,
+                                                 donnees["LP"], donnees["CL"])
+        _, temps["ecriture_npz"] = _chronometrer(ecrire_artefact, npz, mm, demande, resultat,
+                                                 donnees["LP"], donnees["CL"])
+        ecrire_ltf_synthetique(ltf, mm, demande, resultat)
+        mesure["octets_txt"] = os.path.getsize(txt)
+        mesure["octets_ltf"] = os.path.getsize(ltf)
+        res_txt, temps["lecture_txt"] = _chronometrer(process_txt, txt)
+        _, temps["lecture_npz"] = _chronometrer(process_npz, npz)
+        _, temps["lecture_ltf"] = _chronometrer(process_ltf, ltf)
+
+        # --- Base de résultats et classeur Excel ---
+        con = ouvrir_base(os.path.join(dossier, "resultats.sqlite"), FEUILLES)
+        lignes = [ligne_txt("resultats.txt", k // 50, k % 50 + 1, res_txt) for k in range(lignes_excel)]
+        _, temps["ajout_base"] = _chronometrer(ajouter_lignes, con, "TXT_Resultats", headers_txt, lignes)
+        _, temps["export_excel"] = _chronometrer(exporter_excel, con, os.path.join(dossier, "resultats.xlsx"),
+                                                 FEUILLES)
+        con.close()
+        mesure["lignes_excel"] = lignes_excel
+    finally:
+        shutil.rmtree(dossier, ignore_errors=True)
+
+    temps.update({k: round(v, 6) for k, v in temps.items()})
+    return mesure
+
+
+def lancer_benchmark(grille=GRILLE_DEFAUT, solveur=None, temps_limite=None, seed=0, lignes_excel=LIGNES_EXCEL,
+                     repetitions=1, formulation="tenseur"):
+    """Mesure chaque taille de la grille ; avec `repetitions` > 1, garde le temps minimal de chaque étape."""
+    mesures = []
+    for P, M, C, T in grille:
+        print(f"--- Taille P={P} M={M} C={C} T={T} ---")
+        mesure = None
+        for _ in range(repetitions):
+            m = mesurer_taille(P, M, C, T, solveur=solveur, temps_limite=temps_limite, seed=seed,
+                               lignes_excel=lignes_excel, formulation=formulation)
+            if mesure is None:
+                mesure = m
+            else:
+                mesure["temps"] = {k: min(v, m["temps"].get(k, v)) for k, v in mesure["temps"].items()}
+        mesure["repetitions"] = repetitions
+        print(f"[OK] {mesure['variables']} variables, {mesure['contraintes']} contraintes, "
+              f"{mesure['nonzeros']} nonzeros ; construction {mesure['temps']['construction']:.4f} s")
+        mesures.append(mesure)
+    return {
+        "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "machine": {"python": sys.version.split()[0], "plateforme": platform.platform(),
+                    "processeur": platform.processor(), "coeurs": os.cpu_count()},
+        "solveur": solveur,
+        "formulation": formulation,
+        "seed": seed,
+        "repetitions": repetitions,
+        "mesures": mesures,
+    }
+
+
+def comparer_symetrie(grille=GRILLE_SYMETRIE, solveur="highs", temps_limite=None, seed=0, instances=3):
+    """Résolution de `instances` instances par taille, sans puis avec cassage des symétries entre cellules.
+
+    Chaque taille porte le détail par instance et les totaux de temps et de nœuds
+    des deux variantes ; "objectif_identique" vérifie que l'optimum n'a pas changé.
+    """
+    from CMS_Optimization import load_demande_from_json
+    from Solveurs import resoudre
+
+    mesures = []
+    for P, M, C, T in grille:
+        lot = tirer_lot(instances, P, M, C, T, NB_SOUS_TRAITANTS, seed=seed)
+        mesure = {"taille": {"P": P, "M": M, "C": C, "T": T, "L": NB_SOUS_TRAITANTS}, "instances": []}
+        for k in range(instances):
+            donnees = instance_du_lot(lot, k)
+            demande = load_demande_from_json(donnees["params"], donnees["periods"])
+            detail = {}
+            for variante in ("sans", "avec"):
+                mm = construire_modele_matriciel(donnees, demande)
+                resserrer_big_m(mm, donnees)
+                if variante == "avec":
+                    detail["contraintes_symetrie"] = casser_symetrie_cellules(mm, donnees)["lignes"]
+                resultat = resoudre(mm, solveur, temps_limite=temps_limite)
+                detail[variante] = {cle: resultat[cle] for cle in ("statut", "objectif", "temps", "noeuds")}
+            mesure["instances"].append(detail)
+        for variante in ("sans", "avec"):
+            mesure[variante] = {
+                "temps": round(sum(d[variante]["temps"] for d in mesure["instances"]), 6),
+                "noeuds": sum(d[variante]["noeuds"] or 0 for d in mesure["instances"]),
+            }
+        mesure["objectif_identique"] = all(
+            d["sans"]["objectif"] is not None and d["avec"]["objectif"] is not None
+            and abs(d["sans"]["objectif"] - d["avec"]["objectif"]) <= 1e-6 * max(1.0, abs(d["sans"]["objectif"]))
+            for d in mesure["instances"])
+        sans, avec = mesure["sans"], mesure["avec"]
+        etat = "[OK]" if mesure["objectif_identique"] else "[AVERTISSEMENT]"
+        print(f"{etat} P={P} M={M} C={C} T={T} ({instances} instances) : "
+              f"{sans['temps']:.2f} s / {sans['noeuds']} nœuds -> {avec['temps']:.2f} s / {avec['noeuds']} nœuds ; "
+              f"objectif {'identique' if mesure['objectif_identique'] else 'DIFFÉRENT'}")
+        mesures.append(mesure)
+    return {
+        "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "solveur": solveur,
+        "seed": seed,
+        "temps_limite": temps_limite,
+        "instances": instances,
+        "symetrie": mesures,
+    }
+
+
+def _cle(mesure):
+    t = mesure["taille"]
+    return (t["P"], t["M"], t["C"], t["T"], mesure.get("formulation", "tenseur"))
+
+
+def comparer(courant, reference, seuil=SEUIL_REGRESSION):
+    """Liste des régressions : temps > (1 + seuil) x référence, ou compteurs différents."""
+    if "mesures" not in reference:
+        raise ValueError("Référence sans clé \"mesures\" : ce n'est pas un JSON du benchmark de passage à l'échelle")
+    ref = {_cle(m): m for m in reference["mesures"]}
+    regressions = []
+    for mesure in courant["mesures"]:
+        base = ref.get(_cle(mesure))
+        if base is None:
+            continue
+        taille = "P={} M={} C={} T={} ({})".format(*_cle(mesure))
+        for compteur in COMPTEURS:
+            if mesure[compteur] != base[compteur]:
+                regressions.append(f"{taille} : {compteur} {base[compteur]} -> {mesure[compteur]}")
+        for etape, t in mesure["temps"].items():
+            t_ref = base["temps"].get(etape)
+            if t_ref is None or max(t, t_ref) < TEMPS_MIN_COMPARAISON:
+                continue
+            if t > (1 + seuil) * t_ref:
+                regressions.append(f"{taille} : {etape} {t_ref:.4f} s -> {t:.4f} s (x{t / t_ref:.2f})")
+    return regressions
+
+
+def _lire_grille(texte):
+    return [tuple(int(v) for v in bloc.split(",")) for bloc in texte.split(";") if bloc.strip()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de passage à l'échelle du modèle CMS")
+    parser.add_argument("--grille", default=None, help='tailles "P,M,C,T;P,M,C,T;..."')
+    parser.add_argument("--solveur", default=None, help="docplex ou highs (défaut : sans résolution)")
+    parser.add_argument("--temps-limite", type=float, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--lignes-excel", type=int, default=LIGNES_EXCEL)
+    parser.add_argument("--repetitions", type=int, default=3, help="temps minimal sur n répétitions")
+    parser.add_argument("--sortie", default=None,
+                        help="JSON des mesures (défaut : benchmark_resultats.json, benchmark_symetrie.json avec --symetrie)")
+    parser.add_argument("--reference", default=None, help="JSON de référence pour détecter les régressions")
+    parser.add_argument("--seuil", type=float, default=SEUIL_REGRESSION)
+    parser.add_argument("--symetrie", action="store_true",
+                        help="comparer la résolution avec et sans cassage des symétries entre cellules")
+    parser.add_argument("--formulation", choices=FORMULATIONS, default="tenseur",
+                        help="index des routes X / Z ; arcs : restriction heuristique au-delà de 3 cellules")
+    parser.add_argument("--instances", type=int, default=3, help="instances par taille (avec --symetrie)")
+    args = parser.parse_args()
+
+    if args.symetrie:
+        grille = _lire_grille(args.grille) if args.grille else GRILLE_SYMETRIE
+        resultats = comparer_symetrie(grille, solveur=args.solveur or "highs", temps_limite=args.temps_limite,
+                                      seed=args.seed, instances=args.instances)
+        sortie = args.sortie or SORTIE_SYMETRIE
+        with open(sortie, "w", encoding="utf-8") as f:
+            json.dump(resultats, f, indent=2, ensure_ascii=False)
+        print(f"[OK] Mesures écrites dans {sortie}")
+        sys.exit(0)
+
+    reference = None
+    if args.reference:
+        with open(args.reference, "r", encoding="utf-8") as f:
+            reference = json.load(f)
+        if "mesures" not in reference:
+            print(f"[ERREUR] {args.reference} n'est pas une référence du benchmark de passage à l'échelle "
+                  f"(clé \"mesures\" absente)")
+            sys.exit(2)
+
+    grille = _lire_grille(args.grille) if args.grille else GRILLE_DEFAUT
+    resultats = lancer_benchmark(grille, solveur=args.solveur, temps_limite=args.temps_limite,
+                                 seed=args.seed, lignes_excel=args.lignes_excel, repetitions=args.repetitions,
+                                 formulation=args.formulation)
+    sortie = args.sortie or SORTIE_JSON
+    with open(sortie, "w", encoding="utf-8") as f:
+        json.dump(resultats, f, indent=2, ensure_ascii=False)
+    print(f"[OK] Mesures écrites dans {sortie}")
+
+    if reference is not None:
+        regressions = comparer(resultats, reference, args.seuil)
+        if regressions:
+            print(f"[ERREUR] {len(regressions)} régression(s) par rapport à {args.reference} :")
+            for ligne in regressions:
+                print(f"  - {ligne}")
+            sys.exit(1)
+        print(f"[OK] Aucune régression par rapport à {args.reference}")
@@ -0,0 +1,601 @@
+# -*- coding: utf-8 -*-
+"""
+CMS_Matrices.py
+---------------
+Construction matricielle du modèle CMS (NumPy / scipy.sparse).
+
+Le vecteur des variables est la concaténation des blocs
+X, Z, Y, B, NAJ, NRE, MN (dans cet ordre). Chaque famille de contraintes
+est un bloc creux A.x <sens> rhs construit en une seule passe vectorisée,
+ce qui évite les boucles Python sur l'espace (p, mi, mj, ci, cj, t).
+
+Deux formulations partagent les mêmes blocs et familles de contraintes et ne
+diffèrent que par l'index des routes X / Z :
+    "tenseur" : toutes les routes (p, mi, mj, ci, cj, t) autorisées par MCIM (index_routes),
+    "arcs"    : graphe d'arcs creux, linéaire en C (index_arcs). Dès C > 3, c'est une
+                restriction heuristique et non une reformulation : les transferts
+                inter-cellules sont limités aux cellules voisines sur l'anneau, et
+                l'optimum peut dépasser celui de "tenseur" (environ 1 % observé).
+
+Le modèle matriciel est un dict :
+    "formulation" : "tenseur" ou "arcs"
+    "restriction" : True si la formulation restreint l'ensemble admissible (est_restriction)
+    "ensembles" : P, M, C, T, L
+    "index"     : {bloc: tableau (n_bloc, d) des clés de chaque variable}
+    "offsets"   : {bloc: (début, fin)} dans le vecteur des variables
+    "lb", "ub"  : bornes des variables
+    "binaire"   : masque des variables binaires (les autres sont entières)
+    "objectif"  : {"Q1": vecteur, ..., "Q7": vecteur}
+    "familles"  : liste de dicts {"nom", "A", "sens", "rhs", "cles", "format"}
+"""
+import time
+import tracemalloc
+
+import numpy as np
+import scipy.sparse as sp
+
+BLOCS = ["X", "Z", "Y", "B", "NAJ", "NRE", "MN"]
+COMPOSANTES = ["Q1", "Q2", "Q3", "Q4", "Q5", "Q6", "Q7"]
+# Plus grand coefficient des contraintes d'ordre lexicographique entre cellules
+POIDS_MAX_LEX = 1e6
+FORMULATIONS = ["tenseur", "arcs"]
+
+
+def _grille(*ensembles):
+    """Produit cartésien des ensembles, dans l'ordre des boucles imbriquées."""
+    grille = np.meshgrid(*[np.asarray(e, dtype=np.int64) for e in ensembles], indexing="ij")
+    return np.stack([g.ravel() for g in grille], axis=1)
+
+
+def _position(valeurs, ensemble):
+    """Position de chaque valeur dans l'ensemble (trié)."""
+    return np.searchsorted(np.asarray(ensemble, dtype=np.int64), valeurs)
+
+
+def index_routes(P, M, C, T, mcim):
+    """Tuples (p, mi, mj, ci, cj, t) des routes autorisées par MCIM (mcim[p][mj] == 1).
+
+    Le tenseur complet P·M²·C²·T n'est jamais matérialisé : on part des couples
+    (p, mj) autorisés, puis on rétablit l'ordre des boucles imbriquées.
+    """
+    mcim_arr = np.asarray(mcim, dtype=float)
+    if not mcim_arr.size:
+        return np.empty((0, 6), dtype=np.int64)
+    pos_p, pos_mj = np.nonzero(mcim_arr[:len(P), :len(M)] > 0)
+    combos = _grille(np.arange(len(pos_p)), M, C, C, T)
+    couple = combos[:, 0]
+    routes = np.stack([
+        np.asarray(P, dtype=np.int64)[pos_p[couple]],
+        combos[:, 1],
+        np.asarray(M, dtype=np.int64)[pos_mj[couple]],
+        combos[:, 2], combos[:, 3], combos[:, 4],
+    ], axis=1)
+    ordre = np.lexsort(routes.T[::-1])
+    return routes[ordre]
+
+
+def arcs_cellules(C):
+    """Couples (ci, cj) de la formulation "arcs" : intra-cellule et voisines sur l'anneau des cellules.
+
+    Jusqu'à trois cellules, ce sont tous les couples (même graphe que la formulation tenseur).
+    """
+    i = np.arange(len(C))
+    couples = np.concatenate([np.stack([i, i], axis=1),
+                              np.stack([i, (i + 1) % len(C)], axis=1),
+                              np.stack([i, (i - 1) % len(C)], axis=1)])
+    return np.asarray(C, dtype=np.int64)[np.unique(couples, axis=0)]
+
+
+def est_restriction(formulation, C):
+    """True si `formulation` exclut des routes admissibles du modèle tenseur ("arcs" avec plus de 3 cellules)."""
+    return formulation == "arcs" and len(C) > 3
+
+
+def index_arcs(P, M, C, T, mcim):
+    """Tuples (p, mi, mj, ci, cj, t) du graphe d'arcs creux de la formulation "arcs".
+
+    - destination mj : machines de la gamme du produit (mcim[p][mj] == 1), comme la formulation tenseur ;
+    - origine mi : machines de la gamme d'au moins un produit. Les autres ne reçoivent
+      aucun flux et FlowBalance y force déjà tout flux sortant à zéro ;
+    - cellules : arcs intra-cellule et vers les deux cellules voisines (arcs_cellules).
+
+    Le nombre de routes croît en C au lieu de C², au prix d'une restriction des
+    transferts inter-cellules lorsque C > 3 : toute solution de la formulation
+    "arcs" est une solution de la formulation tenseur (objectif >= optimum tenseur).
+    """
+    mcim_arr = np.asarray(mcim, dtype=float)
+    if not mcim_arr.size:
+        return np.empty((0, 6), dtype=np.int64)
+    compatible = mcim_arr[:len(P), :len(M)] > 0
+    pos_p, pos_mj = np.nonzero(compatible)
+    origines = np.asarray(M, dtype=np.int64)[compatible.any(axis=0)]
+    cellules = arcs_cellules(C)
+    combos = _grille(np.arange(len(pos_p)), origines, np.arange(len(cellules)), T)
+    couple, arc = combos[:, 0], combos[:, 2]
+    routes = np.stack([
+        np.asarray(P, dtype=np.int64)[pos_p[couple]],
+        combos[:, 1],
+        np.asarray(M, dtype=np.int64)[pos_mj[couple]],
+        cellules[arc, 0], cellules[arc, 1], combos[:, 3],
+    ], axis=1)
+    ordre = np.lexsort(routes.T[::-1])
+    return routes[ordre]
+
+
+def _cout_operation(mcim, operations, p, mj):
+    # Même garde que l'expression Q2 d'origine : le terme n'existe que si mcim est indexé par (p, mj)
+    if p < len(operations) and mj < len(operations[p]) and (p, mj) in mcim:
+        return mcim[p, mj] * operations[p][mj]
+    return 0
+
+
+def _famille(nom, lignes, colonnes, valeurs, nb_lignes, n, sens, rhs, cles=None, format_nom=None):
+    A = sp.csr_matrix(
+        (np.asarray(valeurs, dtype=float), (np.asarray(lignes), np.asarray(colonnes))),
+        shape=(nb_lignes, n),
+    )
+    A.sum_duplicates()
+    A.eliminate_zeros()
+    return {
+        "nom": nom,
+        "A": A,
+        "sens": sens,
+        "rhs": np.asarray(rhs, dtype=float),
+        "cles": cles,
+        "format": format_nom,
+    }
+
+
+def _profileur(actif):
+    """(marquer, terminer) : marquer(nom, categorie) enregistre l'étape écoulée depuis la marque
+    précédente, terminer(familles, objectif) complète lignes / nonzeros et renvoie le profil."""
+    if not actif:
+        return (lambda nom, categorie: None), (lambda familles, objectif: None)
+
+    profil = []
+    demarre = not tracemalloc.is_tracing()
+    if demarre:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    etat = {"t": time.perf_counter(), "memoire": tracemalloc.get_traced_memory()[0]}
+
+    def marquer(nom, categorie):
+        temps = time.perf_counter() - etat["t"]
+        courant, pic = tracemalloc.get_traced_memory()
+        profil.append({"etape": nom, "categorie": categorie, "temps": temps,
+                       "lignes": 0, "nonzeros": 0, "allocation_ko": (pic - etat["memoire"]) / 1024})
+        tracemalloc.reset_peak()
+        etat["t"], etat["memoire"] = time.perf_counter(), courant
+
+    def terminer(familles, objectif):
+        if demarre:
+            tracemalloc.stop()
+        par_nom = {fam["nom"]: fam for fam in familles}
+        for etape in profil:
+            if etape["categorie"] == "famille" and etape["etape"] in par_nom:
+                A = par_nom[etape["etape"]]["A"]
+                etape["lignes"] = A.shape[0]
+                etape["nonzeros"] = int(A.nnz)
+            elif etape["categorie"] == "objectif":
+                etape["nonzeros"] = int(np.count_nonzero(objectif[etape["etape"]]))
+        return profil
+
+    return marquer, terminer
+
+
+def construire_modele_matriciel(data, demande, etat_initial=None, profiler=False, formulation="tenseur"):
+    """Construit le modèle CMS sous forme matricielle à partir des données JSON et de la demande.
+
+    `etat_initial` ({"B": {p: report}, "MN": {(m, c): machines}}) fixe l'état avant la
+    première période de `data['periods']` : le report B[p, t0-1] passe au second membre
+    de satisf_dem et MN[m, c, t0-1] à celui de l'équilibrage, à la place du parc initial
+    INT (utilisé par l'horizon glissant pour enchaîner les fenêtres).
+
+    Avec `profiler=True`, le modèle contient aussi "profil" : pour chaque étape
+    (index, bornes, Q1..Q7, chaque famille de contraintes) le temps, le nombre
+    de lignes, de nonzeros et le volume d'allocations Python (tracemalloc).
+
+    `formulation` choisit l'index des routes X / Z (voir l'en-tête du module).
+    """
+    if formulation not in FORMULATIONS:
+        raise ValueError(f"Formulation inconnue : {formulation} (disponibles : {', '.join(FORMULATIONS)})")
+    marquer, terminer = _profileur(profiler)
+    P = data.get('products')
+    M = data.get('machines')
+    T = data.get('periods')
+    C = data.get('cells')
+    L = data.get('subcontractors')
+    operations = data.get('operations')
+
+    MC = np.asarray(data.get('MC', []), dtype=float)
+    set_cost = np.asarray(data.get('set_cost', []), dtype=float)
+    big_m = data.get('big_m')
+    hold_cost = np.asarray(data.get('hold_cost', []), dtype=float)
+    intr_cost = np.asarray(data.get('intr_cost', []), dtype=float)
+    inter_cost = np.asarray(data.get('inter_cost', []), dtype=float)
+    sub_capacity = np.asarray(data.get('sub_capacity', []), dtype=float)
+    pdef = data.get('pdef', [])
+    tlot = np.asarray(data.get('tlot', []), dtype=float)
+    sal_cost = data.get('sal_cost', [])
+    mcost = data.get('mcost', [])
+    sub_cost = np.asarray(data.get('sub_cost', []), dtype=float)
+    CL = data.get('CL', None)
+    LP = data.get('LP', None)
+    INT = np.asarray(data.get('INT', []), dtype=float)
+    mcim = data.get('mcim', [])
+
+    nP, nM, nC, nT, nL = len(P), len(M), len(C), len(T), len(L)
+
+    # --- Index des variables ---
+    index = {
+        "X": (index_routes if formulation == "tenseur" else index_arcs)(P, M, C, T, mcim),
+        "Y": _grille(P, L, T),
+        "B": _grille(P, T),
+        "NAJ": _grille(M, C, T),
+        "NRE": _grille(M, C, T),
+        "MN": _grille(M, C, T),
+    }
+    index["Z"] = index["X"]
+    marquer("index", "preparation")
+
+    offsets = {}
+    debut = 0
+    for bloc in BLOCS:
+        offsets[bloc] = (debut, debut + len(index[bloc]))
+        debut += len(index[bloc])
+    n = debut
+
+    def colonnes(bloc):
+        d, f = offsets[bloc]
+        return np.arange(d, f)
+
+    ix = index["X"]
+    p_x, mi_x, mj_x, ci_x, cj_x, t_x = (ix[:, k] for k in range(6))
+    pos_p_x = _position(p_x, P)
+    pos_t_x = _position(t_x, T)
+    pos_mi_x = _position(mi_x, M)
+    pos_mj_x = _position(mj_x, M)
+    pos_ci_x = _position(ci_x, C)
+    pos_cj_x = _position(cj_x, C)
+    col_X, col_Z = colonnes("X"), colonnes("Z")
+
+    iy = index["Y"]
+    pos_p_y, pos_l_y, pos_t_y = _position(iy[:, 0], P), _position(iy[:, 1], L), _position(iy[:, 2], T)
+    col_Y = colonnes("Y")
+
+    ib = index["B"]
+    pos_p_b, pos_t_b = _position(ib[:, 0], P), _position(ib[:, 1], T)
+    col_B = colonnes("B")
+
+    imn = index["MN"]
+    pos_m_mn, pos_c_mn, pos_t_mn = _position(imn[:, 0], M), _position(imn[:, 1], C), _position(imn[:, 2], T)
+    col_NAJ, col_NRE, col_MN = colonnes("NAJ"), colonnes("NRE"), colonnes("MN")
+
+    # --- Bornes ---
+    lb = np.zeros(n)
+    ub = np.full(n, np.inf)
+    binaire = np.zeros(n, dtype=bool)
+
+    # Taille de lot : borne de X (les routes interdites par MCIM ne sont pas créées)
+    ub[col_X] = tlot[pos_p_x]
+    ub[col_Z] = 1.0
+    binaire[col_Z] = True
+    pdef_arr = np.asarray(pdef, dtype=float)
+    ub[col_B] = pdef_arr[pos_p_b, pos_t_b]
+    marquer("bornes", "preparation")
+
+    # --- Objectif Q1..Q7 ---
+    objectif = {q: np.zeros(n) for q in COMPOSANTES}
+    marquer("vecteurs objectif", "preparation")
+    objectif["Q1"][col_X] = set_cost[pos_mi_x] / tlot[pos_p_x]
+    marquer("Q1", "objectif")
+    q2 = {(p, mj): _cout_operation(mcim, operations, p, mj) for p in P for mj in M}
+    objectif["Q2"][col_X] = [q2[p, mj] for p, mj in zip(p_x.tolist(), mj_x.tolist())]
+    marquer("Q2", "objectif")
+    objectif["Q3"][col_NAJ] = [(mcost[m] if m in mcost else 0) for m in imn[:, 0].tolist()]
+    objectif["Q3"][col_NRE] = [-(sal_cost[m] if m in sal_cost else 0) for m in imn[:, 0].tolist()]
+    marquer("Q3", "objectif")
+    objectif["Q4"][col_Y] = sub_cost[pos_l_y]
+    marquer("Q4", "objectif")
+    objectif["Q5"][col_B] = hold_cost[pos_p_b]
+    marquer("Q5", "objectif")
+    intra = ci_x == cj_x
+    objectif["Q6"][col_X[intra]] = intr_cost[pos_p_x[intra]]
+    marquer("Q6", "objectif")
+    objectif["Q7"][col_X[~intra]] = inter_cost[pos_p_x[~intra]]
+    marquer("Q7", "objectif")
+
+    familles = []
+
+    # 1️⃣ Satisfaction demande : sum X + sum Y + B[p,t] - B[p,t-1] >= demande[p,t]
+    ligne_x = pos_p_x * nT + pos_t_x
+    ligne_y = pos_p_y * nT + pos_t_y
+    ligne_b = pos_p_b * nT + pos_t_b
+    prec = pos_t_b > 0
+    dem = np.array([demande[int(p), int(t)] for p, t in ib.tolist()], dtype=float)
+    if etat_initial is not None:
+        dem[~prec] += [etat_initial["B"].get(int(p), 0) for p in ib[~prec, 0].tolist()]
+    familles.append(_famille(
+        "satisf_dem",
+        np.concatenate([ligne_x, ligne_y, ligne_b, ligne_b[prec]]),
+        np.concatenate([col_X, col_Y, col_B, col_B[prec] - 1]),
+        np.concatenate([np.ones(len(col_X) + len(col_Y) + len(col_B)), -np.ones(prec.sum())]),
+        nP * nT, n, "ge", dem, cles=ib, format_nom="satisf_dem_{}_{}",
+    ))
+    marquer("satisf_dem", "famille")
+
+    # Activation via Z : X - big_m * Z <= 0
+    nX = len(ix)
+    familles.append(_famille(
+        "Liaison_XZ",
+        np.concatenate([np.arange(nX), np.arange(nX)]),
+        np.concatenate([col_X, col_Z]),
+        np.concatenate([np.ones(nX), np.full(nX, -float(big_m))]),
+        nX, n, "le", np.zeros(nX),
+    ))
+    marquer("Liaison_XZ", "famille")
+
+    # 2️⃣ Sous-traitance ≤ capacité
+    cles_lt = _grille(L, T)
+    familles.append(_famille(
+        "SubCap",
+        pos_l_y * nT + pos_t_y, col_Y, np.ones(len(col_Y)),
+        nL * nT, n, "le", sub_capacity[_position(cles_lt[:, 0], L)],
+        cles=cles_lt, format_nom="SubCap_l{}_t{}",
+    ))
+    marquer("SubCap", "famille")
+
+    # 3️⃣ Parc initial : MN[m, c, 1] == INT[m] (remplacé par l'état initial s'il est donné)
+    init = pos_t_mn == 0
+    if etat_initial is None:
+        cles_mc = _grille(M, C)
+        familles.append(_famille(
+            "Equilibrage_init",
+            pos_m_mn[init] * nC + pos_c_mn[init], col_MN[init], np.ones(init.sum()),
+            nM * nC, n, "eq", INT[_position(cles_mc[:, 0], M)],
+            cles=cles_mc, format_nom="Equilibrage_init_{}_{}",
+        ))
+        marquer("Equilibrage_init", "famille")
+
+    # 4️⃣ Équilibrage dynamique : NAJ - NRE + MN[t-1] - MN[t] == 0
+    ligne_mn = (pos_m_mn * nC + pos_c_mn) * nT + pos_t_mn
+    prec = pos_t_mn > 0
+    rhs_eq = np.zeros(nM * nC * nT)
+    if etat_initial is not None:
+        # MN[t0-1] connu : NAJ - NRE - MN[t0] == -MN0
+        rhs_eq[ligne_mn[init]] = [-etat_initial["MN"].get((int(m), int(c)), 0)
+                                  for m, c in imn[init, :2].tolist()]
+    familles.append(_famille(
+        "Equilibrage",
+        np.concatenate([ligne_mn, ligne_mn, ligne_mn, ligne_mn[prec]]),
+        np.concatenate([col_NAJ, col_NRE, col_MN, col_MN[prec] - 1]),
+        np.concatenate([np.ones(len(col_NAJ)), -np.ones(len(col_NRE)), -np.ones(len(col_MN)), np.ones(prec.sum())]),
+        nM * nC * nT, n, "eq", rhs_eq,
+        cles=imn, format_nom="Equilibrage_M_{}_{}_{}",
+    ))
+    marquer("Equilibrage", "famille")
+
+    # 5️⃣ LP ≤ sum MN ≤ CL
+    cles_ct = _grille(C, T)
+    ligne_ct = pos_c_mn * nT + pos_t_mn
+    familles.append(_famille(
+        "LP", ligne_ct, col_MN, np.ones(len(col_MN)),
+        nC * nT, n, "ge", np.full(nC * nT, float(LP)),
+        cles=cles_ct, format_nom="LP_c{}_t{}",
+    ))
+    marquer("LP", "famille")
+    familles.append(_famille(
+        "CL", ligne_ct, col_MN, np.ones(len(col_MN)),
+        nC * nT, n, "le", np.full(nC * nT, float(CL)),
+        cles=cles_ct, format_nom="CL_c{}_t{}",
+    ))
+    marquer("CL", "famille")
+
+    # 6️⃣ Utilisation machine : sum X[p, mi, ...] <= MC[mi] * sum_c MN[mi, c, t]
+    cles_mt = _grille(M, T)
+    familles.append(_famille(
+        "MachineUtilization",
+        np.concatenate([pos_mi_x * nT + pos_t_x, pos_m_mn * nT + pos_t_mn]),
+        np.concatenate([col_X, col_MN]),
+        np.concatenate([np.ones(nX), -MC[pos_m_mn]]),
+        nM * nT, n, "le", np.zeros(nM * nT),
+        cles=cles_mt, format_nom="MachineUtilization_m{}_t{}",
+    ))
+    marquer("MachineUtilization", "famille")
+
+    # 7️⃣ Flux : sortant de (mi, c) <= entrant dans (mi, c)
+    cles_mct = _grille(M, C, T)
+    familles.append(_famille(
+        "FlowBalance",
+        np.concatenate([(pos_mi_x * nC + pos_ci_x) * nT + pos_t_x, (pos_mj_x * nC + pos_cj_x) * nT + pos_t_x]),
+        np.concatenate([col_X, col_X]),
+        np.concatenate([np.ones(nX), -np.ones(nX)]),
+        nM * nC * nT, n, "le", np.zeros(nM * nC * nT),
+        cles=cles_mct, format_nom="FlowBalance_m{}_c{}_t{}",
+    ))
+    marquer("FlowBalance", "famille")
+
+    # Routes interdites par MCIM (et hors graphe d'arcs) : une variable X et une Z,
+    # et les lignes compatibilité / lot / liaison de la formulation par tuple, évitées
+    routes_evitees = nP * nM * nM * nC * nC * nT - nX
+    reduction = {
+        "routes_autorisees": nX,
+        "routes_evitees": routes_evitees,
+        "variables_evitees": 2 * routes_evitees,
+        "contraintes_evitees": 3 * routes_evitees,
+    }
+
+    mm = {
+        "formulation": formulation,
+        "restriction": est_restriction(formulation, C),
+        "ensembles": {"P": P, "M": M, "C": C, "T": T, "L": L},
+        "reduction": reduction,
+        "index": index,
+        "offsets": offsets,
+        "n": n,
+        "lb": lb,
+        "ub": ub,
+        "binaire": binaire,
+        "objectif": objectif,
+        "familles": familles,
+    }
+    if profiler:
+        mm["profil"] = terminer(familles, objectif)
+    return mm
+
+
+def resserrer_big_m(mm, data):
+    """Remplace big_m par la plus petite valeur valide sur chaque ligne X - M.Z <= 0.
+
+    X[p, mi, ...] est borné par la taille de lot tlot[p] (borne de la variable)
+    et par la capacité de la machine d'origine : MachineUtilization impose
+    sum X[., mi, ., ., ., t] <= MC[mi] * sum_c MN[mi, c, t] avec MN[mi, c, t] <= CL.
+    La demande ne borne pas X (la contrainte de satisfaction est un >=) et n'est donc pas utilisée.
+    """
+    fam = next(f for f in mm["familles"] if f["nom"] == "Liaison_XZ")
+    dX, fX = mm["offsets"]["X"]
+    dZ, fZ = mm["offsets"]["Z"]
+    M = mm["ensembles"]["M"]
+    C = mm["ensembles"]["C"]
+    MC = np.asarray(data.get('MC', []), dtype=float)
+    CL = data.get('CL', None)
+    big_m = float(data.get('big_m'))
+
+    borne = np.minimum(mm["ub"][dX:fX], big_m)
+    if CL is not None:
+        capacite = MC[_position(mm["index"]["X"][:, 1], M)] * float(CL) * len(C)
+        borne = np.minimum(borne, capacite)
+
+    # Colonnes Z : un seul coefficient (-M) par colonne en format CSC
+    A = fam["A"].tocsc()
+    A.sort_indices()
+    par_colonne = np.diff(A.indptr[dZ:fZ + 1])
+    A.data[A.indptr[dZ]:A.indptr[fZ]] = np.repeat(-borne, par_colonne)
+    fam["A"] = A.tocsr()
+
+    return {
+        "big_m_initial": big_m,
+        "M_max": float(borne.max()) if len(borne) else 0.0,
+        "M_moyen": float(borne.mean()) if len(borne) else 0.0,
+        "lignes": int(len(borne)),
+    }
+
+
+def classes_cellules(data, etat_initial=None):
+    """Classes de cellules interchangeables (au moins deux cellules par classe).
+
+    Aucune donnée de l'instance n'est indexée par cellule (LP, CL, coûts et
+    capacités sont communs ; Q6 / Q7 ne dépendent que de ci == cj) : deux cellules
+    ne se distinguent que par leur parc de départ, INT pour toutes sans état
+    initial, MN[m, c, t0-1] avec un état initial (fenêtre d'horizon glissant).
+    """
+    C = data.get('cells')
+    M = data.get('machines')
+    if etat_initial is None:
+        return [list(C)] if len(C) > 1 else []
+    classes = {}
+    for c in C:
+        parc = tuple(etat_initial["MN"].get((m, c), 0) for m in M)
+        classes.setdefault(parc, []).append(c)
+    return [cl for cl in classes.values() if len(cl) > 1]
+
+
+def casser_symetrie_cellules(mm, data, etat_initial=None, poids_max=POIDS_MAX_LEX):
+    """Ajoute la famille Symetrie_cellules : ordre lexicographique des parcs MN dans chaque classe.
+
+    Pour deux cellules consécutives a, b d'une classe : sum_k w_k (MN[k, a] - MN[k, b]) >= 0,
+    sur les composantes k = (t, m) libres (sans état initial, MN[., ., 1] est fixé
+    à INT et ne départage rien). Comme 0 <= MN <= CL, les poids w_k = (CL+1)^(K-1-k)
+    codent exactement l'ordre lexicographique des K premières composantes, K étant
+    limité par `poids_max` pour garder des coefficients bien conditionnés.
+    Toute solution se ramène par permutation des cellules à une solution de même
+    coût qui respecte cet ordre : l'optimum est inchangé.
+
+    En formulation "arcs" au-delà de trois cellules, seules les rotations de l'anneau
+    des cellules sont des symétries : si toutes les cellules sont interchangeables,
+    la première est ordonnée devant chacune des autres, sinon rien n'est ajouté.
+    """
+    classes = classes_cellules(data, etat_initial)
+    M, C, T = (mm["ensembles"][e] for e in ("M", "C", "T"))
+    anneau = mm.get("formulation") == "arcs" and len(C) > 3
+    if anneau:
+        classes = [cl for cl in classes if len(cl) == len(C)]
+    nC, nT = len(C), len(T)
+    debut = 0 if etat_initial is not None else 1
+    base = int(data.get('CL')) + 1
+    K = min(len(M) * (nT - debut), max(1, int(np.floor(np.log(poids_max) / np.log(base)))))
+    if not classes or K <= 0:
+        return {"classes": classes, "lignes": 0, "composantes": 0}
+
+    # Composantes (t, m) dans l'ordre lexicographique, poids décroissants
+    t_k = np.arange(K) // len(M) + debut
+    m_k = np.arange(K) % len(M)
+    poids = float(base) ** np.arange(K - 1, -1, -1)
+    dMN = mm["offsets"]["MN"][0]
+
+    if anneau:
+        paires = [(cl[0], b) for cl in classes for b in cl[1:]]
+    else:
+        paires = [(a, b) for cl in classes for a, b in zip(cl, cl[1:])]
+    pos_a = _position(np.array([a for a, _ in paires]), C)
+    pos_b = _position(np.array([b for _, b in paires]), C)
+    lignes = np.repeat(np.arange(len(paires)), K)
+    col_a = dMN + (np.tile(m_k, len(paires)) * nC + np.repeat(pos_a, K)) * nT + np.tile(t_k, len(paires))
+    col_b = dMN + (np.tile(m_k, len(paires)) * nC + np.repeat(pos_b, K)) * nT + np.tile(t_k, len(paires))
+    mm["familles"].append(_famille(
+        "Symetrie_cellules",
+        np.concatenate([lignes, lignes]),
+        np.concatenate([col_a, col_b]),
+        np.concatenate([np.tile(poids, len(paires)), -np.tile(poids, len(paires))]),
+        len(paires), mm["n"], "ge", np.zeros(len(paires)),
+        cles=np.array(paires, dtype=np.int64), format_nom="Symetrie_c{}_c{}",
+    ))
+    return {"classes": classes, "lignes": len(paires), "composantes": K}
+
+
+def borne_relaxation(mm):
+    """Borne de la relaxation linéaire (racine) calculée avec HiGHS via scipy.optimize.linprog."""
+    from scipy.optimize import linprog
+
+    A_ub, b_ub, A_eq, b_eq = [], [], [], []
+    for fam in mm["familles"]:
+        if fam["sens"] == "le":
+            A_ub.append(fam["A"])
+            b_ub.append(fam["rhs"])
+        elif fam["sens"] == "ge":
+            A_ub.append(-fam["A"])
+            b_ub.append(-fam["rhs"])
+        else:
+            A_eq.append(fam["A"])
+            b_eq.append(fam["rhs"])
+    res = linprog(
+        vecteur_objectif(mm),
+        A_ub=sp.vstack(A_ub) if A_ub else None, b_ub=np.concatenate(b_ub) if b_ub else None,
+        A_eq=sp.vstack(A_eq) if A_eq else None, b_eq=np.concatenate(b_eq) if b_eq else None,
+        bounds=np.column_stack([mm["lb"], mm["ub"]]),
+        method="highs",
+    )
+    return res.fun if res.status == 0 else None
+
+
+def vecteur_objectif(mm):
+    """Somme des composantes Q1..Q7."""
+    return sum(mm["objectif"][q] for q in COMPOSANTES)
+
+
+def nombre_nonzeros(mm):
+    return int(sum(f["A"].nnz for f in mm["familles"]))
+
+
+def lignes_profil(profil):
+    """Lignes texte du profil de construction (préfixe « Profil » : ignorées par process_txt)."""
+    lignes = [f"Profil construction : {sum(e['temps'] for e in profil):.6f} s au total"]
+    for e in sorted(profil, key=lambda e: -e["temps"]):
+        lignes.append(f"Profil {e['categorie']} {e['etape']} : {e['temps']:.6f} s, {e['lignes']} lignes, "
+                      f"{e['nonzeros']} nonzeros, {e['allocation_ko']:.1f} Ko alloués")
+    return lignes
+
+
+def valeurs_par_bloc(mm, x):
+    """Découpe un vecteur solution en {bloc: valeurs}."""
+    return {bloc: x[d:f] for bloc, (d, f) in mm["offsets"].items()}
@@ -1,20 +1,57 @@
 # CMS_Optimization.py
 # -*- coding: utf-8 -*-
-from docplex.mp.model import Model
+import numpy as np
 import os
 import json
+import hashlib
 import time
+from collections import OrderedDict
+
+from CMS_Matrices import (BLOCS, COMPOSANTES, FORMULATIONS, borne_relaxation, casser_symetrie_cellules,
+                          construire_modele_matriciel, lignes_profil, nombre_nonzeros, resserrer_big_m)
+from Solveurs import SOLVEURS, modele_docplex, resoudre, resultat_docplex
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 JSON_PATH = os.path.join(BASE_DIR, "DataFinal.json")
 OUT_TXT = os.path.join(BASE_DIR, "resultats_optimisation.txt")
+OUT_NPZ = os.path.join(BASE_DIR, "resultats_optimisation.npz")
+
+# Instances déjà lues, par empreinte du contenu (LRU)
+TAILLE_CACHE_DONNEES = 64
+_CACHE_DONNEES = OrderedDict()
+
 
 # --- Chargement JSON ---
-if not os.path.exists(JSON_PATH):
-    raise FileNotFoundError(f"Le fichier DataFinal.json est introuvable : {JSON_PATH}")
+def charger_donnees(source=None):
+    """Renvoie le dict de l'instance à partir d'un chemin JSON (défaut : DataFinal.json), d'un .dat LINGO
+    (Format_Dat, deux cellules comme dans le modèle .lng) ou d'un dict.
+
+    Les fichiers sont mis en cache par empreinte de leur contenu : relire un fichier
+    inchangé ne le re-parse pas, et un fichier modifié est relu. Le dict renvoyé
+    est partagé par le cache et ne doit pas être modifié.
+    """
+    if isinstance(source, dict):
+        return source
+    chemin = source or JSON_PATH
+    if not os.path.exists(chemin):
+        raise FileNotFoundError(f"Le fichier {os.path.basename(chemin)} est introuvable : {chemin}")
+    with open(chemin, "rb") as f:
+        contenu = f.read()
+    cle = hashlib.sha256(contenu).hexdigest()
+    if cle in _CACHE_DONNEES:
+        _CACHE_DONNEES.move_to_end(cle)
+        return _CACHE_DONNEES[cle]
+    if chemin.endswith(".dat"):
+        from Format_Dat import donnees_dat
+
+        donnees = donnees_dat(contenu.decode("utf-8", errors="replace").splitlines())
+    else:
+        donnees = json.loads(contenu.decode("utf-8"))
+    _CACHE_DONNEES[cle] = donnees
+    if len(_CACHE_DONNEES) > TAILLE_CACHE_DONNEES:
+        _CACHE_DONNEES.popitem(last=False)
+    return donnees
 
-with open(JSON_PATH, "r", encoding="utf-8") as f:
-    data = json.load(f)
 
 def load_demande_from_json(params, periods):
     """Créer le dict demande[(p,t)] à partir de data['params']"""
@@ -35,212 +72,349 @@ def load_demande_from_json(params, periods):
             demande[(i, t)] = max(0, int(round(moy_list[idx])))
     return demande
 
-def run_cms_optimization():
-    mdl = Model(name="CMS_Optimization")
+def temps_resolution(resultat):
+    """Temps de la résolution, y compris pour un succès du cache de solutions (lecture exclue).
+
+    C'est ce temps qui alimente PRECESS TIME et ses agrégats : une instance
+    répétée ne doit pas y compter la durée quasi nulle d'une lecture de cache.
+    """
+    return resultat.get("temps_origine", resultat["temps"])
 
-    # --- Ensembles ---
-    P = data.get('products')
-    M = data.get('machines')
-    T = data.get('periods')
-    C = data.get('cells')
-    L = data.get('subcontractors')
-    operations = data.get('operations')
-    
-    
-    # --- Paramètres ---
-    params = data.get("params", {})
-    demande = load_demande_from_json(params, T)
-    MC = data.get('MC', [])
-    set_cost = data.get('set_cost', [])
-    big_m = data.get('big_m')
-    hold_cost = data.get('hold_cost', [])
-    intr_cost = data.get('intr_cost', [])
-    inter_cost = data.get('inter_cost', [])
-    sub_capacity = data.get('sub_capacity', [])
-    pdef = data.get('pdef', [])
-    tlot = data.get('tlot', [])
-    sal_cost = data.get('sal_cost', [])
-    mcost = data.get('mcost', [])
-    sub_cost = data.get('sub_cost', [])
-    CL = data.get('CL', None)
-    LP = data.get('LP', None)
-    INT = data.get('INT', [])
-    mcim = data.get('mcim', [])
-
-    # --- Variables de décision ---
-    X = mdl.integer_var_dict(((p, mi, mj, ci, cj, t) 
-                              for p in P for mi in M for mj in M for ci in C for cj in C for t in T),
-                             name="X")
-    Z = mdl.binary_var_dict(((p, mi, mj, ci, cj, t)
-                             for p in P for mi in M for mj in M for ci in C for cj in C for t in T),
-                            name="Z")
-    Y = mdl.integer_var_dict(((p, l, t) for p in P for l in L for t in T), name="Y")
-    B = mdl.integer_var_dict(((p, t) for p in P for t in T), name="B")
-    NAJ = mdl.integer_var_dict(((m, c, t) for m in M for c in C for t in T), name="NAJ")
-    NRE = mdl.integer_var_dict(((m, c, t) for m in M for c in C for t in T), name="NRE")
-    MN = mdl.integer_var_dict(((m, c, t) for m in M for c in C for t in T), name="MN")
-
-    # --- Fonction objectif (simplifiée Q1, Q4, Q5) ---
-    Q1 = mdl.sum((set_cost[mi-1] / tlot[p-1]) * X[p, mi, mj, ci, cj, t]
-                 for (p, mi, mj, ci, cj, t) in X)
-    Q2 = mdl.sum(mcim[p, mj] * operations[p][mj] * X[p, mi, mj, ci, cj, t] 
-                 for (p, mi, mj, ci, cj, t) in X if p < len(operations) and mj < len(operations[p]) and (p, mj) in mcim)
-    Q3 = mdl.sum((mcost[mi] if mi in mcost else 0) * NAJ[mi, c, t] - (sal_cost[mi] if mi in sal_cost else 0) * NRE[mi, c, t] 
-                 for mi in M for c in C for t in T)
-    Q4 = mdl.sum(sub_cost[l-1] * Y[p, l, t] for p in P for l in L for t in T)
-    Q5 = mdl.sum(hold_cost[p-1] * B[p, t] for p in P for t in T)
-    Q6 = mdl.sum(intr_cost[p-1] * X[p, mi, mj, c, c, t] for p in P for mi in M for mj in M for c in C for t in T)
-    Q7 = mdl.sum(inter_cost[p-1] * X[p, mi, mj, ci, cj, t] for p in P for mi in M for mj in M for ci in C for cj in C for t in T if ci != cj)
-
-    mdl.minimize(Q1 + Q2 + Q3 + Q4 + Q5 + Q6 + Q7)
-
-    # --- Contraintes principales ---
-    # 1️⃣ Satisfaction demande
-    for p in P:
-      for t in T:
-        # B_{p,t-1} = 0 si t=1
-        prev_B = B[p, t-1] if t > 1 else 0
-        
-        mdl.add_constraint(
-            mdl.sum(X[p, mi, mj, ci, cj, t] for mi in M for mj in M for ci in C for cj in C)
-            + mdl.sum(Y[p, l, t] for l in L)
-            + B[p, t] >= demande[p, t] + prev_B,
-                    ctname=f"satisf_dem_{p}_{t}")
-
-    #for p in P:
-       # for t_index, t in enumerate(T):
-            #lhs = mdl.sum(X[p, mi, mj, ci, cj, t] for mi in M for mj in M for ci in C for cj in C) + \
-                #  mdl.sum(Y[p, l, t] for l in L) + B[p, t]
-            #rhs = demande.get((p, t), 0) + (B.get((p, T[t_index-1]), 0) if t_index > 0 else 0)
-            #mdl.add_constraint(lhs >= rhs, f"Demand_p{p}_t{t}")
-            
-            
-    #for p in P:
-       #for mi in M:
-        # for mj in M:
-           # for ci in C:
-              #  for cj in C:
-                    #for t in T:
-                       # mdl.add_constraint(
-                           # X[p, mi, mj, ci, cj, t] * (1 - MCIM[p, mj]) <= 0,
-                             # ctname=f"ct_X_MCIM_{p}_{mi}_{mj}_{c}_{cj}_{t}")
-            
-            
-    for p, mi, mj, ci, cj, t in X:
-            # Index ajusté pour accéder à mcim
-            if 0 <= p-1 < len(mcim) and 0 <= mj-1 < len(mcim[0]):
-                val_mcim = mcim[p-1][mj-1]
-            else:
-                val_mcim = 0  # ou tu peux lever une exception ici si nécessaire
-
-            # 1. Interdire les transferts si machine non autorisée
-            mdl.add_constraint(X[p, mi, mj, ci, cj, t] * (1 - val_mcim) <= 0)
-
-            # 2. Respect du lot max
-            mdl.add_constraint(X[p, mi, mj, ci, cj, t] <= tlot[p-1])
-
-            # 3. Activation via Z
-            mdl.add_constraint(X[p, mi, mj, ci, cj, t] <= Z[p, mi, mj, ci, cj, t] * big_m)
-
-    # 2️⃣ Sous-traitance ≤ capacité
-    for l in L:
-        for t in T:
-            mdl.add_constraint(mdl.sum(Y[p, l, t] for p in P) <= sub_capacity[l-1], f"SubCap_l{l}_t{t}")
-
-    # 3️⃣ Stock ≤ pdef
-    for p in P:
-     for t in T:
-        mdl.add_constraints(B[p, t] <= pdef[p-1][t-1] for p in P for t in T)
-        
-    for m in M:
-       for c in C:
-          mdl.add_constraint(MN[m, c, 1] == INT[m-1], f"Equilibrage_init_{m}_{c}")
-
-    # 4️⃣ Machines (NAJ/NRE/MN)
-# --- Contrainte d’équilibrage dynamique des machines ---
-    for m in M:
-       for c in C:
-        for t in T:
-            if t > 1:
-                mdl.add_constraint(
-                    NAJ[m, c, t] - NRE[m, c, t] + MN[m, c, t-1] == MN[m, c, t],
-                    ctname=f"Equilibrage_M_{m}_{c}_{t}"
-                )
-            else:
-                # Pour t = 1, il n’y a pas de période précédente (on peut supposer MN[m,c,0] = 0)
-                mdl.add_constraint(
-                    NAJ[m, c, t] - NRE[m, c, t] == MN[m, c, t],
-                    ctname=f"Equilibrage_init_M_{m}_{c}_{t}"
-                )
-    # 5️⃣ LP et CL
-    for c in C:
-        for t in T:
-            mdl.add_constraint(LP <= mdl.sum(MN[m, c, t] for m in M), f"LP_c{c}_t{t}")
-            mdl.add_constraint(mdl.sum(MN[m, c, t] for m in M) <= CL, f"CL_c{c}_t{t}")
-
-    # 6️⃣ Utilisation machine
-    for t in T:
-        for mi in M:
-            mdl.add_constraint(
-                mdl.sum(X[p, mi, mj, ci, cj, t] for p in P for mj in M for c in C for cp in C) 
-                <= MC[m-1] * mdl.sum(MN[m, c, t] for c in C),
-                f"MachineUtilization_m{m}_t{t}"
-            )
-
-    # 7️⃣ Flux intra-cellulaire
-    for t in T:
-        for mi in M:
-            for c in C:
-                lhs = mdl.sum(X[p, mi, mj, c, cp, t] for p in P for mj in M for cp in C)
-                rhs = mdl.sum(X[p, mk, mi, cp, c, t] for p in P for mk in M for cp in C)
-                mdl.add_constraint(lhs <= rhs, f"FlowBalance_m{mi}_c{c}_t{t}")
-                
-    # --- Résolution ---
-    start_time = time.time()
-    solution = mdl.solve(log_output=False)
-    elapsed_time = time.time() - start_time
 
-    # --- Écriture fichier sortie ---
-    with open(OUT_TXT, "w", encoding="utf-8") as f:
+def ecrire_resultats(out_txt, mm, demande, resultat, LP, CL, lignes_stats=()):
+    """Écrit le fichier texte de résultats relu par MainPrincipale.process_txt."""
+    with open(out_txt, "w", encoding="utf-8") as f:
         f.write("Demande :\n")
         for k in sorted(demande.keys()):
             f.write(f"{k} {demande[k]}\n")
 
-        if solution:
+        if resultat["trouve"]:
             f.write("\n✅ Solution trouvée\n")
-            f.write(f"Statut: {mdl.solve_details.status}\n")
-            f.write(f"Fonction objectif = {mdl.objective_value}\n")
-            f.write(f"Nombre d'itérations = {mdl.solve_details.nb_iterations}\n")
-            f.write(f"Temps d'exécution : {elapsed_time:.4f} s\n\n")
-            
+            f.write(f"Statut: {resultat['statut']}\n")
+            f.write(f"Fonction objectif = {resultat['objectif']}\n")
+            f.write(f"Nombre d'itérations = {resultat['iterations']}\n")
+            if resultat.get("noeuds") is not None:
+                f.write(f"Nœuds explorés = {resultat['noeuds']}\n")
+            f.write(f"Temps d'exécution : {temps_resolution(resultat):.4f} s\n\n")
+
             tol = 1e-6
-            for name, var_dict in [("X", X), ("Z", Z), ("Y", Y), ("B", B), ("NAJ", NAJ), ("NRE", NRE), ("MN", MN)]:
+            valeurs = resultat["x"]
+            for name in BLOCS:
                 f.write(f"\n--- Variables {name} ---\n")
                 found = False
-                for k, var in var_dict.items():
-                    val = var.solution_value
-                    if val is not None and abs(val) > tol:
-                        f.write(f"{name}{k} = {val}\n")
+                d = mm["offsets"][name][0]
+                for i, k in enumerate(mm["index"][name].tolist()):
+                    val = float(valeurs[d + i])
+                    if abs(val) > tol:
+                        f.write(f"{name}{tuple(k)} = {val}\n")
                         found = True
                 if not found:
                     f.write(f"Aucune valeur significative non nulle pour {name}.\n")
         else:
             f.write("\n❌ Aucune solution trouvée.\n")
-            f.write(f"Temps écoulé: {elapsed_time:.4f} s\n")
-        
+            f.write(f"Temps écoulé: {resultat['temps']:.4f} s\n")
+
         f.write("\nLP ET CL (depuis JSON si présents):\n")
         f.write(f"LP = {LP}\n")
         f.write(f"CL = {CL}\n")
 
         f.write("\nStatistiques du modèle :\n")
-        f.write(f"Variables totales : {mdl.number_of_variables}\n")
-        f.write(f"Contraintes totales : {mdl.number_of_constraints}\n")
-        try:
-            f.write(f"nonzeros : {mdl.number_of_nonzeros}\n")
-        except Exception:
-            pass
+        f.write(f"Variables totales : {resultat['variables']}\n")
+        f.write(f"Contraintes totales : {resultat['contraintes']}\n")
+        if "nonzeros" in resultat:
+            f.write(f"nonzeros : {resultat['nonzeros']}\n")
+        if resultat.get("cache"):
+            f.write(f"Cache solution : succès (lecture {resultat['temps']:.4f} s)\n")
+        f.write(f"Variables évitées (MCIM) : {mm['reduction']['variables_evitees']}\n")
+        f.write(f"Contraintes évitées (MCIM) : {mm['reduction']['contraintes_evitees']}\n")
+        for ligne in lignes_stats:
+            f.write(ligne + "\n")
+
+    print(f"Résultats écrits dans {out_txt}")
+
+
+def artefact(mm, demande, resultat, LP, CL):
+    """Résultat sous forme de tableaux NumPy, en mémoire (contenu du .npz d'ecrire_artefact).
+
+    Contenu : index_<bloc> / valeurs_<bloc> pour chaque bloc de variables,
+    Q1..Q7 à la solution, demande (p, t, valeur), statistiques de résolution.
+    """
+    tableaux = {}
+    x = resultat["x"]
+    for bloc in BLOCS:
+        d, f = mm["offsets"][bloc]
+        tableaux[f"index_{bloc}"] = mm["index"][bloc]
+        tableaux[f"valeurs_{bloc}"] = x[d:f] if x is not None else np.zeros(0)
+    for q in COMPOSANTES:
+        tableaux[q] = np.float64(mm["objectif"][q] @ x) if x is not None else np.float64(np.nan)
+    tableaux["demande"] = np.array([(p, t, v) for (p, t), v in sorted(demande.items())], dtype=np.int64)
+    tableaux["trouve"] = np.bool_(resultat["trouve"])
+    tableaux["statut"] = np.str_(resultat["statut"])
+    tableaux["objectif"] = np.float64(resultat["objectif"] if resultat["objectif"] is not None else np.nan)
+    tableaux["iterations"] = np.int64(resultat["iterations"] or 0)
+    tableaux["temps"] = np.float64(temps_resolution(resultat))
+    tableaux["variables"] = np.int64(resultat["variables"])
+    tableaux["contraintes"] = np.int64(resultat["contraintes"])
+    tableaux["nonzeros"] = np.int64(resultat.get("nonzeros", nombre_nonzeros(mm)))
+    tableaux["cache"] = np.bool_(resultat.get("cache", False))
+    tableaux["formulation"] = np.str_(mm["formulation"])
+    tableaux["restriction"] = np.bool_(mm["restriction"])
+    tableaux["LP"] = np.str_(LP)
+    tableaux["CL"] = np.str_(CL)
+    return tableaux
+
+
+def ecrire_artefact(out_npz, mm, demande, resultat, LP, CL):
+    """Écrit l'artefact du résultat en .npz, lu sans passer par le texte."""
+    np.savez(out_npz, **artefact(mm, demande, resultat, LP, CL))
+
+
+def run_cms_optimization(resserrer=True, mesurer_borne_lp=True, json_path=None, out_txt=OUT_TXT, threads=None,
+                         out_npz=OUT_NPZ, solveur="docplex", temps_limite=None, parametres=None, profiler=False,
+                         donnees=None, cache_modeles=False, cache_solutions=False, symetrie=False,
+                         formulation="tenseur", presolve=False, portefeuille=0, preferer=False):
+    """Construit, résout et écrit les résultats d'une instance.
+
+    `json_path` et `out_txt` permettent à chaque instance d'un lot d'utiliser ses
+    propres fichiers (`donnees` peut aussi être passé directement sous forme de dict) ;
+    `out_txt` / `out_npz` à None : rien n'est écrit, le résultat renvoyé porte
+    l'artefact en mémoire sous "artefact" (Lecture_Resultats.process_artefact) ;
+    `threads` limite les threads du solveur (1 par worker en mode lot).
+    `solveur` choisit le backend de Solveurs ("docplex" ou "highs"), `temps_limite`
+    est en secondes et `parametres` est transmis tel quel au backend.
+    `profiler` ajoute le profil de construction par famille au fichier texte et
+    l'écrit aussi en JSON (<out_txt>_profil.json).
+    `cache_modeles` recharge le modèle resserré depuis Cache_Modeles quand une instance
+    de même structure a déjà été construite (seule la demande est alors mise à jour ;
+    ni profil ni borne LP dans ce cas).
+    `cache_solutions` renvoie la solution mémorisée par Cache_Solutions si la même
+    instance a déjà été résolue avec le même solveur et les mêmes options.
+    `symetrie` ajoute l'ordre lexicographique des parcs MN entre cellules
+    interchangeables (CMS_Matrices.casser_symetrie_cellules) : même optimum,
+    moins de copies permutées explorées par le branch-and-bound.
+    `formulation` choisit l'index des routes X / Z de CMS_Matrices : "tenseur" (toutes
+    les routes MCIM) ou "arcs" (graphe creux linéaire en nombre de cellules ; au-delà
+    de 3 cellules, restriction heuristique dont l'optimum peut dépasser celui de "tenseur").
+    `presolve` résout le modèle réduit par Presolve (variables fixées ou dominées,
+    dont Z, lignes singletons, redondantes et en double retirées) ; le résultat est
+    ramené au modèle complet avant l'écriture.
+    `portefeuille` (K > 0) fait courir K configurations du solveur en parallèle
+    (Portefeuille.resoudre_portefeuille) et garde la première qui prouve l'optimum ;
+    `preferer` reprend, pour une résolution simple sans `parametres`, la configuration
+    qui a le plus souvent gagné ces courses sur la même structure d'instance.
+    """
+    donnees = charger_donnees(donnees if donnees is not None else json_path)
+
+    # --- Ensembles ---
+    T = donnees.get('periods')
+    params = donnees.get("params", {})
+    demande = load_demande_from_json(params, T)
+    CL = donnees.get('CL', None)
+    LP = donnees.get('LP', None)
+
+    lignes_stats = []
+    if cache_modeles:
+        from Cache_Modeles import modele_depuis_cache, statistiques_cache
+
+        mm, infos_cache = modele_depuis_cache(donnees, demande, resserrer=resserrer, formulation=formulation)
+        stats = statistiques_cache()
+        etat = "succès" if infos_cache["succes"] else "échec"
+        print(f"[OK] Cache modèles : {etat} ({infos_cache['temps']:.4f} s) ; "
+              f"{stats['succes']} succès / {stats['echecs']} échecs, "
+              f"{stats['temps_economise']:.3f} s économisées")
+        lignes_stats.append(f"Cache modèle : {etat} (clé {infos_cache['cle'][:12]}, "
+                            f"{infos_cache['temps_economise']:.4f} s économisées)")
+        resserrer = False  # déjà fait à la construction de l'entrée
+    else:
+        # --- Modèle matriciel puis transmission en bloc au solveur ---
+        mm = construire_modele_matriciel(donnees, demande, profiler=profiler, formulation=formulation)
+    if mm["restriction"]:
+        print(f"[AVERTISSEMENT] Formulation {formulation} sur {len(donnees['cells'])} cellules : restriction "
+              f"heuristique (transferts vers les cellules voisines seulement), optimum possiblement > tenseur")
+
+    # --- Resserrement des big-M de la liaison X <= M.Z ---
+    if profiler and "profil" in mm:
+        lignes_stats.extend(lignes_profil(mm["profil"]))
+        if out_txt:
+            with open(os.path.splitext(out_txt)[0] + "_profil.json", "w", encoding="utf-8") as f:
+                json.dump(mm["profil"], f, indent=2, ensure_ascii=False)
+    if resserrer:
+        borne_avant = borne_apres = None
+        if mesurer_borne_lp:
+            borne_avant = borne_relaxation(mm)
+        infos_m = resserrer_big_m(mm, donnees)
+        if mesurer_borne_lp:
+            borne_apres = borne_relaxation(mm)
+        print(f"[OK] Big-M resserré sur {infos_m['lignes']} lignes : "
+              f"{infos_m['big_m_initial']:g} -> max {infos_m['M_max']:g}")
+        lignes_stats.append(f"Big-M resserré : {infos_m['big_m_initial']:g} -> max {infos_m['M_max']:g}"
+                            f" (moyenne {infos_m['M_moyen']:.2f})")
+        if borne_avant is not None and borne_apres is not None:
+            print(f"     Borne LP racine : {borne_avant:.4f} -> {borne_apres:.4f} "
+                  f"(écart {borne_apres - borne_avant:+.4f})")
+            lignes_stats.append(f"Borne LP racine avant / après : {borne_avant:.4f} / {borne_apres:.4f}")
+
+    # --- Cassage des symétries entre cellules interchangeables ---
+    if symetrie:
+        infos_s = casser_symetrie_cellules(mm, donnees)
+        classes = " ".join("{" + ",".join(map(str, cl)) + "}" for cl in infos_s["classes"]) or "aucune"
+        print(f"[OK] Symétrie cellules : {infos_s['lignes']} contraintes d'ordre "
+              f"sur {infos_s['composantes']} composantes MN (classes {classes})")
+        lignes_stats.append(f"Symétrie cellules : {infos_s['lignes']} contraintes, classes {classes}")
+
+    # --- Presolve : modèle réduit transmis au solveur ---
+    mm_resolu, infos_p = mm, None
+    if presolve:
+        from Presolve import lignes_rapport, presolve as reduire
+
+        start_time = time.perf_counter()
+        mm_resolu, infos_p = reduire(mm)
+        rapport = lignes_rapport(infos_p)
+        print(f"[OK] {rapport[0]} ({time.perf_counter() - start_time:.4f} s)")
+        print(f"     {rapport[1]}")
+        lignes_stats.extend(rapport)
+
+    # --- Configuration du solveur : course ou configuration préférée ---
+    structure = None
+    if portefeuille or preferer:
+        from Cache_Modeles import empreinte_structure
+
+        structure = empreinte_structure(donnees, formulation=formulation)
+    if preferer and not portefeuille and parametres is None:
+        from Portefeuille import configuration_preferee
+
+        preferee = configuration_preferee(solveur, structure)
+        if preferee is not None:
+            nom_config, parametres = preferee
+            print(f"[OK] Configuration préférée : {nom_config} {parametres}")
+            lignes_stats.append(f"Configuration : {nom_config} (historique du portefeuille)")
+
+    # --- Résolution ---
+    resultat = None
+    if cache_solutions:
+        from Cache_Solutions import chercher_solution, cle_solution, enregistrer_solution
+
+        cle = cle_solution(donnees, solveur, parametres=parametres, temps_limite=temps_limite, symetrie=symetrie,
+                           formulation=formulation, presolve=presolve, portefeuille=portefeuille)
+        resultat = chercher_solution(cle)
+        if resultat is not None:
+            print(f"[OK] Solution mémorisée réutilisée (clé {cle[:12]}) : résolution de "
+                  f"{resultat['temps_origine']:.4f} s évitée")
+    if resultat is None:
+        if portefeuille:
+            from Portefeuille import lignes_rapport as lignes_portefeuille, resoudre_portefeuille
+
+            resultat = resoudre_portefeuille(mm_resolu, solveur, k=portefeuille, structure=structure, threads=threads,
+                                             temps_limite=temps_limite, parametres=parametres)
+            print(f"[OK] Portefeuille {solveur} : {resultat['configuration']} gagnante, "
+                  f"{resultat['statut']} en {resultat['temps']:.4f} s")
+            lignes_stats.extend(lignes_portefeuille(resultat))
+        else:
+            resultat = resoudre(mm_resolu, solveur, threads=threads, temps_limite=temps_limite, parametres=parametres)
+            print(f"[OK] Résolution {solveur} : {resultat['statut']} en {resultat['temps']:.4f} s")
+        if infos_p is not None:
+            from Presolve import postsolve_resultat
+
+            postsolve_resultat(infos_p, resultat)
+        if cache_solutions:
+            enregistrer_solution(cle, resultat)
+    lignes_stats.append(f"Solveur : {solveur}")
+    if mm["restriction"]:
+        lignes_stats.append(f"Formulation : {mm['formulation']} (restriction heuristique, "
+                            f"optimum possiblement supérieur à tenseur)")
+    else:
+        lignes_stats.append(f"Formulation : {mm['formulation']}")
+
+    # --- Écriture fichier sortie (sur demande) ---
+    resultat["artefact"] = artefact(mm, demande, resultat, LP, CL)
+    if out_txt:
+        ecrire_resultats(out_txt, mm, demande, resultat, LP, CL, lignes_stats)
+    if out_npz:
+        np.savez(out_npz, **resultat["artefact"])
+    return resultat
+
+
+class ModeleCMSPersistant:
+    """Modèle CMS construit une seule fois pour toute une série d'instances.
+
+    Entre deux instances seule la demande change : `resoudre(demande)` modifie
+    les seconds membres des contraintes satisf_dem_{p}_{t} et repart de la
+    solution précédente comme MIP start. Un scénario de 50 instances coûte
+    ainsi une construction et 50 résolutions à chaud.
+    """
+
+    def __init__(self, donnees=None, demande=None, resserrer=True, threads=None):
+        self.donnees = charger_donnees(donnees)
+        if demande is None:
+            demande = load_demande_from_json(self.donnees.get("params", {}), self.donnees.get('periods'))
+        self.mm = construire_modele_matriciel(self.donnees, demande)
+        if resserrer:
+            resserrer_big_m(self.mm, self.donnees)
+        self.mdl, self.dvars, self.variables, contraintes = modele_docplex(self.mm)
+        if threads is not None:
+            self.mdl.parameters.threads = threads
+        fam = next(f for f in self.mm["familles"] if f["nom"] == "satisf_dem")
+        self._famille_dem = fam
+        self.satisf_dem = {tuple(k): ct for k, ct in zip(fam["cles"].tolist(), contraintes["satisf_dem"])}
+        self.demande = dict(demande)
+        self.solution = None
+
+    def mettre_a_jour_demande(self, demande):
+        """Change uniquement les seconds membres satisf_dem_{p}_{t} qui diffèrent."""
+        for i, (cle, ct) in enumerate(self.satisf_dem.items()):
+            valeur = demande[cle]
+            if valeur != self.demande.get(cle):
+                ct.rhs = valeur
+                self._famille_dem["rhs"][i] = valeur
+        self.demande = dict(demande)
+
+    def resoudre(self, demande=None, log_output=False):
+        if demande is not None:
+            self.mettre_a_jour_demande(demande)
+        if self.solution is not None:
+            from docplex.mp.constants import EffortLevel
+
+            # L'incumbent précédent peut être infaisable pour la nouvelle demande : CPLEX le répare
+            self.mdl.clear_mip_starts()
+            self.mdl.add_mip_start(self.solution, effort_level=EffortLevel.Repair)
+
+        start_time = time.time()
+        solution = self.mdl.solve(log_output=log_output)
+        elapsed_time = time.time() - start_time
+        if solution:
+            self.solution = solution
+        return resultat_docplex(self.mdl, solution, self.dvars, elapsed_time)
+
+    def ecrire(self, resultat, out_txt=OUT_TXT, out_npz=OUT_NPZ):
+        LP, CL = self.donnees.get('LP', None), self.donnees.get('CL', None)
+        if out_txt:
+            ecrire_resultats(out_txt, self.mm, self.demande, resultat, LP, CL)
+        if out_npz:
+            ecrire_artefact(out_npz, self.mm, self.demande, resultat, LP, CL)
 
-    print(f"Résultats écrits dans {OUT_TXT}")
 
 if __name__ == "__main__":
-    run_cms_optimization()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Optimisation CMS d'une instance")
+    parser.add_argument("--donnees", default=None, help="instance .json ou .dat (défaut : DataFinal.json)")
+    parser.add_argument("--solveur", choices=sorted(SOLVEURS), default="docplex")
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--temps-limite", type=float, default=None, help="en secondes")
+    parser.add_argument("--profiler", action="store_true", help="profil de construction par famille")
+    parser.add_argument("--cache-modeles", action="store_true", help="réutiliser les modèles de même structure")
+    parser.add_argument("--cache-solutions", action="store_true", help="réutiliser les solutions déjà calculées")
+    parser.add_argument("--symetrie", action="store_true", help="ordonner les cellules interchangeables")
+    parser.add_argument("--formulation", choices=FORMULATIONS, default="tenseur",
+                        help="index des routes X / Z ; arcs : restriction heuristique au-delà de 3 cellules")
+    parser.add_argument("--presolve", action="store_true", help="réduire le modèle avant le solveur")
+    parser.add_argument("--portefeuille", type=int, default=0, metavar="K",
+                        help="course de K configurations du solveur en parallèle")
+    parser.add_argument("--preferer", action="store_true",
+                        help="configuration la plus souvent gagnante du portefeuille")
+    args = parser.parse_args()
+    run_cms_optimization(json_path=args.donnees, solveur=args.solveur, threads=args.threads, temps_limite=args.temps_limite,
+                         profiler=args.profiler, cache_modeles=args.cache_modeles,
+                         cache_solutions=args.cache_solutions, symetrie=args.symetrie,
+                         formulation=args.formulation, presolve=args.presolve, portefeuille=args.portefeuille,
+                         preferer=args.preferer)
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+"""
+Cache_Modeles.py
+----------------
+Cache disque des modèles matriciels, adressé par le contenu structurel de l'instance.
+
+Deux instances qui ne diffèrent que par la demande ont la même structure
+(ensembles, mcim, tlot, MC, coûts...) : le modèle construit (et déjà resserré)
+est écrit une fois en .npz binaire, puis rechargé aux exécutions suivantes en
+ne modifiant que les seconds membres satisf_dem_{p}_{t}.
+
+Le dossier est borné en taille (éviction LRU sur la date de dernier accès) et
+tient les compteurs de succès / échecs et le temps de construction économisé ;
+leur mise à jour est faite sous verrou exclusif (workers de --lot concurrents).
+"""
+import hashlib
+import json
+import os
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+import numpy as np
+import scipy.sparse as sp
+
+from CMS_Matrices import BLOCS, COMPOSANTES, construire_modele_matriciel, resserrer_big_m
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(BASE_DIR, "cache_modeles")
+TAILLE_MAX_OCTETS = 512 * 2 ** 20
+# À incrémenter si le contenu du modèle matriciel change
+VERSION_FORMAT = 3
+STATS_FICHIER = "stats.json"
+
+
+def empreinte_structure(donnees, resserrer=True, formulation="tenseur"):
+    """Empreinte de tout ce qui définit le modèle hors demande (params est exclu)."""
+    structure = {k: v for k, v in donnees.items() if k != "params"}
+    texte = json.dumps([VERSION_FORMAT, bool(resserrer), formulation, structure],
+                       sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(texte.encode("utf-8")).hexdigest()
+
+
+# --- 🔹 Sérialisation du modèle matriciel ---
+def sauver_modele(chemin, mm, temps_construction):
+    tableaux = {
+        "lb": mm["lb"], "ub": mm["ub"], "binaire": mm["binaire"],
+        "temps_construction": np.float64(temps_construction),
+    }
+    for bloc in BLOCS:
+        tableaux[f"index_{bloc}"] = mm["index"][bloc]
+    for q in COMPOSANTES:
+        tableaux[f"objectif_{q}"] = mm["objectif"][q]
+    meta_familles = []
+    for i, fam in enumerate(mm["familles"]):
+        A = fam["A"]
+        tableaux[f"f{i}_data"], tableaux[f"f{i}_indices"], tableaux[f"f{i}_indptr"] = A.data, A.indices, A.indptr
+        tableaux[f"f{i}_rhs"] = fam["rhs"]
+        if fam["cles"] is not None:
+            tableaux[f"f{i}_cles"] = fam["cles"]
+        meta_familles.append({"nom": fam["nom"], "sens": fam["sens"], "format": fam["format"],
+                              "forme": list(A.shape), "cles": fam["cles"] is not None})
+    meta = {
+        "formulation": mm["formulation"], "restriction": mm["restriction"],
+        "ensembles": mm["ensembles"], "reduction": mm["reduction"], "n": mm["n"],
+        "offsets": {b: list(v) for b, v in mm["offsets"].items()}, "familles": meta_familles,
+    }
+    tableaux["meta"] = np.str_(json.dumps(meta))
+    # Écriture atomique : un worker concurrent ne lit jamais un fichier partiel
+    tmp = f"{chemin}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        np.savez(f, **tableaux)
+    os.replace(tmp, chemin)
+
+
+def charger_modele(chemin):
+    """Relit un modèle écrit par sauver_modele ; renvoie (mm, temps de construction d'origine)."""
+    with np.load(chemin, allow_pickle=False) as npz:
+        meta = json.loads(str(npz["meta"]))
+        familles = []
+        for i, fm in enumerate(meta["familles"]):
+            A = sp.csr_matrix((npz[f"f{i}_data"], npz[f"f{i}_indices"], npz[f"f{i}_indptr"]),
+                              shape=tuple(fm["forme"]))
+            familles.append({
+                "nom": fm["nom"], "A": A, "sens": fm["sens"], "rhs": npz[f"f{i}_rhs"].copy(),
+                "cles": npz[f"f{i}_cles"] if fm["cles"] else None, "format": fm["format"],
+            })
+        mm = {
+            "formulation": meta["formulation"],
+            "restriction": meta["restriction"],
+            "ensembles": meta["ensembles"],
+            "reduction": meta["reduction"],
+            "index": {bloc: npz[f"index_{bloc}"] for bloc in BLOCS},
+            "offsets": {b: tuple(v) for b, v in meta["offsets"].items()},
+            "n": meta["n"],
+            "lb": npz["lb"], "ub": npz["ub"], "binaire": npz["binaire"],
+            "objectif": {q: npz[f"objectif_{q}"] for q in COMPOSANTES},
+            "familles": familles,
+        }
+        return mm, float(npz["temps_construction"])
+
+
+def appliquer_demande(mm, demande):
+    """Remplace les seconds membres satisf_dem_{p}_{t} par la nouvelle demande."""
+    fam = next(f for f in mm["familles"] if f["nom"] == "satisf_dem")
+    fam["rhs"] = np.array([demande[int(p), int(t)] for p, t in fam["cles"].tolist()], dtype=float)
+
+
+# --- 🔹 Statistiques et éviction ---
+@contextmanager
+def verrou(chemin):
+    """Verrou exclusif inter-processus sur le fichier `chemin` (créé au besoin)."""
+    os.makedirs(os.path.dirname(chemin) or ".", exist_ok=True)
+    with open(chemin, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK abandonne après 10 s d'attente
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def lire_stats(dossier):
+    try:
+        with open(os.path.join(dossier, STATS_FICHIER), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {"succes": 0, "echecs": 0, "temps_economise": 0.0}
+
+
+def ajouter_stats(dossier, succes=0, echecs=0, temps_economise=0.0):
+    """Lecture, mise à jour et écriture des compteurs sous un même verrou (aucune mise à jour perdue)."""
+    with verrou(os.path.join(dossier, f"{STATS_FICHIER}.lock")):
+        stats = lire_stats(dossier)
+        stats["succes"] += succes
+        stats["echecs"] += echecs
+        stats["temps_economise"] += temps_economise
+        tmp = os.path.join(dossier, f"{STATS_FICHIER}.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(stats, f)
+        os.replace(tmp, os.path.join(dossier, STATS_FICHIER))
+    return stats
+
+
+def statistiques_cache(dossier=CACHE_DIR):
+    stats = lire_stats(dossier)
+    fichiers = [e for e in os.scandir(dossier) if e.name.endswith(".npz")] if os.path.isdir(dossier) else []
+    stats["entrees"] = len(fichiers)
+    stats["octets"] = sum(e.stat().st_size for e in fichiers)
+    return stats
+
+
+def evincer_lru(dossier, taille_max):
+    """Supprime les entrées .npz les moins récemment utilisées jusqu'à respecter le budget."""
+    entrees = []
+    for e in os.scandir(dossier):
+        if e.name.endswith(".npz"):
+            try:
+                st = e.stat()
+                entrees.append((st.st_mtime, st.st_size, e.path))
+            except FileNotFoundError:
+                continue
+    total = sum(taille for _, taille, _ in entrees)
+    for _, taille, chemin in sorted(entrees):
+        if total <= taille_max:
+            break
+        try:
+            os.remove(chemin)
+        except FileNotFoundError:
+            pass
+        total -= taille
+
+
+def modele_depuis_cache(donnees, demande, resserrer=True, dossier=CACHE_DIR, taille_max=TAILLE_MAX_OCTETS,
+                        formulation="tenseur"):
+    """Modèle matriciel de l'instance, rechargé du cache si sa structure est connue.
+
+    Renvoie (mm, infos) avec infos = {"succes", "cle", "temps", "temps_economise"}.
+    """
+    os.makedirs(dossier, exist_ok=True)
+    cle = empreinte_structure(donnees, resserrer, formulation)
+    chemin = os.path.join(dossier, f"{cle}.npz")
+    start_time = time.perf_counter()
+
+    if os.path.exists(chemin):
+        try:
+            mm, temps_construction = charger_modele(chemin)
+            appliquer_demande(mm, demande)
+            os.utime(chemin)  # dernier accès, pour l'éviction LRU
+            temps = time.perf_counter() - start_time
+            economise = max(0.0, temps_construction - temps)
+            ajouter_stats(dossier, succes=1, temps_economise=economise)
+            return mm, {"succes": True, "cle": cle, "temps": temps, "temps_economise": economise}
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[AVERTISSEMENT] Entrée de cache illisible, reconstruction : {e}")
+
+    mm = construire_modele_matriciel(donnees, demande, formulation=formulation)
+    if resserrer:
+        resserrer_big_m(mm, donnees)
+    temps = time.perf_counter() - start_time
+    sauver_modele(chemin, mm, temps)
+    evincer_lru(dossier, taille_max)
+    ajouter_stats(dossier, echecs=1)
+    return mm, {"succes": False, "cle": cle, "temps": temps, "temps_economise": 0.0}
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+Cache_Solutions.py
+------------------
+Mémoïsation des résolutions : une instance déjà résolue (même demande, mêmes
+paramètres, même solveur) n'est pas résolue une seconde fois.
+
+La clé est l'empreinte canonique de l'instance complète (dict JSON, demande
+comprise) et des options de résolution. L'entrée stocke l'objectif, le vecteur
+solution et les statistiques ; le dossier est borné en taille (éviction LRU).
+"""
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+from Cache_Modeles import ajouter_stats, evincer_lru, lire_stats
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(BASE_DIR, "cache_solutions")
+TAILLE_MAX_OCTETS = 256 * 2 ** 20
+VERSION_FORMAT = 1
+
+# Champs scalaires du résultat conservés avec le vecteur solution
+_CHAMPS = ["statut", "objectif", "iterations", "noeuds", "temps", "variables", "contraintes", "nonzeros"]
+
+
+def cle_solution(donnees, solveur, **options):
+    """Empreinte de l'instance complète et des options qui influent sur la solution renvoyée."""
+    texte = json.dumps([VERSION_FORMAT, solveur, options, donnees], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(texte.encode("utf-8")).hexdigest()
+
+
+def chercher_solution(cle, dossier=CACHE_DIR):
+    """Résultat mémorisé (même dict que Solveurs.resoudre, avec "cache": True) ou None.
+
+    "temps" est le temps de la lecture ; celui de la résolution d'origine est
+    conservé dans "temps_origine".
+    """
+    start_time = time.perf_counter()
+    chemin = os.path.join(dossier, f"{cle}.npz")
+    if not os.path.exists(chemin):
+        os.makedirs(dossier, exist_ok=True)
+        ajouter_stats(dossier, echecs=1)
+        return None
+    try:
+        with np.load(chemin, allow_pickle=False) as npz:
+            resultat = json.loads(str(npz["meta"]))
+            resultat["x"] = npz["x"].copy()
+    except (OSError, ValueError, KeyError) as e:
+        print(f"[AVERTISSEMENT] Entrée de cache illisible, nouvelle résolution : {e}")
+        return None
+    os.utime(chemin)  # dernier accès, pour l'éviction LRU
+    ajouter_stats(dossier, succes=1, temps_economise=resultat["temps"])
+    resultat["temps_origine"] = resultat["temps"]
+    resultat["temps"] = time.perf_counter() - start_time
+    resultat["trouve"] = True
+    resultat["cache"] = True
+    return resultat
+
+
+def enregistrer_solution(cle, resultat, dossier=CACHE_DIR, taille_max=TAILLE_MAX_OCTETS):
+    """Mémorise un résultat avec solution ; les résolutions sans solution ne sont pas conservées."""
+    if not resultat["trouve"]:
+        return
+    os.makedirs(dossier, exist_ok=True)
+    meta = {k: resultat.get(k) for k in _CHAMPS}
+    chemin = os.path.join(dossier, f"{cle}.npz")
+    tmp = f"{chemin}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        np.savez(f, x=resultat["x"], meta=np.str_(json.dumps(meta)))
+    os.replace(tmp, chemin)
+    evincer_lru(dossier, taille_max)
+
+
+def statistiques_solutions(dossier=CACHE_DIR):
+    return lire_stats(dossier)
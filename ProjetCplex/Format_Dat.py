@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+"""
+Format_Dat.py
+-------------
+Lecture / écriture du fichier .dat de LINGO (DataFinal.dat), aller-retour avec
+le dict JSON de l'instance (schéma de DataFinal.json).
+
+Une seule table (CHAMPS_DAT) décrit la correspondance nom LINGO / clé JSON /
+forme ; l'écriture et la lecture en dérivent. La lecture est un passage unique
+ligne par ligne : une seule section (OP, MCIM...) est en mémoire à la fois, et
+l'écriture produit les matrices ligne par ligne.
+
+Le .dat ne porte ni les cellules (déclarées dans le modèle .lng) ni les écarts
+types de la demande : `cellules` et `ecarts_types` les fournissent à la lecture
+(sans `ecarts_types`, la clé "ecart_type" est omise). Les autres ensembles se
+déduisent des dimensions : produits et périodes de Dem, machines de MC,
+sous-traitants de SubCost, machineN de 1 à max(INT).
+
+Usage : python Format_Dat.py fichier.dat [...] --vers json
+        python Format_Dat.py fichier.json [...] --vers dat
+"""
+import argparse
+import json
+import os
+
+# (nom LINGO, clé JSON, forme) dans l'ordre d'écriture ; Dem vient de params
+CHAMPS_DAT = [
+    ("Dem", "params", "matrice"),
+    ("INT", "INT", "liste"),
+    ("MC", "MC", "liste"),
+    ("SetCost", "set_cost", "liste"),
+    ("MCIM", "mcim", "matrice"),
+    ("OP", "operations", "matrice"),
+    ("Pdef", "pdef", "matrice"),
+    ("IntrCost", "intr_cost", "liste"),
+    ("InterCost", "inter_cost", "liste"),
+    ("HoldCost", "hold_cost", "liste"),
+    ("Tlot", "tlot", "liste"),
+    ("SalCost", "sal_cost", "liste"),
+    ("Mcost", "mcost", "liste"),
+    ("SubCost", "sub_cost", "liste"),
+    ("SubCapacity", "sub_capacity", "liste"),
+    ("BigM", "big_m", "scalaire"),
+    ("LP", "LP", "scalaire"),
+    ("CL", "CL", "scalaire"),
+]
+
+
+# --- 🔹 Écriture ---
+def write_matrix_dat(name, matrix, f, end_semicolon=True):
+    f.write(f"{name} = \n")
+    f.writelines(" ".join(map(str, row)) + "\n" for row in matrix)
+    if end_semicolon:
+        f.write(";\n\n")
+    else:
+        f.write("\n\n")
+
+
+def write_list_dat(name, values, f, end_semicolon=True):
+    line = f"{name} = " + " ".join(map(str, values))
+    if end_semicolon:
+        line += ";"
+    f.write(line + "\n\n")
+
+
+def _demande(donnees):
+    """Lignes de Dem : moyennes par période de chaque produit (P1, P2, ... dans l'ordre numérique)."""
+    params = donnees["params"]
+    for k in sorted(params, key=lambda k: int(k[1:])):
+        moy = params[k]["moyenne"]
+        yield moy if isinstance(moy, list) else [moy] * len(donnees["periods"])
+
+
+def ecrire_dat(output_dat, data_json):
+    """Écrit le fichier .dat lu par le modèle LINGO à partir du dict JSON de l'instance."""
+    with open(output_dat, "w") as f:
+        for i, (nom, cle, forme) in enumerate(CHAMPS_DAT):
+            dernier = i == len(CHAMPS_DAT) - 1
+            if nom == "Dem":
+                write_matrix_dat(nom, _demande(data_json), f)
+            elif forme == "matrice":
+                write_matrix_dat(nom, data_json[cle], f, end_semicolon=not dernier)
+            elif forme == "liste":
+                write_list_dat(nom, data_json[cle], f, end_semicolon=not dernier)
+            else:
+                write_list_dat(nom, [data_json[cle]], f, end_semicolon=not dernier)
+
+
+# --- 🔹 Lecture ---
+def _nombre(texte):
+    """Entier si le jeton en est un (4, 190), flottant sinon (4.6, 1e-05) : même typage que le JSON."""
+    if "." in texte or "e" in texte or "E" in texte:
+        return float(texte)
+    try:
+        return int(texte)
+    except ValueError:
+        return float(texte)
+
+
+def iter_sections(lignes):
+    """Parcourt les lignes d'un .dat et produit (nom, lignes de valeurs) section par section.
+
+    Une section commence à `Nom =` et se termine au `;` (ou à la section
+    suivante / fin de fichier pour la dernière). Les commentaires LINGO `! ... ;`
+    sur une ligne et les virgules séparatrices sont acceptés.
+    """
+    nom, valeurs = None, []
+    for ligne in lignes:
+        ligne = ligne.split("!", 1)[0] if "!" in ligne else ligne
+        if "=" in ligne:
+            if nom is not None:
+                yield nom, valeurs
+            gauche, ligne = ligne.split("=", 1)
+            nom, valeurs = gauche.strip(), []
+        if nom is None:
+            continue
+        fin = ";" in ligne
+        jetons = ligne.split(";", 1)[0].replace(",", " ").split()
+        if jetons:
+            valeurs.append([_nombre(j) for j in jetons])
+        if fin:
+            yield nom, valeurs
+            nom, valeurs = None, []
+    if nom is not None:
+        yield nom, valeurs
+
+
+def donnees_dat(lignes, cellules=2, ecarts_types=None):
+    """Dict JSON de l'instance à partir des lignes d'un .dat (voir l'en-tête pour les ensembles)."""
+    formes = {nom: (cle, forme) for nom, cle, forme in CHAMPS_DAT}
+    lu = {}
+    for nom, valeurs in iter_sections(lignes):
+        if nom not in formes:
+            print(f"[AVERTISSEMENT] Section .dat inconnue ignorée : {nom}")
+            continue
+        _, forme = formes[nom]
+        if forme == "matrice":
+            lu[nom] = valeurs
+        else:
+            plat = [v for ligne in valeurs for v in ligne]
+            lu[nom] = plat[0] if forme == "scalaire" else plat
+    manquants = [nom for nom in formes if nom not in lu]
+    if manquants:
+        raise ValueError(f"Sections absentes du .dat : {', '.join(manquants)}")
+
+    dem = lu["Dem"]
+    params = {}
+    for i, ligne in enumerate(dem):
+        params[f"P{i + 1}"] = {"moyenne": ligne}
+        if ecarts_types is not None:
+            params[f"P{i + 1}"]["ecart_type"] = ecarts_types[i]
+    # Même ordre de clés que Generateur_Donnees
+    return {
+        "products": list(range(1, len(dem) + 1)),
+        "machines": list(range(1, len(lu["MC"]) + 1)),
+        "periods": list(range(1, len(dem[0]) + 1)),
+        "cells": list(range(1, cellules + 1)),
+        "operations": lu["OP"],
+        "machineN": list(range(1, max(lu["INT"]) + 1)),
+        "subcontractors": list(range(1, len(lu["SubCost"]) + 1)),
+        "params": params,
+        "MC": lu["MC"],
+        "set_cost": lu["SetCost"],
+        "big_m": lu["BigM"],
+        "hold_cost": lu["HoldCost"],
+        "intr_cost": lu["IntrCost"],
+        "inter_cost": lu["InterCost"],
+        "sub_capacity": lu["SubCapacity"],
+        "pdef": lu["Pdef"],
+        "tlot": lu["Tlot"],
+        "sal_cost": lu["SalCost"],
+        "mcost": lu["Mcost"],
+        "sub_cost": lu["SubCost"],
+        "CL": lu["CL"],
+        "LP": lu["LP"],
+        "INT": lu["INT"],
+        "mcim": lu["MCIM"],
+    }
+
+
+def lire_dat(path, cellules=2, ecarts_types=None):
+    """Lit un .dat LINGO en flux et renvoie le dict JSON de l'instance."""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return donnees_dat(f, cellules, ecarts_types)
+
+
+# --- 🔹 Conversion ---
+def convertir(source, destination=None, cellules=2):
+    """Écrit l'autre format à côté de `source` (.dat -> .json ou .json -> .dat) ; renvoie le chemin écrit."""
+    base, ext = os.path.splitext(source)
+    if ext == ".dat":
+        destination = destination or base + ".json"
+        with open(destination, "w") as f:
+            json.dump(lire_dat(source, cellules), f, indent=4)
+    elif ext == ".json":
+        destination = destination or base + ".dat"
+        with open(source, "r", encoding="utf-8") as f:
+            ecrire_dat(destination, json.load(f))
+    else:
+        raise ValueError(f"Format non reconnu : {source}")
+    return destination
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Conversion .dat LINGO <-> JSON")
+    parser.add_argument("sources", nargs="+")
+    parser.add_argument("--vers", choices=["json", "dat"], required=True)
+    parser.add_argument("--cellules", type=int, default=2, help="nombre de cellules (absent du .dat)")
+    args = parser.parse_args()
+
+    for source in args.sources:
+        if not source.endswith("." + args.vers):
+            print(f"[OK] {convertir(source, cellules=args.cellules)}")
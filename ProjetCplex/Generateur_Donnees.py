@@ -1,17 +1,47 @@
 # -*- coding: utf-8 -*-
+"""
+Generateur_Donnees.py
+---------------------
+Sans argument : tire la demande de l'instance de référence (4 produits, 3 machines,
+2 cellules, 2 périodes, 4 sous-traitants) et écrit DataFinal.dat / DataFinal.json.
+En bibliothèque, tirer_donnees(seed) renvoie le même dict sans rien écrire.
+
+Lot d'instances paramétré par la taille :
+    python Generateur_Donnees.py --nombre 1000 --P 20 --M 10 --C 4 --T 26 --L 6 --seed 1 \
+        [--workers 8] [--format npz|dat|json] [--sortie lots_generes]
+
+Toutes les données d'un lot (demandes et vecteurs de coûts) sont tirées en un
+appel vectorisé numpy.random.Generator par worker, chaque worker ayant son flux
+indépendant (SeedSequence.spawn). Le lot est écrit soit en un seul fichier .npz
+compressé, soit en un fichier par instance dans un seul format (.dat ou .json) ;
+l'autre format se dérive à la demande avec Format_Dat.py.
+"""
+import argparse
 import json
 import os
 import numpy as np
+import sys
 import traceback
+from concurrent.futures import ProcessPoolExecutor
 
+from Format_Dat import ecrire_dat, write_list_dat, write_matrix_dat  # noqa: F401 (réexportées)
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-output_dat = os.path.join(BASE_DIR, "DataFinal.dat")
-output_json = os.path.join(BASE_DIR, "DataFinal.json")
+OUTPUT_DAT = os.path.join(BASE_DIR, "DataFinal.dat")
+OUTPUT_JSON = os.path.join(BASE_DIR, "DataFinal.json")
+NB_OPERATIONS = 3
+BIG_M = 10000000
+
 
-try:
+def tirer_donnees(seed=None):
+    """Tire une demande et renvoie le dict JSON de l'instance de référence.
 
-   # --- PARAMÈTRES DE DEMANDE ---
+    `seed` (entier ou numpy.random.SeedSequence) rend le tirage reproductible ;
+    chaque instance d'un lot reçoit sa propre graine.
+    """
+    rng = np.random.default_rng(seed)
+
+    # --- PARAMÈTRES DE DEMANDE ---
     params = {
         'P1': {'moyenne': 80, 'ecart_type': 10},
         'P2': {'moyenne': 50, 'ecart_type': 7},
@@ -57,61 +87,15 @@ try:
     Mcost = [8000, 12000, 7500]
     SubCost = [50, 14, 20, 18]
     SubCapacity = [100, 50, 60, 120]
-    BigM = 10000000
+    BigM = BIG_M
     LP = 0
     CL = 30
 
-    # --- FONCTIONS D'ÉCRITURE ---
-    def write_matrix_dat(name, matrix, f, end_semicolon=True):
-        f.write(f"{name} = \n")
-        for row in matrix:
-            f.write(" ".join(map(str, row)) + "\n")
-        if end_semicolon:
-            f.write(";\n\n")
-        else:
-            f.write("\n\n")
-
-    def write_list_dat(name, values, f, end_semicolon=True):
-        line = f"{name} = " + " ".join(map(str, values))
-        if end_semicolon:
-            line += ";"
-        f.write(line + "\n\n")
+    # --- GÉNÉRATION DES DEMANDES ALÉATOIRES (un seul tirage vectorisé) ---
+    moyennes = np.array([params[p]['moyenne'] for p in params], dtype=float)
+    ecarts = np.array([params[p]['ecart_type'] for p in params], dtype=float)
+    Dem = np.maximum(0, rng.normal(moyennes[:, None], ecarts[:, None], size=(len(params), 2)).astype(int)).tolist()
 
-    # --- GÉNÉRATION DES DEMANDES ALÉATOIRES ---
-    def generer_demande(periods=2):
-        Dem = []
-        for p in params.keys():
-            Dem.append([max(0, int(np.random.normal(params[p]['moyenne'], params[p]['ecart_type'])))
-                        for _ in range(periods)])
-        return Dem
-
-    # Générer Dem une seule fois
-    Dem = generer_demande(periods=2)
-
-    # --- GÉNÉRATION DU FICHIER .DAT ---
-    with open(output_dat, "w") as f:
-        write_matrix_dat("Dem", Dem, f)
-        write_list_dat("INT", INT, f)
-        write_list_dat("MC", MC, f)
-        write_list_dat("SetCost", SetCost, f)
-        write_matrix_dat("MCIM", MCIM, f)
-        write_matrix_dat("OP", OP, f)
-        write_matrix_dat("Pdef", Pdef, f)
-        write_list_dat("IntrCost", IntrCost, f)
-        write_list_dat("InterCost", InterCost, f)
-        write_list_dat("HoldCost", HoldCost, f)
-        write_list_dat("Tlot", Tlot, f)
-        write_list_dat("SalCost", SalCost, f)
-        write_list_dat("Mcost", Mcost, f)
-        write_list_dat("SubCost", SubCost, f)
-        write_list_dat("SubCapacity", SubCapacity, f)
-        write_list_dat("BigM", [BigM], f)
-        write_list_dat("LP", [LP], f)
-        write_list_dat("CL", [CL], f, end_semicolon=False)
-
-    print(f"[OK] Fichier .dat généré : {output_dat}")
-
-    # --- GÉNÉRATION DU FICHIER JSON ---
     data_json = {
         "products": [1, 2, 3, 4],
         "machines": [1, 2, 3],
@@ -139,13 +123,190 @@ try:
         "INT": INT,
         "mcim": MCIM
     }
+    return data_json
+
+
+def generer_donnees(output_dat=OUTPUT_DAT, output_json=OUTPUT_JSON, seed=None):
+    """Tire une instance (tirer_donnees) et écrit les fichiers demandés.
+
+    `output_dat` / `output_json` à None : le fichier correspondant n'est pas écrit.
+    Renvoie le dict de l'instance.
+    """
+    data_json = tirer_donnees(seed)
+
+    # --- GÉNÉRATION DU FICHIER .DAT ---
+    if output_dat:
+        ecrire_dat(output_dat, data_json)
+        print(f"[OK] Fichier .dat généré : {output_dat}")
+
+    # --- GÉNÉRATION DU FICHIER JSON ---
+    if output_json:
+        with open(output_json, "w") as f_json:
+            json.dump(data_json, f_json, indent=4)
+        print(f"[OK] Fichier JSON généré avec succès : {output_json}")
+    return data_json
+
+
+# --- 🔹 Lots d'instances paramétrés par la taille ---
+def tirer_lot(nombre, P=4, M=3, C=2, T=2, L=4, seed=None):
+    """Tire en bloc les données de `nombre` instances de taille (P, M, C, T, L).
+
+    Renvoie un dict de tableaux dont le premier axe est l'instance. Les plages
+    de tirage reprennent les ordres de grandeur de l'instance de référence.
+    """
+    rng = np.random.default_rng(seed)
+    N = nombre
+
+    moyennes = rng.uniform(50, 190, size=(N, P))
+    ecarts = rng.integers(3, 16, size=(N, P))
+    dem = np.maximum(0, rng.normal(moyennes[..., None], ecarts[..., None], size=(N, P, T))).astype(np.int64)
+
+    # Au moins une machine compatible par produit
+    mcim = rng.random((N, P, M)) < 0.6
+    mcim[np.arange(N)[:, None], np.arange(P)[None, :], rng.integers(0, M, size=(N, P))] = True
+
+    op = np.round(rng.uniform(0, 12, size=(N, P * M, NB_OPERATIONS)), 1)
+    op[rng.random((N, P * M, 1)).repeat(NB_OPERATIONS, axis=2) < 0.4] = 0
+
+    pdef = np.repeat(rng.integers(20, 61, size=(N, P, 1)), T, axis=2)
+    pdef[:, :, -1] = 0  # rien à reporter au-delà de l'horizon
+
+    init = rng.integers(4, 8, size=(N, M))
+    sal_cost = rng.integers(6000, 10201, size=(N, M))
+    return {
+        "taille": np.array([P, M, C, T, L], dtype=np.int64),
+        "dem": dem,
+        "ecart_type": ecarts,
+        "INT": init,
+        "MC": rng.integers(75, 151, size=(N, M)),
+        "set_cost": rng.integers(100, 201, size=(N, M)),
+        "mcim": mcim.astype(np.int8),
+        "operations": op,
+        "pdef": pdef,
+        "intr_cost": rng.integers(2, 8, size=(N, P)),
+        "inter_cost": rng.integers(2, 8, size=(N, P)),
+        "hold_cost": np.round(rng.uniform(2, 4, size=(N, P)), 1),
+        "tlot": rng.integers(8, 16, size=(N, P)),
+        "sal_cost": sal_cost,
+        "mcost": np.round(sal_cost * rng.uniform(1.15, 1.2, size=(N, M))).astype(np.int64),
+        "sub_cost": rng.integers(14, 51, size=(N, L)),
+        "sub_capacity": rng.integers(50, 121, size=(N, L)),
+        # Le parc initial de chaque cellule doit respecter CL
+        "CL": np.maximum(30, init.sum(axis=1)),
+        "LP": np.zeros(N, dtype=np.int64),
+    }
+
+
+def instance_du_lot(lot, i):
+    """Dict JSON (même schéma que DataFinal.json) de l'instance i d'un lot."""
+    P, M, C, T, L = (int(v) for v in lot["taille"])
+    return {
+        "products": list(range(1, P + 1)),
+        "machines": list(range(1, M + 1)),
+        "periods": list(range(1, T + 1)),
+        "cells": list(range(1, C + 1)),
+        "operations": lot["operations"][i].tolist(),
+        "machineN": list(range(1, int(lot["INT"][i].max()) + 1)),
+        "subcontractors": list(range(1, L + 1)),
+        "params": {f"P{p + 1}": {"moyenne": lot["dem"][i, p].tolist(), "ecart_type": int(lot["ecart_type"][i, p])}
+                   for p in range(P)},
+        "MC": lot["MC"][i].tolist(),
+        "set_cost": lot["set_cost"][i].tolist(),
+        "big_m": BIG_M,
+        "hold_cost": lot["hold_cost"][i].tolist(),
+        "intr_cost": lot["intr_cost"][i].tolist(),
+        "inter_cost": lot["inter_cost"][i].tolist(),
+        "sub_capacity": lot["sub_capacity"][i].tolist(),
+        "pdef": lot["pdef"][i].tolist(),
+        "tlot": lot["tlot"][i].tolist(),
+        "sal_cost": lot["sal_cost"][i].tolist(),
+        "mcost": lot["mcost"][i].tolist(),
+        "sub_cost": lot["sub_cost"][i].tolist(),
+        "CL": int(lot["CL"][i]),
+        "LP": int(lot["LP"][i]),
+        "INT": lot["INT"][i].tolist(),
+        "mcim": lot["mcim"][i].tolist(),
+    }
+
+
+def lire_lot(path):
+    """Charge un lot .npz écrit par generer_lot(format="npz")."""
+    with np.load(path, allow_pickle=False) as npz:
+        return {k: npz[k] for k in npz.files}
 
-    with open(output_json, "w") as f_json:
-        json.dump(data_json, f_json, indent=4)
 
-    print(f"[OK] Fichier JSON généré avec succès : {output_json}")
+def _concatener(lots):
+    return {k: (lots[0][k] if k == "taille" else np.concatenate([l[k] for l in lots])) for k in lots[0]}
 
-except Exception as e:
-    print(f"[ERREUR] Générateur de données a échoué : {e}")
-    traceback.print_exc()
 
+def _tirer_et_ecrire(dossier, premier, nombre, taille, graine, fmt):
+    """Travail d'un worker : tire son bloc d'instances sur son propre flux et écrit un fichier par instance."""
+    lot = tirer_lot(nombre, *taille, seed=graine)
+    if fmt == "npz":
+        return lot
+    for i in range(nombre):
+        data_json = instance_du_lot(lot, i)
+        base = os.path.join(dossier, f"instance_{premier + i:05d}")
+        if fmt == "dat":
+            ecrire_dat(base + ".dat", data_json)
+        else:
+            with open(base + ".json", "w") as f_json:
+                json.dump(data_json, f_json, separators=(",", ":"))
+    return None
+
+
+def generer_lot(nombre, P=4, M=3, C=2, T=2, L=4, seed=None, workers=1, fmt="npz", dossier=None):
+    """Génère `nombre` instances, réparties sur `workers` flux indépendants.
+
+    fmt="npz" : un seul fichier lot.npz compressé dans `dossier` ;
+    fmt="dat" / "json" : un fichier instance_XXXXX.dat (ou .json) par instance.
+    Renvoie le chemin du fichier .npz ou du dossier.
+    """
+    dossier = dossier or os.path.join(BASE_DIR, "lots_generes")
+    os.makedirs(dossier, exist_ok=True)
+    workers = max(1, min(workers, nombre))
+    graines = np.random.SeedSequence(seed).spawn(workers)
+    tailles = [len(b) for b in np.array_split(np.arange(nombre), workers)]
+    premiers = np.concatenate([[0], np.cumsum(tailles)[:-1]]).tolist()
+    taille = (P, M, C, T, L)
+
+    if workers == 1:
+        blocs = [_tirer_et_ecrire(dossier, 0, nombre, taille, graines[0], fmt)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            blocs = list(pool.map(_tirer_et_ecrire, [dossier] * workers, premiers, tailles,
+                                  [taille] * workers, graines, [fmt] * workers))
+
+    if fmt == "npz":
+        chemin = os.path.join(dossier, "lot.npz")
+        np.savez_compressed(chemin, **_concatener(blocs))
+        print(f"[OK] Lot de {nombre} instances écrit : {chemin}")
+        return chemin
+    print(f"[OK] {nombre} fichiers .{fmt} écrits dans {dossier}")
+    return dossier
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Génération d'instances CMS")
+    parser.add_argument("--nombre", type=int, default=0, help="taille du lot (0 : instance de référence)")
+    parser.add_argument("--P", type=int, default=4, help="produits")
+    parser.add_argument("--M", type=int, default=3, help="machines")
+    parser.add_argument("--C", type=int, default=2, help="cellules")
+    parser.add_argument("--T", type=int, default=2, help="périodes")
+    parser.add_argument("--L", type=int, default=4, help="sous-traitants")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--format", choices=["npz", "dat", "json"], default="npz")
+    parser.add_argument("--sortie", default=None, help="dossier de sortie du lot")
+    args = parser.parse_args()
+
+    try:
+        if args.nombre > 0:
+            generer_lot(args.nombre, args.P, args.M, args.C, args.T, args.L, seed=args.seed,
+                        workers=args.workers, fmt=args.format, dossier=args.sortie)
+        else:
+            generer_donnees(seed=args.seed)
+    except Exception as e:
+        print(f"[ERREUR] Générateur de données a échoué : {e}")
+        traceback.print_exc()
+        sys.exit(1)
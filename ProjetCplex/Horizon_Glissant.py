@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""
+Horizon_Glissant.py
+-------------------
+Résolution du modèle CMS en horizon glissant, pour les longs horizons (26 à 52 périodes).
+
+À chaque pas, on résout une fenêtre de K périodes, on fige les décisions des
+K - chevauchement premières périodes, puis on reporte le report B et le parc
+MN de la dernière période figée comme état initial de la fenêtre suivante.
+La dernière fenêtre fige tout ce qui reste.
+
+Le coût total est la somme des termes Q1..Q7 des périodes figées ; il se
+compare directement à l'objectif du modèle monolithique, résolu en option
+quand sa taille le permet.
+
+Usage : python Horizon_Glissant.py [--json DataFinal.json] [--fenetre K] [--chevauchement O]
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from CMS_Matrices import (BLOCS, FORMULATIONS, construire_modele_matriciel, est_restriction, resserrer_big_m,
+                          vecteur_objectif)
+from Solveurs import SOLVEURS, resoudre
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+JSON_PATH = os.path.join(BASE_DIR, "DataFinal.json")
+
+# Au-delà, le modèle monolithique n'est pas résolu pour le calcul de l'écart
+VARIABLES_MAX_MONOLITHIQUE = 200000
+
+
+def donnees_fenetre(donnees, debut, longueur):
+    """Copie des données restreinte aux périodes [debut, debut + longueur) (pdef est indexé par période)."""
+    d = dict(donnees)
+    d["periods"] = list(donnees["periods"][debut:debut + longueur])
+    d["pdef"] = [list(ligne[debut:debut + longueur]) for ligne in donnees.get("pdef", [])]
+    return d
+
+
+def _periode(mm, bloc):
+    """Période de chaque variable du bloc (dernière colonne de l'index)."""
+    return mm["index"][bloc][:, -1]
+
+
+def _etat_final(mm, x, t):
+    """Report B[p, t] et parc MN[m, c, t] à la fin de la période t."""
+    d, _ = mm["offsets"]["B"]
+    ib = mm["index"]["B"]
+    sel = ib[:, 1] == t
+    B = {int(p): float(v) for p, v in zip(ib[sel, 0].tolist(), x[d + np.nonzero(sel)[0]].tolist())}
+    d, _ = mm["offsets"]["MN"]
+    imn = mm["index"]["MN"]
+    sel = imn[:, 2] == t
+    MN = {(int(m), int(c)): float(round(v))
+          for (m, c), v in zip(imn[sel, :2].tolist(), x[d + np.nonzero(sel)[0]].tolist())}
+    return {"B": B, "MN": MN}
+
+
+def _valeurs_figees(mm, x, figees):
+    """{bloc: {clé: valeur}} des variables non nulles des périodes figées."""
+    valeurs = {}
+    for bloc in BLOCS:
+        d, _ = mm["offsets"][bloc]
+        masque = np.isin(_periode(mm, bloc), figees)
+        idx = np.nonzero(masque & (np.abs(x[d:d + len(masque)]) > 1e-6))[0]
+        valeurs[bloc] = {tuple(k): float(x[d + i]) for k, i in zip(mm["index"][bloc][idx].tolist(), idx.tolist())}
+    return valeurs
+
+
+def _cout_periodes(mm, x, figees):
+    """Part de l'objectif portée par les variables des périodes figées."""
+    c = vecteur_objectif(mm)
+    masque = np.zeros(mm["n"], dtype=bool)
+    for bloc in BLOCS:
+        d, f = mm["offsets"][bloc]
+        masque[d:f] = np.isin(_periode(mm, bloc), figees)
+    return float(c[masque] @ x[masque])
+
+
+def resoudre_horizon_glissant(donnees, demande, fenetre=4, chevauchement=None, solveur="docplex",
+                              threads=None, temps_limite=None, resserrer=True, comparer=True, formulation="tenseur"):
+    """Horizon glissant : fenêtres de `fenetre` périodes, `chevauchement` périodes recouvertes.
+
+    Par défaut chevauchement = fenetre - 1 : seule la première période de chaque
+    fenêtre est figée. `temps_limite` s'applique à chaque fenêtre (et au monolithique).
+    `formulation` ("tenseur" ou "arcs") vaut pour les fenêtres comme pour le monolithique ;
+    "arcs" au-delà de 3 cellules est une restriction heuristique ("restriction" du résultat).
+    """
+    T = list(donnees["periods"])
+    if chevauchement is None:
+        chevauchement = fenetre - 1
+    if not 0 <= chevauchement < fenetre:
+        raise ValueError(f"Chevauchement invalide : {chevauchement} (fenêtre {fenetre})")
+    pas = fenetre - chevauchement
+    restriction = est_restriction(formulation, donnees["cells"])
+    if restriction:
+        print(f"[AVERTISSEMENT] Formulation {formulation} sur {len(donnees['cells'])} cellules : "
+              f"restriction heuristique, coût possiblement > tenseur")
+
+    etat = None
+    debut = 0
+    cout_total = 0.0
+    fenetres = []
+    solution = {bloc: {} for bloc in BLOCS}
+    start_time = time.time()
+    while debut < len(T):
+        d = donnees_fenetre(donnees, debut, fenetre)
+        periodes = d["periods"]
+        figees = periodes if debut + fenetre >= len(T) else periodes[:pas]
+        dem = {(p, t): v for (p, t), v in demande.items() if t in periodes}
+
+        mm = construire_modele_matriciel(d, dem, etat_initial=etat, formulation=formulation)
+        if resserrer:
+            resserrer_big_m(mm, d)
+        res = resoudre(mm, solveur, threads=threads, temps_limite=temps_limite)
+        if not res["trouve"]:
+            raise RuntimeError(f"Fenêtre {periodes[0]}-{periodes[-1]} sans solution ({res['statut']})")
+
+        x = res["x"]
+        cout = _cout_periodes(mm, x, figees)
+        cout_total += cout
+        for bloc, valeurs in _valeurs_figees(mm, x, figees).items():
+            solution[bloc].update(valeurs)
+        etat = _etat_final(mm, x, figees[-1])
+        fenetres.append({
+            "periodes": [periodes[0], periodes[-1]],
+            "figees": [figees[0], figees[-1]],
+            "statut": res["statut"],
+            "objectif_fenetre": res["objectif"],
+            "cout_fige": cout,
+            "temps": res["temps"],
+            "variables": res["variables"],
+            "contraintes": res["contraintes"],
+        })
+        print(f"[OK] Fenêtre {periodes[0]}-{periodes[-1]} : périodes {figees[0]}-{figees[-1]} figées, "
+              f"coût {cout:.2f} ({res['temps']:.3f} s)")
+        debut += len(figees)
+
+    resultat = {
+        "solveur": solveur,
+        "formulation": formulation,
+        "restriction": restriction,
+        "fenetre": fenetre,
+        "chevauchement": chevauchement,
+        "cout_total": cout_total,
+        "temps": time.time() - start_time,
+        "fenetres": fenetres,
+        "solution": solution,
+        "monolithique": None,
+        "ecart": None,
+    }
+
+    if comparer:
+        mm = construire_modele_matriciel(donnees, demande, formulation=formulation)
+        if mm["n"] > VARIABLES_MAX_MONOLITHIQUE:
+            print(f"[AVERTISSEMENT] Monolithique trop grand ({mm['n']} variables) : écart non calculé")
+        else:
+            if resserrer:
+                resserrer_big_m(mm, donnees)
+            res = resoudre(mm, solveur, threads=threads, temps_limite=temps_limite)
+            resultat["monolithique"] = {k: res[k] for k in ("statut", "objectif", "temps", "variables", "contraintes")}
+            if res["trouve"] and res["objectif"]:
+                resultat["ecart"] = (cout_total - res["objectif"]) / abs(res["objectif"])
+    return resultat
+
+
+def afficher_resultat(resultat):
+    print(f"\nHorizon glissant ({resultat['solveur']}, fenêtre {resultat['fenetre']}, "
+          f"chevauchement {resultat['chevauchement']}) :")
+    print(f"Coût total = {resultat['cout_total']:.4f}")
+    print(f"Temps total : {resultat['temps']:.4f} s sur {len(resultat['fenetres'])} fenêtres")
+    mono = resultat["monolithique"]
+    if mono:
+        print(f"Monolithique : {mono['objectif']} ({mono['statut']}, {mono['temps']:.4f} s, "
+              f"{mono['variables']} variables)")
+    if resultat["ecart"] is not None:
+        print(f"Écart horizon glissant / monolithique : {100 * resultat['ecart']:.3f} %")
+
+
+if __name__ == "__main__":
+    from CMS_Optimization import load_demande_from_json
+
+    parser = argparse.ArgumentParser(description="Optimisation CMS en horizon glissant")
+    parser.add_argument("--json", default=JSON_PATH)
+    parser.add_argument("--fenetre", type=int, default=4, help="longueur K des fenêtres")
+    parser.add_argument("--chevauchement", type=int, default=None, help="défaut : K - 1")
+    parser.add_argument("--solveur", choices=sorted(SOLVEURS), default="docplex")
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--temps-limite", type=float, default=None, help="par fenêtre, en secondes")
+    parser.add_argument("--sans-monolithique", action="store_true", help="ne pas calculer l'écart")
+    parser.add_argument("--formulation", choices=FORMULATIONS, default="tenseur",
+                        help="index des routes X / Z ; arcs : restriction heuristique au-delà de 3 cellules")
+    args = parser.parse_args()
+
+    with open(args.json, "r", encoding="utf-8") as f:
+        donnees = json.load(f)
+    demande = load_demande_from_json(donnees.get("params", {}), donnees["periods"])
+    resultat = resoudre_horizon_glissant(
+        donnees, demande, fenetre=args.fenetre, chevauchement=args.chevauchement, solveur=args.solveur,
+        threads=args.threads, temps_limite=args.temps_limite, comparer=not args.sans_monolithique,
+        formulation=args.formulation,
+    )
+    afficher_resultat(resultat)
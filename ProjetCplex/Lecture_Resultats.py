@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+"""
+Lecture_Resultats.py
+--------------------
+Lecture en un seul passage des fichiers de résultats :
+- resultats_optimisation.txt (CPLEX, écrit par CMS_Optimization)
+- resultats_optimisation.npz (même résultat sous forme de tableaux, sans re-parsing)
+- DataFinal.ltf (rapport LINGO)
+
+process_artefact donne les mêmes agrégats directement à partir de l'artefact en
+mémoire renvoyé par run_cms_optimization, sans aucun fichier.
+
+Les fichiers sont lus ligne par ligne (jamais chargés en entier), chaque ligne
+est aiguillée selon son préfixe vers un seul motif précompilé. Le mode
+`mmap_mode=True` lit les octets via un fichier mappé en mémoire, utile pour
+les .ltf de plusieurs centaines de Mo.
+
+Les deux fonctions renvoient les mêmes agrégats que les versions historiques
+de MainPrincipale.
+"""
+import mmap
+import os
+import re
+
+import numpy as np
+
+TOL = 1e-6
+
+_MOTIFS_TXT = {
+    "variable": r"(X|Y|B|NAJ|NRE)\(([\d,\s]+)\)\s*=\s*([\d\.]+)",
+    "demande": r"\((\d+),\s*(\d+)\)\s+([\d\.]+)",
+    "Fonction objectif": r"Fonction objectif\s*[:=]\s*([-+]?\d*\.\d+|\d+)",
+    "Variables totales": r"Variables totales\s*:\s*(\d+)",
+    "Nombre d'itérations": r"(?i)Nombre\s+d'itérations\s*[:=]?\s*(\d+)",
+    "Contraintes totales": r"Contraintes totales\s*:\s*(\d+)",
+    "Temps d'exécution": r"Temps d'exécution\s*[:=]?\s*(\d*\.\d+|\d+)",
+    "nonzeros": r"nonzeros\s*[:=]?\s*(\d+)",
+    "Cache solution": r"Cache solution\s*:\s*(\w+)",
+    "LP": r"LP\s*[:=]\s*([\d\.]+)",
+    "CL": r"CL\s*[:=]\s*([\d\.]+)",
+}
+
+# Préfixe de ligne -> motif à essayer (un seul motif par ligne)
+_PREFIXES_TXT = [
+    ("Fonction objectif", "Fonction objectif"),
+    ("Variables totales", "Variables totales"),
+    ("Nombre d", "Nombre d'itérations"),
+    ("Contraintes totales", "Contraintes totales"),
+    ("Temps d", "Temps d'exécution"),
+    ("nonzeros", "nonzeros"),
+    ("Cache solution", "Cache solution"),
+    ("LP", "LP"),
+    ("CL", "CL"),
+]
+
+_MOTIFS_LTF = {
+    "variable": r"\s*(DEM|X|Y|B|NAJ|NRE|MN)\(\s*([\d,\s]+)\)\s+(\d+\.\d+)",
+    "Objective value": r"\s*Objective value:\s+([-+]?\d+\.\d+)",
+    "Objective bound": r"\s*Objective bound:\s+([-+]?\d+\.\d+)",
+    "Total variables": r"\s*Total variables:\s+(\d+)",
+    "Integer variables": r"\s*Integer variables:\s+(\d+)",
+    "Total solver iterations": r"\s*Total solver iterations:\s+(\d+)",
+    "Total constraints": r"\s*Total constraints:\s+(\d+)",
+    "Elapsed runtime (s)": r"\s*Elapsed runtime seconds:\s+(\d+\.\d+)",
+    "Total nonzeros": r"\s*Total nonzeros:\s+(\d+)",
+    "LP": r"\s*LP\s+(\d+\.\d+)",
+    "CL": r"\s*CL\s+(\d+\.\d+)",
+}
+
+# Premier mot de la ligne -> motifs possibles
+_PREFIXES_LTF = {
+    "Objective": ["Objective value", "Objective bound"],
+    "Total": ["Total variables", "Total solver iterations", "Total constraints", "Total nonzeros"],
+    "Integer": ["Integer variables"],
+    "Elapsed": ["Elapsed runtime (s)"],
+    "LP": ["LP"],
+    "CL": ["CL"],
+}
+
+_CACHE_MOTIFS = {}
+
+
+def _motifs(en_octets):
+    """Motifs précompilés (str ou bytes), compilés une seule fois par processus."""
+    if en_octets not in _CACHE_MOTIFS:
+        conv = (lambda s: s.encode("utf-8")) if en_octets else (lambda s: s)
+        _CACHE_MOTIFS[en_octets] = {
+            "txt": {k: re.compile(conv(v)) for k, v in _MOTIFS_TXT.items()},
+            "txt_prefixes": [(conv(p), k) for p, k in _PREFIXES_TXT],
+            "txt_demande": conv("Demande :"),
+            "txt_parenthese": conv("("),
+            "ltf": {k: re.compile(conv(v)) for k, v in _MOTIFS_LTF.items()},
+            "ltf_prefixes": {conv(p): ks for p, ks in _PREFIXES_LTF.items()},
+        }
+    return _CACHE_MOTIFS[en_octets]
+
+
+def _texte(v):
+    return v.decode("utf-8") if isinstance(v, bytes) else v
+
+
+def _lignes(file_path, mmap_mode, encoding):
+    """Itérateur paresseux sur les lignes du fichier (str, ou bytes en mode mmap)."""
+    if mmap_mode:
+        with open(file_path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                yield from iter(mm.readline, b"")
+    else:
+        with open(file_path, "r", encoding=encoding, errors="replace") as f:
+            yield from f
+
+
+def process_txt(file_path, mmap_mode=False):
+    Demande_values = {}
+    lp_value = cl_value = ""
+    total_nonzeros = 0
+    sommes = {"X": 0, "Y": 0, "B": 0, "NAJ": 0, "NRE": 0}
+    iterations = None  # valeur par défaut
+    specific_results = {}
+
+    m = _motifs(mmap_mode)
+    motifs = m["txt"]
+    motif_var = motifs["variable"]
+
+    in_dem_section = False
+    for line in _lignes(file_path, mmap_mode, "utf-8"):
+        line = line.strip()
+
+        # Section Demande
+        if line.startswith(m["txt_demande"]):
+            in_dem_section = True
+            continue
+        if in_dem_section:
+            if not line.startswith(m["txt_parenthese"]):
+                in_dem_section = False
+            else:
+                match = motifs["demande"].match(line)
+                if match:
+                    key = f"d{_texte(match.group(1))}{_texte(match.group(2))}"
+                    Demande_values[key] = int(round(float(match.group(3))))
+                continue
+
+        # Variables X,Y,B,NAJ,NRE
+        match = motif_var.match(line)
+        if match:
+            val = float(match.group(3))
+            if abs(val) > TOL:
+                sommes[_texte(match.group(1))] += val
+            continue
+
+        # Autres informations : un seul motif selon le préfixe
+        for prefixe, key in m["txt_prefixes"]:
+            if line.startswith(prefixe):
+                match = motifs[key].search(line)
+                if match:
+                    val = _texte(match.group(1))
+                    if key == "LP":
+                        lp_value = val
+                    elif key == "CL":
+                        cl_value = val
+                    elif key == "nonzeros":
+                        total_nonzeros = int(val)
+                    elif key == "Nombre d'itérations":
+                        iterations = int(val)
+                    else:
+                        specific_results[key] = val
+                break
+
+    # Si pas trouvé, mettre 0
+    if iterations is None:
+        iterations = 0
+
+    return (Demande_values, lp_value, cl_value, total_nonzeros,
+            sommes["X"], sommes["Y"], sommes["B"], sommes["NAJ"], sommes["NRE"],
+            iterations, specific_results)
+
+
+def _scalaires(tableaux):
+    return {k: (v.item() if isinstance(v, (np.ndarray, np.generic)) and v.ndim == 0 else v)
+            for k, v in tableaux.items()}
+
+
+def lire_artefact(file_path):
+    """Charge l'artefact .npz de CMS_Optimization dans un dict (tableaux et scalaires)."""
+    with np.load(file_path, allow_pickle=False) as npz:
+        return _scalaires({k: npz[k] for k in npz.files})
+
+
+def process_npz(file_path):
+    """Mêmes agrégats que process_txt, calculés directement sur les tableaux de l'artefact."""
+    return process_artefact(lire_artefact(file_path))
+
+
+def process_artefact(a):
+    """Agrégats de process_npz à partir de l'artefact en mémoire (resultat["artefact"])."""
+    a = _scalaires(a)
+    Demande_values = {f"d{p}{t}": int(v) for p, t, v in a["demande"].tolist()}
+
+    sommes = {}
+    for bloc in ("X", "Y", "B", "NAJ", "NRE"):
+        valeurs = a[f"valeurs_{bloc}"]
+        sommes[bloc] = float(valeurs[np.abs(valeurs) > TOL].sum()) if a["trouve"] else 0
+
+    specific_results = {
+        "Variables totales": str(a["variables"]),
+        "Contraintes totales": str(a["contraintes"]),
+    }
+    if a.get("cache"):
+        specific_results["Cache solution"] = "succès"
+    if a["trouve"]:
+        specific_results["Fonction objectif"] = str(a["objectif"])
+        specific_results["Temps d'exécution"] = f"{a['temps']:.4f}"
+
+    return (Demande_values, a["LP"], a["CL"], int(a["nonzeros"]),
+            sommes["X"], sommes["Y"], sommes["B"], sommes["NAJ"], sommes["NRE"],
+            int(a["iterations"]), specific_results)
+
+
+def process_ltf(file_path, mmap_mode=False):
+    if not os.path.exists(file_path):
+        print(f"[ERREUR] Le fichier .ltf n'existe pas : {file_path}")
+        return {}, "", "", 0, 0, 0, 0, 0, 0, {}
+
+    sommes = {"X": 0, "Y": 0, "B": 0, "NAJ": 0, "NRE": 0, "MN": 0}
+    lp_value = ""
+    cl_value = ""
+    total_nonzeros = 0
+    specific_results = {}
+    dem_values = {}
+
+    m = _motifs(mmap_mode)
+    motifs = m["ltf"]
+    motif_var = motifs["variable"]
+    prefixes = m["ltf_prefixes"]
+
+    for line in _lignes(file_path, mmap_mode, "latin-1"):
+        # DEM et variables X,Y,B,NAJ,NRE,MN
+        match = motif_var.match(line)
+        if match:
+            nom = _texte(match.group(1))
+            val = float(match.group(3))
+            if nom == "DEM":
+                indices = [i.strip() for i in _texte(match.group(2)).split(",")]
+                dem_values[f"d{indices[0]}{indices[1]}"] = round(val)
+            else:
+                sommes[nom] += val
+            continue
+
+        mots = line.split(None, 1)
+        if not mots:
+            continue
+        for key in prefixes.get(mots[0], ()):
+            match = motifs[key].match(line)
+            if match:
+                val = _texte(match.group(1))
+                if key == "Total nonzeros":
+                    total_nonzeros = val
+                elif key == "LP":
+                    lp_value = val
+                elif key == "CL":
+                    cl_value = val
+                else:
+                    specific_results[key] = val
+                break
+
+    return (dem_values, lp_value, cl_value, total_nonzeros,
+            sommes["X"], sommes["Y"], sommes["B"], sommes["NAJ"], sommes["NRE"], specific_results)
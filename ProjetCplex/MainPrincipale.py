@@ -3,29 +3,49 @@
 MainPrincipale.py
 -----------------
 Script principal pour :
-1. Générer les données avec Generateur_Donnees.py
-2. Lancer l'optimisation CMS via CMS_Optimization
-3. Extraire les résultats et les sauvegarder dans Excel
+1. Générer les données avec Generateur_Donnees (en mémoire, dans ce processus)
+2. Lancer l'optimisation CMS via CMS_Optimization sur ce dict
+3. Extraire les résultats de l'artefact renvoyé et les enregistrer dans la base resultats.sqlite
 4. Traiter le fichier .ltf
-5. Ajouter un onglet de synthèse des résultats.
+5. Exporter à la demande le classeur Excel avec son onglet de synthèse
+   (`python MainPrincipale.py --export`, combinable avec un lancement).
+
+Seul DataFinal.dat, lu par LINGO, est écrit par défaut ; `--fichiers` écrit en plus
+DataFinal.json et les résultats .txt / .npz.
+
+Mode lot : `python MainPrincipale.py --lot N [--workers K] [--seed S]`
+répartit N instances (demande tirée avec sa propre graine ; avec `--fichiers`,
+fichiers dans lots/instance_XXXX) sur un pool de processus, puis écrit toutes
+les lignes dans la base en une seule transaction.
+
+LINGO (run_lingo, exécutable configurable par LINGO_EXE) tourne pendant la
+résolution CMS. En mode lot, `--lingo` écrit le DataFinal.dat de chaque instance
+dans lots/instance_XXXX et y lance LINGO, au plus `--lingo-paralleles` à la fois,
+pendant que le pool résout ; les .ltf obtenus alimentent LTF_Resultats.
 """
 
-import subprocess
+import argparse
 import os
 import sys
-import re
-import statistics
-from openpyxl import Workbook, load_workbook
-from openpyxl.utils import get_column_letter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from Lecture_Resultats import process_artefact, process_ltf
+from run_lingo import DELAI_DEFAUT, afficher_rapport, executer_avec, preparer_job
+from Stockage_Resultats import (ajouter_lignes, exporter_excel, importer_classeur,
+                                ouvrir_base, prochaine_instance)
 
 
 # --- Chemins des fichiers ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-PYTHON_CPLEX = sys.executable  # Utiliser le Python actuel
-GENERATOR = os.path.join(BASE_DIR, "Generateur_Donnees.py")
+DAT_FILE = os.path.join(BASE_DIR, "DataFinal.dat")
+JSON_FILE = os.path.join(BASE_DIR, "DataFinal.json")
 TXT_FILE = os.path.join(BASE_DIR, "resultats_optimisation.txt")
+NPZ_FILE = os.path.join(BASE_DIR, "resultats_optimisation.npz")
 LTF_FILE = os.path.join(BASE_DIR, "DataFinal.ltf")
 OUTPUT_EXCEL = os.path.join(BASE_DIR, "resultats_complet.xlsx")
+DB_FILE = os.path.join(BASE_DIR, "resultats.sqlite")
+LOTS_DIR = os.path.join(BASE_DIR, "lots")
+INSTANCES_PAR_SCENARIO = 50
 
 # --- En-têtes Excel ---
 headers_txt = [
@@ -33,7 +53,7 @@ headers_txt = [
     "d11","d12","d21","d22","d31","d32","d41","d42",
     "LP","CL","OBJ.VALUE","T.PROD (X)","T.REPORT(B)","BINARY (Z)",
     "T.SOUS-T (Y)","T.ACH-M(NAJ)","T.VENT-M(NRE)","PRECESS TIME",
-    "T.NONZERO","T.VARIABLES","T.CONTRAINTES","ITERATIONS"
+    "T.NONZERO","T.VARIABLES","T.CONTRAINTES","ITERATIONS","CACHE"
 ]
 
 headers_ltf = [
@@ -44,354 +64,238 @@ headers_ltf = [
     "T.VARIABLES","T.CONTRAINTES","V.CONTRAINTES","ITERATIONS"
 ]
 
-# --- Étape 1 : Génération des données ---
-print("Exécution de Generateur_Donnees.py avec cplex-env...")
-try:
-    subprocess.run([PYTHON_CPLEX, GENERATOR], check=True)
-    print("[OK] Generateur_Donnees.py exécuté avec succès !\n")
-except subprocess.CalledProcessError as e:
-    print("[ERREUR] Erreur pendant l’exécution du générateur :")
-    print(e)
-    sys.exit(1)
-
-# --- Étape 2 : Lancement de l’optimisation CMS ---
-print("Lancement de l'optimisation CMS via CMS_Optimization...")
-try:
-    from CMS_Optimization import run_cms_optimization
-    run_cms_optimization()
-    print("[OK] Optimisation CMS terminée avec succès !\n")
-except Exception as e:
-    print("[ERREUR] Erreur pendant l’exécution de l’optimisation CMS :")
-    print(e)
-    sys.exit(1)
-    
-from run_lingo import run_lingo_model
-
-print("===== Étape 2 : Lancement du modèle LINGO =====")
-run_lingo_model()
-print("===== Modèle LINGO exécuté avec succès =====\n")
-
-
-# --- Création / chargement du fichier Excel ---
-if os.path.exists(OUTPUT_EXCEL):
-    wb = load_workbook(OUTPUT_EXCEL)
-else:
-    wb = Workbook()
-
-def create_sheet(workbook, sheet_name, headers):
-    if sheet_name in workbook.sheetnames:
-        ws = workbook[sheet_name]
-    else:
-        ws = workbook.create_sheet(sheet_name)
-        ws.append(headers)
-    return ws
-
-ws_txt = create_sheet(wb, "TXT_Resultats", headers_txt)
-ws_ltf = create_sheet(wb, "LTF_Resultats", headers_ltf)
-
 # --- Déterminer SCENARIO et INSTANCE ---
-def next_scenario_instance(ws):
-    max_instance_scenario = 0
-    last_scenario = 0
-    for row in ws.iter_rows(min_row=2, max_col=3, values_only=True):
-        scenario_val = row[1]
-        instance_val = row[2]
-        if scenario_val is None or instance_val is None:
-            continue
-        if scenario_val > last_scenario:
-            last_scenario = scenario_val
-            max_instance_scenario = instance_val
-        elif scenario_val == last_scenario and instance_val > max_instance_scenario:
-            max_instance_scenario = instance_val
-    if max_instance_scenario >= 50:
-        return last_scenario + 1, 1
-    else:
-        return last_scenario, max_instance_scenario + 1
-
-scenario, instance_scenario = next_scenario_instance(ws_txt)
-
-def process_txt(file_path):
-    Demande_values = {}
-    lp_value = cl_value = ""
-    total_nonzeros = 0
-    sum_X = sum_Y = sum_B = sum_NAJ = sum_NRE = 0
-    iterations = None  # valeur par défaut
-    specific_results = {}
-    tol = 1e-6
-
-    with open(file_path, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-
-    in_dem_section = False
-    for line in lines:
-        line = line.strip()
-        
-        # Section Demande
-        if line.startswith("Demande :"):
-            in_dem_section = True
-            continue
-        if in_dem_section:
-            if line == "" or not line.startswith("("):
-                in_dem_section = False
-            else:
-                match = re.search(r"\((\d+),\s*(\d+)\)\s+([\d\.]+)", line)
-                if match:
-                    key = f"d{match.group(1)}{match.group(2)}"
-                    Demande_values[key] = int(round(float(match.group(3))))
-
-        # Variables X,Y,B,NAJ,NRE
-        for var_type, regex in [
-            ("X", r"X\(([\d,\s]+)\)\s*=\s*([\d\.]+)"),
-            ("Y", r"Y\(([\d,\s]+)\)\s*=\s*([\d\.]+)"),
-            ("B", r"B\(([\d,\s]+)\)\s*=\s*([\d\.]+)"),
-            ("NAJ", r"NAJ\(([\d,\s]+)\)\s*=\s*([\d\.]+)"),
-            ("NRE", r"NRE\(([\d,\s]+)\)\s*=\s*([\d\.]+)")
-        ]:
-            m = re.search(regex, line)
-            if m:
-                val = float(m.group(2))
-                if abs(val) > tol:
-                    if var_type == "X": sum_X += val
-                    elif var_type == "Y": sum_Y += val
-                    elif var_type == "B": sum_B += val
-                    elif var_type == "NAJ": sum_NAJ += val
-                    elif var_type == "NRE": sum_NRE += val
-
-        # Patterns pour autres informations
-        patterns = {
-            "Fonction objectif": r"Fonction objectif\s*[:=]\s*([-+]?\d*\.\d+|\d+)",
-            "Variables totales": r"Variables totales\s*:\s*(\d+)",
-            "Nombre d'itérations": r"(?i)Nombre\s+d'itérations\s*[:=]?\s*(\d+)",  # <- robust
-            "Contraintes totales": r"Contraintes totales\s*:\s*(\d+)",
-            "Temps d'exécution": r"Temps d'exécution\s*[:=]?\s*(\d*\.\d+|\d+)",
-            "nonzeros": r"nonzeros\s*[:=]?\s*(\d+)",
-            "LP": r"LP\s*[:=]\s*([\d\.]+)",
-            "CL": r"CL\s*[:=]\s*([\d\.]+)"
-        }
-
-        for key, pattern in patterns.items():
-            m = re.search(pattern, line)
-            if m:
-                val = m.group(1)
-                if key == "LP": 
-                    lp_value = val
-                elif key == "CL": 
-                    cl_value = val
-                elif key == "nonzeros": 
-                    total_nonzeros = int(val)
-                elif key.lower() == "nombre d'itérations":  # récupérer iterations
-                    iterations = int(val)
-                else: 
-                    specific_results[key] = val
-
-    # Si pas trouvé, mettre 0
-    if iterations is None:
-        iterations = 0
-
-    return Demande_values, lp_value, cl_value, total_nonzeros, sum_X, sum_Y, sum_B, sum_NAJ, sum_NRE, iterations, specific_results
-
-
-
-# --- Fonctions de parsing LTF (inchangé sauf adaptation si nécessaire) ---
-def process_ltf(file_path):
-    if not os.path.exists(file_path):
-        print(f"[ERREUR] Le fichier .ltf n'existe pas : {file_path}")
-        return {}, "", "", 0, 0, 0, 0, 0, 0, {}
-
-    sum_DEM = 0
-    sum_X = sum_Y = sum_B = sum_NAJ = sum_NRE = 0
-    lp_value = ""
-    cl_value = ""
-    total_nonzeros = 0
-    specific_results = {}
-    dem_values = {}
-
-    with open(file_path, 'r') as f:
-        lines = f.readlines()
-
-    for line in lines:
-        # DEM
-        match = re.search(r"DEM\(\s*(\d+),\s*(\d+)\)\s+(\d+\.\d+)\s+\d+\.\d+", line)
-        if match:
-            key = f"d{match.group(1)}{match.group(2)}"
-            value = round(float(match.group(3)))
-            dem_values[key] = value
-            sum_DEM += value
-
-        # Variables X,Y,B,NAJ,NRE,MN
-        for var_type, regex in [
-            ("X", r"X\(\s*\d+,\s*\d+,\s*\d+,\s*\d+,\s*\d+,\s*\d+\)\s+(\d+\.\d+)"),
-            ("Y", r"Y\(\s*\d+,\s*\d+,\s*\d+\)\s+(\d+\.\d+)"),
-            ("B", r"B\(\s*\d+,\s*\d+\)\s+(\d+\.\d+)"),
-            ("NAJ", r"NAJ\(\s*\d+,\s*\d+,\s*\d+\)\s+(\d+\.\d+)"),
-            ("NRE", r"NRE\(\s*\d+,\s*\d+,\s*\d+\)\s+(\d+\.\d+)"),
-            ("MN", r"MN\(\s*\d+,\s*\d+,\s*\d+\)\s+(\d+\.\d+)")
-        ]:
-            m = re.search(regex, line)
-            if m:
-                val = float(m.group(1))
-                if var_type == "X": sum_X += val
-                elif var_type == "Y": sum_Y += val
-                elif var_type == "B": sum_B += val
-                elif var_type == "NAJ": sum_NAJ += val
-                elif var_type == "NRE": sum_NRE += val
-
-        # Patterns spécifiques
-        patterns = {
-            "Objective value": r"Objective value:\s+([-+]?\d+\.\d+)",
-            "Objective bound": r"Objective bound:\s+([-+]?\d+\.\d+)",
-            "Total variables": r"Total variables:\s+(\d+)",
-            "Integer variables": r"Integer variables:\s+(\d+)",
-            "Total solver iterations": r"Total solver iterations:\s+(\d+)",
-            "Total constraints": r"Total constraints:\s+(\d+)",
-            "Elapsed runtime (s)": r"Elapsed runtime seconds:\s+(\d+\.\d+)",
-            "Total nonzeros": r"Total nonzeros:\s+(\d+)",
-            "LP": r"LP\s+(\d+\.\d+)",
-            "CL": r"CL\s+(\d+\.\d+)"
-        }
-
-        for key, regex in patterns.items():
-            m = re.search(regex, line)
-            if m:
-                val = m.group(1)
-                if key == "Total nonzeros": total_nonzeros = val
-                elif key == "LP": lp_value = val
-                elif key == "CL": cl_value = val
-                else: specific_results[key] = val
-
-    return dem_values, lp_value, cl_value, total_nonzeros, sum_X, sum_Y, sum_B, sum_NAJ, sum_NRE, specific_results
-
-# --- Traitement TXT & LTF ---
-Dem_txt, lp_txt, cl_txt, nonzeros_txt, sum_X_txt, sum_Y_txt, sum_B_txt, sum_NAJ_txt, sum_NRE_txt, iterations_txt, res_txt = process_txt(TXT_FILE)
-Dem_ltf, lp_ltf, cl_ltf, nonzeros_ltf, sum_X_ltf, sum_Y_ltf, sum_B_ltf, sum_NAJ_ltf, sum_NRE_ltf, res_ltf = process_ltf(LTF_FILE)
-
-# --- Ajout dans Excel ---
-data_row_txt = [
-    "resultats_optimisation.txt", scenario, instance_scenario,
-    Dem_txt.get("d11",0),Dem_txt.get("d12",0),Dem_txt.get("d21",0),Dem_txt.get("d22",0),
-    Dem_txt.get("d31",0),Dem_txt.get("d32",0),Dem_txt.get("d41",0),Dem_txt.get("d42",0),
-    lp_txt, cl_txt, res_txt.get("Fonction objectif",""),
-    sum_X_txt, sum_B_txt, 1, sum_Y_txt, sum_NAJ_txt, sum_NRE_txt,
-    res_txt.get("Temps d'exécution",""), nonzeros_txt,
-    res_txt.get("Variables totales",""), res_txt.get("Contraintes totales",""),
-    res_txt.get("Nombre d'itérations","")
-]
-ws_txt.append(data_row_txt)
-
-data_row_ltf = [
-    "DataFinal.ltf", scenario, instance_scenario,
-    Dem_ltf.get("d11",0),Dem_ltf.get("d12",0),Dem_ltf.get("d21",0),Dem_ltf.get("d22",0),
-    Dem_ltf.get("d31",0),Dem_ltf.get("d32",0),Dem_ltf.get("d41",0),Dem_ltf.get("d42",0),
-    lp_ltf, cl_ltf, sum(Dem_ltf.values()), res_ltf.get("Objective value",""), res_ltf.get("Objective bound",""),
-    sum_X_ltf, sum_B_ltf, 1, sum_Y_ltf, sum_NAJ_ltf, sum_NRE_ltf,
-    res_ltf.get("Elapsed runtime (s)",""), res_ltf.get("Integer variables",""), nonzeros_ltf,
-    res_ltf.get("Total variables",""), res_ltf.get("Total constraints",""), "*", res_ltf.get("Total solver iterations","")
-]
-ws_ltf.append(data_row_ltf)
-
-# --- 🔹 Synthèse ---
-def create_synthese(workbook):
-    # Supprimer l'ancienne synthèse si elle existe
-    if "Synthese" in workbook.sheetnames:
-        del workbook["Synthese"]
-
-    ws_syn = workbook.create_sheet("Synthese")
-    ws_syn.append(["Feuille - Indicateur", "Moyenne", "Maximum", "Dernière valeur"])
-
-    mots_cles = ["OBJ", "PROD", "REPORT", "SOUS", "TEMPS", "EXECUTION", "OBJECTIVE", "FONCTION"]
-
-    # --- Parcours des feuilles pour calcul des moyennes / max ---
-    for ws in workbook.worksheets:
-        if ws.title == "Synthese":
-            continue
-
-        col_names = list(ws[1])
-
-        for i, cell in enumerate(col_names, start=1):
-            col_vals = []
-            if (
-                cell.value
-                and isinstance(cell.value, str)
-                and any(x in cell.value.upper() for x in mots_cles)
-            ):
-                col_vals = [
-                    r[i - 1]
-                    for r in ws.iter_rows(min_row=2, values_only=True)
-                    if isinstance(r[i - 1], (int, float))
-                ]
-
-            if col_vals:
-                ws_syn.append([
-                    f"{ws.title} - {cell.value}",
-                    round(statistics.mean(col_vals), 3) if len(col_vals) > 1 else col_vals[0],
-                    round(max(col_vals), 3),
-                    round(col_vals[-1], 3)
-                ])
-
-    # --- 🔹 Ajout explicite des valeurs de fonction objectif, Iterations et Process Time ---
+def instance_suivante(scenario, instance_scenario):
+    if instance_scenario >= INSTANCES_PAR_SCENARIO:
+        return scenario + 1, 1
+    return scenario, instance_scenario + 1
+
+# --- Lignes Excel ---
+def ligne_txt(nom_fichier, scenario, instance_scenario, resultats):
+    Dem_txt, lp_txt, cl_txt, nonzeros_txt, sum_X_txt, sum_Y_txt, sum_B_txt, sum_NAJ_txt, sum_NRE_txt, iterations_txt, res_txt = resultats
+    return [
+        nom_fichier, scenario, instance_scenario,
+        Dem_txt.get("d11",0),Dem_txt.get("d12",0),Dem_txt.get("d21",0),Dem_txt.get("d22",0),
+        Dem_txt.get("d31",0),Dem_txt.get("d32",0),Dem_txt.get("d41",0),Dem_txt.get("d42",0),
+        lp_txt, cl_txt, res_txt.get("Fonction objectif",""),
+        sum_X_txt, sum_B_txt, 1, sum_Y_txt, sum_NAJ_txt, sum_NRE_txt,
+        res_txt.get("Temps d'exécution",""), nonzeros_txt,
+        res_txt.get("Variables totales",""), res_txt.get("Contraintes totales",""),
+        iterations_txt, "OUI" if res_txt.get("Cache solution") == "succès" else ""
+    ]
+
+
+def ligne_ltf(nom_fichier, scenario, instance_scenario, resultats):
+    Dem_ltf, lp_ltf, cl_ltf, nonzeros_ltf, sum_X_ltf, sum_Y_ltf, sum_B_ltf, sum_NAJ_ltf, sum_NRE_ltf, res_ltf = resultats
+    return [
+        nom_fichier, scenario, instance_scenario,
+        Dem_ltf.get("d11",0),Dem_ltf.get("d12",0),Dem_ltf.get("d21",0),Dem_ltf.get("d22",0),
+        Dem_ltf.get("d31",0),Dem_ltf.get("d32",0),Dem_ltf.get("d41",0),Dem_ltf.get("d42",0),
+        lp_ltf, cl_ltf, sum(Dem_ltf.values()), res_ltf.get("Objective value",""), res_ltf.get("Objective bound",""),
+        sum_X_ltf, sum_B_ltf, 1, sum_Y_ltf, sum_NAJ_ltf, sum_NRE_ltf,
+        res_ltf.get("Elapsed runtime (s)",""), res_ltf.get("Integer variables",""), nonzeros_ltf,
+        res_ltf.get("Total variables",""), res_ltf.get("Total constraints",""), "*", res_ltf.get("Total solver iterations","")
+    ]
+
+
+# --- Base de résultats et export Excel ---
+FEUILLES = {"TXT_Resultats": headers_txt, "LTF_Resultats": headers_ltf}
+
+
+def ouvrir_resultats():
+    nouvelle = not os.path.exists(DB_FILE)
+    con = ouvrir_base(DB_FILE, FEUILLES)
+    # Reprise unique de l'historique du classeur existant
+    if nouvelle and os.path.exists(OUTPUT_EXCEL):
+        nb = importer_classeur(con, OUTPUT_EXCEL, FEUILLES)
+        print(f"[OK] {nb} lignes reprises depuis {OUTPUT_EXCEL}")
+    return con
+
+
+def exporter_classeur(con):
+    exporter_excel(con, OUTPUT_EXCEL, FEUILLES)
+    print(f"[OK] Résultats exportés avec synthèse dans {OUTPUT_EXCEL}")
+
+
+# --- Mode instance unique ---
+def executer_instance(solveur="docplex", threads=None, temps_limite=None, fichiers=False,
+                      lingo_timeout=DELAI_DEFAUT, cache_solutions=False):
+    # --- Étape 1 : Génération des données (le .dat est toujours écrit pour LINGO) ---
+    print("Génération des données...")
     try:
-        # TXT
-        if "TXT_Resultats" in workbook.sheetnames:
-            ws_txt = workbook["TXT_Resultats"]
-            last_row_txt = [cell.value for cell in list(ws_txt.rows)[-1]]
-            
-            # Fonction objectif
-            idx_obj_txt = headers_txt.index("OBJ.VALUE")
-            val_obj_txt = last_row_txt[idx_obj_txt]
-            ws_syn.append(["TXT_Resultats - Fonction objectif", "", "", val_obj_txt])
-            
-            # Iterations
-            idx_iter_txt = headers_txt.index("ITERATIONS")
-            val_iter_txt = last_row_txt[idx_iter_txt]
-            ws_syn.append(["TXT_Resultats - Iterations", "", "", val_iter_txt])
-            
-            # Process Time
-            idx_time_txt = headers_txt.index("PRECESS TIME")
-            val_time_txt = last_row_txt[idx_time_txt]
-            ws_syn.append(["TXT_Resultats - Process Time (s)", "", "", val_time_txt])
-
-        # LTF
-        if "LTF_Resultats" in workbook.sheetnames:
-            ws_ltf = workbook["LTF_Resultats"]
-            last_row_ltf = [cell.value for cell in list(ws_ltf.rows)[-1]]
-            
-            # Fonction objectif
-            idx_obj_ltf = headers_ltf.index("OBJ.VALUE")
-            val_obj_ltf = last_row_ltf[idx_obj_ltf]
-            ws_syn.append(["LTF_Resultats - Objective value", "", "", val_obj_ltf])
-            
-            # Iterations
-            idx_iter_ltf = headers_ltf.index("ITERATIONS")
-            val_iter_ltf = last_row_ltf[idx_iter_ltf]
-            ws_syn.append(["LTF_Resultats - Iterations", "", "", val_iter_ltf])
-            
-            # Process Time
-            idx_time_ltf = headers_ltf.index("PRECESS TIME")
-            val_time_ltf = last_row_ltf[idx_time_ltf]
-            ws_syn.append(["LTF_Resultats - Process Time (s)", "", "", val_time_ltf])
-
+        from Generateur_Donnees import generer_donnees
+        donnees = generer_donnees(DAT_FILE, JSON_FILE if fichiers else None)
+        print("[OK] Données générées avec succès !\n")
     except Exception as e:
-        print(f"[AVERTISSEMENT] Impossible d’ajouter les objectifs, Iterations ou Process Time : {e}")
-
-    # --- Ajustement largeur colonnes ---
-    for col in ws_syn.columns:
-        max_length = 0
-        col_letter = col[0].column_letter
-        for cell in col:
-            if cell.value and len(str(cell.value)) > max_length:
-                max_length = len(str(cell.value))
-        ws_syn.column_dimensions[col_letter].width = max_length + 2
-
-    return ws_syn
-
+        print("[ERREUR] Erreur pendant l’exécution du générateur :")
+        print(e)
+        sys.exit(1)
 
+    # --- Étape 2 : Optimisation CMS (thread) pendant l'exécution du modèle LINGO ---
+    print("Lancement de l'optimisation CMS via CMS_Optimization et du modèle LINGO...")
+    try:
+        from CMS_Optimization import run_cms_optimization
+        resultat, (rapport_lingo,) = executer_avec(
+            lambda: run_cms_optimization(donnees=donnees, out_txt=TXT_FILE if fichiers else None,
+                                         out_npz=NPZ_FILE if fichiers else None, solveur=solveur,
+                                         threads=threads, temps_limite=temps_limite,
+                                         cache_solutions=cache_solutions),
+            [preparer_job(BASE_DIR, nom="DataFinal")], timeout=lingo_timeout,
+        )
+        print("[OK] Optimisation CMS terminée avec succès !\n")
+    except Exception as e:
+        print("[ERREUR] Erreur pendant l’exécution de l’optimisation CMS :")
+        print(e)
+        sys.exit(1)
+    afficher_rapport(rapport_lingo)
+
+    con = ouvrir_resultats()
+    scenario, instance_scenario = prochaine_instance(con, "TXT_Resultats", INSTANCES_PAR_SCENARIO)
+
+    # --- Traitement TXT & LTF ---
+    # Les agrégats viennent de l'artefact en mémoire : aucun fichier relu
+    res_txt = process_artefact(resultat["artefact"])
+    ajouter_lignes(con, "TXT_Resultats", headers_txt,
+                   [ligne_txt("resultats_optimisation.txt", scenario, instance_scenario, res_txt)])
+    if rapport_lingo["statut"] == "succès":
+        ajouter_lignes(con, "LTF_Resultats", headers_ltf,
+                       [ligne_ltf("DataFinal.ltf", scenario, instance_scenario, process_ltf(LTF_FILE))])
+    else:
+        print("[AVERTISSEMENT] LINGO en échec : pas de ligne LTF_Resultats pour cette instance")
+    print(f"[OK] Instance {scenario}/{instance_scenario} enregistrée dans {DB_FILE}")
+    return con
 
 
+# --- Mode lot ---
+def _executer_instance_lot(k, graine, solveur="docplex", temps_limite=None, fichiers=False, lingo=False,
+                           cache_solutions=False):
+    """Travail d'un worker : génère, résout et analyse l'instance k en mémoire.
 
-create_synthese(wb)
+    Avec `fichiers`, les entrées et résultats sont aussi écrits dans lots/instance_XXXX
+    (sauf le .dat si `lingo` : déjà écrit et peut-être en cours de lecture par LINGO).
+    Renvoie (k, nom de l'instance, agrégats).
+    """
+    from Generateur_Donnees import generer_donnees
+    from CMS_Optimization import run_cms_optimization
 
-# --- Sauvegarde ---
-wb.save(OUTPUT_EXCEL)
-print(f"[OK] Résultats enregistrés avec synthèse dans {OUTPUT_EXCEL}")
+    dossier = os.path.join(LOTS_DIR, f"instance_{k:04d}")
+    chemins = {"dat": None, "json": None, "txt": None, "npz": None}
+    if fichiers:
+        os.makedirs(dossier, exist_ok=True)
+        chemins = {
+            "dat": None if lingo else os.path.join(dossier, "DataFinal.dat"),
+            "json": os.path.join(dossier, "DataFinal.json"),
+            "txt": os.path.join(dossier, "resultats_optimisation.txt"),
+            "npz": os.path.join(dossier, "resultats_optimisation.npz"),
+        }
 
+    donnees = generer_donnees(chemins["dat"], chemins["json"], seed=graine)
+    # Un thread solveur par worker : le parallélisme vient du pool
+    # Les instances d'un lot ne diffèrent que par la demande : un seul modèle construit
+    resultat = run_cms_optimization(donnees=donnees, out_txt=chemins["txt"], out_npz=chemins["npz"], threads=1,
+                                    solveur=solveur, temps_limite=temps_limite, mesurer_borne_lp=False,
+                                    cache_modeles=True, cache_solutions=cache_solutions)
+    nom = chemins["txt"] or dossier
+    return k, os.path.relpath(nom, BASE_DIR), process_artefact(resultat["artefact"])
+
+
+def _resoudre_lot(graines, workers, solveur, temps_limite, fichiers, lingo=False, cache_solutions=False):
+    """Résout les instances du lot sur le pool ; renvoie {k: (nom, agrégats)}."""
+    resultats = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_executer_instance_lot, k, graines[k], solveur, temps_limite, fichiers, lingo,
+                               cache_solutions)
+                   for k in range(len(graines))]
+        for fut in as_completed(futures):
+            try:
+                k, nom, res = fut.result()
+                resultats[k] = (nom, res)
+                print(f"[OK] Instance {k} terminée")
+            except Exception as e:
+                print(f"[ERREUR] Instance du lot en échec : {e}")
+    return resultats
+
+
+def executer_lot(nb_instances, workers=None, seed=None, solveur="docplex", temps_limite=None, fichiers=False,
+                 lingo=False, lingo_paralleles=2, lingo_timeout=DELAI_DEFAUT, cache_solutions=False):
+    import numpy as np
+    from Generateur_Donnees import generer_donnees
+
+    graines = np.random.SeedSequence(seed).spawn(nb_instances)
+    workers = workers or os.cpu_count()
+    print(f"Lot de {nb_instances} instances sur {workers} processus...")
+
+    if not lingo:
+        resultats, rapports = _resoudre_lot(graines, workers, solveur, temps_limite, fichiers,
+                                            cache_solutions=cache_solutions), []
+    else:
+        # Même graine que le worker, donc même instance : le .dat est prêt avant le lancement de LINGO
+        jobs = []
+        for k in range(nb_instances):
+            dossier = os.path.join(LOTS_DIR, f"instance_{k:04d}")
+            os.makedirs(dossier, exist_ok=True)
+            generer_donnees(os.path.join(dossier, "DataFinal.dat"), None, seed=graines[k])
+            jobs.append(preparer_job(dossier))
+        resultats, rapports = executer_avec(
+            lambda: _resoudre_lot(graines, workers, solveur, temps_limite, fichiers, lingo=True,
+                                  cache_solutions=cache_solutions),
+            jobs, lingo_paralleles, lingo_timeout,
+        )
+        for rapport in rapports:
+            afficher_rapport(rapport)
+
+    # --- Écriture unique dans la base ---
+    con = ouvrir_resultats()
+    scenario, instance_scenario = prochaine_instance(con, "TXT_Resultats", INSTANCES_PAR_SCENARIO)
+    lignes, lignes_lingo = [], []
+    for k in sorted(resultats):
+        nom, res = resultats[k]
+        lignes.append(ligne_txt(nom, scenario, instance_scenario, res))
+        if rapports and rapports[k]["statut"] == "succès":
+            ltf = os.path.join(LOTS_DIR, f"instance_{k:04d}", "DataFinal.ltf")
+            lignes_lingo.append(ligne_ltf(os.path.relpath(ltf, BASE_DIR), scenario, instance_scenario,
+                                          process_ltf(ltf)))
+        scenario, instance_scenario = instance_suivante(scenario, instance_scenario)
+    ajouter_lignes(con, "TXT_Resultats", headers_txt, lignes)
+    if lignes_lingo:
+        ajouter_lignes(con, "LTF_Resultats", headers_ltf, lignes_lingo)
+    print(f"[OK] {len(lignes)} instances enregistrées dans {DB_FILE}"
+          + (f" ({len(lignes_lingo)} rapports LINGO)" if lingo else ""))
+    return con
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Génération, optimisation CMS et rapport Excel")
+    parser.add_argument("--lot", type=int, default=0, help="nombre d'instances à traiter en parallèle")
+    parser.add_argument("--workers", type=int, default=None, help="taille du pool (défaut : nombre de cœurs)")
+    parser.add_argument("--seed", type=int, default=None, help="graine du lot (une sous-graine par instance)")
+    parser.add_argument("--solveur", choices=["docplex", "highs"], default="docplex",
+                        help="backend MILP (highs : sans licence CPLEX)")
+    parser.add_argument("--threads", type=int, default=None, help="threads du solveur (instance unique)")
+    parser.add_argument("--temps-limite", type=float, default=None, help="limite de temps du solveur (s)")
+    parser.add_argument("--fichiers", action="store_true",
+                        help="écrire aussi DataFinal.json et les résultats .txt / .npz")
+    parser.add_argument("--lingo", action="store_true", help="mode lot : lancer aussi LINGO sur chaque instance")
+    parser.add_argument("--lingo-paralleles", type=int, default=2, help="jobs LINGO simultanés")
+    parser.add_argument("--lingo-timeout", type=float, default=DELAI_DEFAUT, help="délai par job LINGO (s)")
+    parser.add_argument("--cache-solutions", action="store_true",
+                        help="réutiliser les solutions déjà calculées (temps d'origine dans PRECESS TIME)")
+    parser.add_argument("--export", action="store_true", help="exporter le classeur Excel depuis la base")
+    parser.add_argument("--export-seul", action="store_true", help="exporter le classeur sans rien lancer")
+    args = parser.parse_args()
+
+    if args.export_seul:
+        con = ouvrir_resultats()
+    elif args.lot > 0:
+        con = executer_lot(args.lot, workers=args.workers, seed=args.seed,
+                           solveur=args.solveur, temps_limite=args.temps_limite, fichiers=args.fichiers,
+                           lingo=args.lingo, lingo_paralleles=args.lingo_paralleles,
+                           lingo_timeout=args.lingo_timeout, cache_solutions=args.cache_solutions)
+    else:
+        con = executer_instance(solveur=args.solveur, threads=args.threads, temps_limite=args.temps_limite,
+                                fichiers=args.fichiers, lingo_timeout=args.lingo_timeout,
+                                cache_solutions=args.cache_solutions)
 
+    if args.export or args.export_seul:
+        exporter_classeur(con)
+    con.close()
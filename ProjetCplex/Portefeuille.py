@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+"""
+Portefeuille.py
+---------------
+Course de configurations de solveur sur un même modèle matriciel.
+
+Selon l'instance, l'emphase MIP, l'agressivité des coupes ou le parallélisme
+déterministe / opportuniste changent le temps de résolution de plusieurs ordres
+de grandeur. `resoudre_portefeuille` lance K configurations du même modèle dans
+K processus, garde le premier résultat concluant (optimum prouvé ou infaisabilité
+prouvée) et termine les autres processus. Si aucune configuration ne conclut
+(limite de temps), la meilleure solution trouvée est gardée.
+
+La configuration gagnante est comptée dans l'historique JSON (HISTORIQUE), par
+structure d'instance (Cache_Modeles.empreinte_structure) et au total : les
+courses suivantes essaient d'abord les configurations qui ont déjà gagné, et
+`configuration_preferee` donne la meilleure pour une résolution simple.
+
+Usage : python Portefeuille.py [--donnees DataFinal.json] [--solveur highs] [-k 4]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import time
+
+from Solveurs import SOLVEURS, STATUTS_PROUVES, resoudre
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+HISTORIQUE = os.path.join(BASE_DIR, "portefeuille_historique.json")
+ATTENTE = 0.2  # secondes entre deux vérifications des processus
+
+# Configurations par solveur : (nom, paramètres transmis tels quels au backend de Solveurs)
+CONFIGURATIONS = {
+    "docplex": [
+        ("defaut", {}),
+        ("emphase_optimalite", {"emphasis.mip": 2}),
+        ("emphase_borne", {"emphasis.mip": 3}),
+        ("coupes_agressives", {"mip.cuts.gomory": 2, "mip.cuts.mircut": 2, "mip.cuts.flowcovers": 2}),
+        ("sans_coupes", {"mip.limits.cutpasses": -1}),
+        ("opportuniste", {"parallel": -1}),
+    ],
+    "highs": [
+        ("defaut", {}),
+        ("heuristiques", {"mip_heuristic_effort": 0.3}),
+        ("sans_presolve", {"presolve": "off"}),
+        ("sans_symetrie", {"mip_detect_symmetry": False}),
+        ("graine_1", {"random_seed": 1}),
+        ("graine_2", {"random_seed": 2}),
+    ],
+}
+
+
+# --- 🔹 Historique des configurations gagnantes ---
+def lire_historique(chemin=HISTORIQUE):
+    try:
+        with open(chemin, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def enregistrer_victoire(solveur, structure, nom, temps, chemin=HISTORIQUE):
+    """Compte une victoire de `nom` pour la structure et au total ; renvoie l'historique.
+
+    La lecture et l'écriture se font sous verrou : des courses simultanées (--lot)
+    ne perdent aucune victoire.
+    """
+    from Cache_Modeles import verrou
+
+    with verrou(f"{chemin}.lock"):
+        historique = lire_historique(chemin)
+        entree = historique.setdefault(solveur, {"total": {}, "structures": {}})
+        entree["total"][nom] = entree["total"].get(nom, 0) + 1
+        victoires = entree["structures"].setdefault(structure, {})
+        victoires[nom] = victoires.get(nom, 0) + 1
+        entree.setdefault("derniere", {})[structure] = {"configuration": nom, "temps": temps}
+        tmp = f"{chemin}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(historique, f, indent=2)
+        os.replace(tmp, chemin)
+    return historique
+
+
+def ordonner_configurations(solveur, structure=None, configurations=None, chemin=HISTORIQUE):
+    """Configurations triées par victoires sur la structure, puis au total (ordre d'origine à égalité)."""
+    configurations = configurations if configurations is not None else CONFIGURATIONS[solveur]
+    entree = lire_historique(chemin).get(solveur, {})
+    locales = entree.get("structures", {}).get(structure, {})
+    totales = entree.get("total", {})
+    return sorted(configurations, key=lambda c: (-locales.get(c[0], 0), -totales.get(c[0], 0)))
+
+
+def configuration_preferee(solveur, structure=None, chemin=HISTORIQUE):
+    """(nom, paramètres) de la configuration qui a le plus gagné, ou None sans historique."""
+    entree = lire_historique(chemin).get(solveur, {})
+    if not entree.get("structures", {}).get(structure) and not entree.get("total"):
+        return None
+    return ordonner_configurations(solveur, structure, chemin=chemin)[0]
+
+
+# --- 🔹 Course ---
+def _concluant(resultat, solveur):
+    """Optimum ou infaisabilité prouvés : statut exact de Solveurs.STATUTS_PROUVES[solveur]."""
+    return str(resultat["statut"]) in STATUTS_PROUVES[solveur]
+
+
+def _resoudre_configuration(file, nom, mm, solveur, threads, temps_limite, parametres):
+    try:
+        resultat = resoudre(mm, solveur, threads=threads, temps_limite=temps_limite, parametres=parametres)
+        file.put((nom, resultat, None))
+    except Exception as e:
+        file.put((nom, None, f"{type(e).__name__}: {e}"))
+
+
+def resoudre_portefeuille(mm, solveur="highs", k=None, configurations=None, structure=None, threads=None,
+                          temps_limite=None, parametres=None, historique=HISTORIQUE):
+    """Course de `k` configurations de `solveur` sur `mm` (une par processus).
+
+    Les configurations (liste de (nom, paramètres), CONFIGURATIONS[solveur] par
+    défaut) sont ordonnées par l'historique de `structure` avant d'en garder k ;
+    `parametres` est commun à toutes (une configuration peut le surcharger).
+    `threads` est le nombre de threads de chaque processus (défaut : les cœurs
+    répartis entre les k processus). `historique` à None : rien n'est enregistré.
+
+    Renvoie le dict de résultat de la configuration gagnante, complété de
+    "configuration" (son nom), "temps" (durée de la course) et "portefeuille" :
+    {nom: statut, "annulée" ou message d'erreur} pour chaque configuration lancée.
+    """
+    if solveur not in SOLVEURS:
+        raise ValueError(f"Solveur inconnu : {solveur} (disponibles : {', '.join(SOLVEURS)})")
+    configurations = ordonner_configurations(solveur, structure, configurations, chemin=historique or HISTORIQUE)
+    configurations = [(nom, {**(parametres or {}), **p}) for nom, p in (configurations[:k] if k else configurations)]
+    if not configurations:
+        raise ValueError("Portefeuille vide")
+    coeurs = os.cpu_count() or 1
+    if len(configurations) > coeurs:
+        print(f"[AVERTISSEMENT] {len(configurations)} configurations pour {coeurs} cœurs : "
+              f"la course partage le temps de calcul")
+    if threads is None:
+        threads = max(1, coeurs // len(configurations))
+
+    start_time = time.time()
+    contexte = multiprocessing.get_context("spawn")  # pas de fork d'un processus dont le solveur a des threads
+    file = contexte.Queue()
+    processus = {}
+    for nom, parametres in configurations:
+        processus[nom] = contexte.Process(target=_resoudre_configuration, daemon=True,
+                                          args=(file, nom, mm, solveur, threads, temps_limite, parametres))
+        processus[nom].start()
+
+    termines, gagnant = {}, None
+    while len(termines) < len(processus):
+        try:
+            nom, resultat, erreur = file.get(timeout=ATTENTE)
+        except queue.Empty:
+            # Processus morts sans réponse (mémoire, signal) : la course s'arrête avec eux
+            if not any(p.is_alive() for p in processus.values()) and file.empty():
+                break
+            continue
+        termines[nom] = resultat if resultat is not None else erreur
+        if resultat is not None and _concluant(resultat, solveur):
+            gagnant = nom
+            break
+
+    for p in processus.values():
+        if p.is_alive():
+            p.terminate()
+        p.join()
+    file.close()
+    elapsed_time = time.time() - start_time
+
+    if gagnant is None:
+        # Aucune preuve : meilleure solution trouvée parmi les configurations terminées
+        trouvees = [(r["objectif"], nom) for nom, r in termines.items() if isinstance(r, dict) and r["trouve"]]
+        if trouvees:
+            gagnant = min(trouvees)[1]
+        else:
+            gagnant = next((nom for nom, r in termines.items() if isinstance(r, dict)), None)
+    if gagnant is None:
+        raise RuntimeError("Aucune configuration du portefeuille n'a abouti : " +
+                           "; ".join(f"{nom} : {r}" for nom, r in termines.items()))
+
+    resultat = dict(termines[gagnant])
+    resultat["configuration"] = gagnant
+    resultat["temps"] = elapsed_time
+    resultat["portefeuille"] = {
+        nom: (termines[nom]["statut"] if isinstance(termines[nom], dict) else termines[nom])
+        if nom in termines else "annulée"
+        for nom in processus
+    }
+    if historique and _concluant(resultat, solveur):
+        enregistrer_victoire(solveur, structure, gagnant, elapsed_time, chemin=historique)
+    return resultat
+
+
+def lignes_rapport(resultat):
+    """Lignes texte de la course : gagnante et issue de chaque configuration."""
+    issues = ", ".join(f"{nom} : {issue}" for nom, issue in resultat["portefeuille"].items())
+    return [
+        f"Portefeuille : {len(resultat['portefeuille'])} configurations, gagnante {resultat['configuration']}",
+        f"Portefeuille : {issues}",
+    ]
+
+
+if __name__ == "__main__":
+    from Cache_Modeles import empreinte_structure
+    from CMS_Matrices import construire_modele_matriciel, resserrer_big_m
+    from CMS_Optimization import JSON_PATH, charger_donnees, load_demande_from_json
+
+    parser = argparse.ArgumentParser(description="Course de configurations de solveur sur une instance CMS")
+    parser.add_argument("--donnees", default=JSON_PATH, help="instance .json ou .dat")
+    parser.add_argument("--solveur", choices=sorted(CONFIGURATIONS), default="highs")
+    parser.add_argument("-k", type=int, default=None, help="nombre de configurations lancées (défaut : toutes)")
+    parser.add_argument("--threads", type=int, default=None, help="threads par configuration")
+    parser.add_argument("--temps-limite", type=float, default=None, help="en secondes")
+    args = parser.parse_args()
+
+    donnees = charger_donnees(args.donnees)
+    mm = construire_modele_matriciel(donnees, load_demande_from_json(donnees["params"], donnees["periods"]))
+    resserrer_big_m(mm, donnees)
+    resultat = resoudre_portefeuille(mm, args.solveur, k=args.k, structure=empreinte_structure(donnees),
+                                     threads=args.threads, temps_limite=args.temps_limite)
+    print(f"[OK] {resultat['configuration']} : {resultat['statut']}, objectif {resultat['objectif']} "
+          f"en {resultat['temps']:.4f} s")
+    for ligne in lignes_rapport(resultat):
+        print(f"     {ligne}")
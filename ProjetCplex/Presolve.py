@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+"""
+Presolve.py
+-----------
+Presolve du modèle matriciel de CMS_Matrices, entre la construction et le solveur,
+et postsolve du vecteur solution.
+
+Réductions, répétées jusqu'à stabilité :
+    - variables fixées (lb == ub, dont les variables fixées à zéro comme B[p, T] quand
+      pdef vaut 0) : retirées, leur contribution passe au second membre des lignes et
+      à la constante de l'objectif ;
+    - variables dominées : une variable qu'on peut augmenter (ou diminuer) sans gêner
+      aucune ligne ni augmenter le coût est fixée à sa borne. C'est le cas des binaires
+      Z, présents seulement dans Liaison_XZ (X - M.Z <= 0) et sans coût : Z = 1 pendant
+      la résolution, puis ramené au postsolve à la plus petite valeur admissible ;
+    - lignes singletons : transformées en bornes (arrondies, toutes les variables
+      du modèle CMS sont entières) ;
+    - lignes vides ou redondantes (toujours satisfaites compte tenu des bornes) : retirées ;
+    - lignes en double ou dominées : mêmes coefficients (à un signe près, >= lu comme
+      <=), seule la plus serrée est gardée.
+Une ligne vide violée ou des bornes croisées lèvent ValueError (instance infaisable).
+
+presolve(mm) renvoie (mm réduit, infos) ; le modèle réduit a la même forme que mm
+(blocs, index, familles) et passe tel quel à Solveurs.resoudre. postsolve(infos, x)
+reconstruit le vecteur complet, postsolve_resultat complète le dict de résultat
+(x et objectif, constante comprise).
+"""
+import numpy as np
+import scipy.sparse as sp
+
+from CMS_Matrices import BLOCS, COMPOSANTES, vecteur_objectif
+
+TOL = 1e-9
+PASSES_MAX = 20
+SENS = {"le": 0, "ge": 1, "eq": 2}
+
+
+def _taille(nb_colonnes, A):
+    return {"variables": int(nb_colonnes), "contraintes": int(A.shape[0]), "nonzeros": int(A.nnz)}
+
+
+def _empiler(mm):
+    """Toutes les familles en une matrice : (A csr, rhs, sens, famille, rang dans la famille)."""
+    A = sp.vstack([fam["A"] for fam in mm["familles"]], format="csr")
+    rhs = np.concatenate([np.asarray(fam["rhs"], dtype=float) for fam in mm["familles"]])
+    sens = np.concatenate([np.full(fam["A"].shape[0], SENS[fam["sens"]]) for fam in mm["familles"]])
+    famille = np.concatenate([np.full(fam["A"].shape[0], i) for i, fam in enumerate(mm["familles"])])
+    rang = np.concatenate([np.arange(fam["A"].shape[0]) for fam in mm["familles"]])
+    return A, rhs, sens, famille, rang
+
+
+def _masquer(A, lignes, colonnes):
+    """A restreinte aux lignes et colonnes actives (mêmes dimensions, entrées inactives à zéro)."""
+    return (sp.diags(lignes.astype(float)) @ A @ sp.diags(colonnes.astype(float))).tocsr()
+
+
+def _colonnes_dominees(A, sens, c, lb, ub):
+    """(vers_ub, vers_lb) : colonnes qu'on peut fixer à leur borne haute / basse sans perte."""
+    signe = np.select([sens == SENS["le"], sens == SENS["ge"]], [1.0, -1.0], 0.0)
+    S = (sp.diags(signe) @ A).tocsc()
+    E = (sp.diags((sens == SENS["eq"]).astype(float)) @ abs(A)).tocsc()
+    presence_eq = np.asarray(E.sum(axis=0)).ravel() > 0
+    hausse_gene = (np.asarray(S.maximum(0).sum(axis=0)).ravel() > 0) | presence_eq
+    baisse_gene = (np.asarray((-S).maximum(0).sum(axis=0)).ravel() > 0) | presence_eq
+    vers_lb = ~baisse_gene & (c >= 0) & np.isfinite(lb)
+    vers_ub = ~hausse_gene & (c <= 0) & np.isfinite(ub) & ~vers_lb
+    return vers_ub, vers_lb
+
+
+def _activites(A, lb, ub):
+    """Activités minimale et maximale de chaque ligne compte tenu des bornes (inf si non bornée)."""
+    Ap, An = A.maximum(0).tocsr(), A.minimum(0).tocsr()
+    lb0, ub0 = np.where(np.isfinite(lb), lb, 0.0), np.where(np.isfinite(ub), ub, 0.0)
+    inf_lb, inf_ub = (~np.isfinite(lb)).astype(float), (~np.isfinite(ub)).astype(float)
+    act_min = Ap @ lb0 + An @ ub0
+    act_max = Ap @ ub0 + An @ lb0
+    act_min[(Ap @ inf_lb + abs(An) @ inf_ub) > 0] = -np.inf
+    act_max[(Ap @ inf_ub + abs(An) @ inf_lb) > 0] = np.inf
+    return act_min, act_max
+
+
+def _doublons(A, rhs, sens):
+    """Lignes à retirer : doublons (au signe près) dont une ligne plus serrée est gardée."""
+    signe = np.where(sens == SENS["ge"], -1.0, 1.0)
+    N = (sp.diags(signe) @ A).tocsr()
+    b = signe * rhs
+    rng = np.random.default_rng(0)
+    h1 = N @ rng.random(A.shape[1])
+    h2 = N @ rng.random(A.shape[1])
+    nnz = np.diff(N.indptr)
+    candidates = np.nonzero(nnz > 0)[0]
+    cles = np.stack([sens[candidates] == SENS["eq"], np.round(h1[candidates], 9),
+                     np.round(h2[candidates], 9), nnz[candidates]], axis=1)
+    _, groupe, effectif = np.unique(cles, axis=0, return_inverse=True, return_counts=True)
+    groupe = groupe.ravel()
+    retirees = []
+    for g in np.nonzero(effectif > 1)[0]:
+        lignes = candidates[groupe == g]
+        # Vérification exacte des coefficients (le hachage ne sert qu'à former les groupes)
+        par_coefficients = {}
+        for i in lignes.tolist():
+            debut, fin = N.indptr[i], N.indptr[i + 1]
+            par_coefficients.setdefault((N.indices[debut:fin].tobytes(), N.data[debut:fin].tobytes()), []).append(i)
+        for identiques in par_coefficients.values():
+            if len(identiques) < 2:
+                continue
+            identiques = np.array(identiques)
+            if sens[identiques[0]] == SENS["eq"] and np.ptp(b[identiques]) > 1e-6:
+                raise ValueError(f"Presolve : égalités incompatibles sur les lignes {identiques.tolist()}")
+            gardee = identiques[np.argmin(b[identiques])]
+            retirees.extend(i for i in identiques.tolist() if i != gardee)
+    return np.array(retirees, dtype=np.int64)
+
+
+def presolve(mm, passes_max=PASSES_MAX):
+    """Réduit le modèle matriciel ; renvoie (mm réduit, infos de postsolve et compteurs)."""
+    A0, rhs0, sens, famille, rang = _empiler(mm)
+    A0.sum_duplicates()
+    n, m = mm["n"], A0.shape[0]
+    c = vecteur_objectif(mm)
+    lb, ub = mm["lb"].astype(float).copy(), mm["ub"].astype(float).copy()
+    rhs = rhs0.copy()
+    colonnes = np.ones(n, dtype=bool)
+    lignes = np.ones(m, dtype=bool)
+    valeurs = np.zeros(n)
+    relevees = np.zeros(n, dtype=bool)  # fixées à ub par dominance, à redescendre au postsolve
+    compteurs = {"fixees": 0, "dominees": 0, "singletons": 0, "redondantes": 0, "doublons": 0}
+
+    for _ in range(passes_max):
+        avant = (int(colonnes.sum()), int(lignes.sum()))
+
+        # Colonnes dominées : fixées à une borne (deviennent des colonnes fixées)
+        A = _masquer(A0, lignes, colonnes)
+        vers_ub, vers_lb = _colonnes_dominees(A, sens, c, lb, ub)
+        vers_ub &= colonnes & (ub > lb + TOL)
+        vers_lb &= colonnes & (ub > lb + TOL)
+        ub[vers_lb] = lb[vers_lb]
+        lb[vers_ub] = ub[vers_ub]
+        relevees |= vers_ub & (c == 0)
+        compteurs["dominees"] += int(vers_ub.sum() + vers_lb.sum())
+
+        # Colonnes fixées : contribution au second membre
+        fixes = colonnes & (ub - lb <= TOL)
+        if fixes.any():
+            valeurs[fixes] = lb[fixes]
+            rhs -= A0[:, fixes] @ lb[fixes]
+            colonnes &= ~fixes
+            compteurs["fixees"] += int(fixes.sum())
+
+        # Lignes vides, singletons et redondantes
+        A = _masquer(A0, lignes, colonnes)
+        nnz = np.diff(A.indptr)
+        act_min, act_max = _activites(A, lb, ub)
+        viol = lignes & (((sens != SENS["ge"]) & (act_min > rhs + 1e-6))
+                         | ((sens != SENS["le"]) & (act_max < rhs - 1e-6)))
+        if viol.any():
+            i = int(np.nonzero(viol)[0][0])
+            nom = mm["familles"][famille[i]]["nom"]
+            raise ValueError(f"Presolve : ligne {nom}[{rang[i]}] infaisable compte tenu des bornes")
+        redondantes = lignes & (nnz > 0) & (((sens == SENS["le"]) & (act_max <= rhs + TOL))
+                                             | ((sens == SENS["ge"]) & (act_min >= rhs - TOL)))
+        vides = lignes & (nnz == 0)
+        compteurs["redondantes"] += int(redondantes.sum())
+        lignes &= ~(redondantes | vides)
+
+        singletons = np.nonzero(lignes & (nnz == 1))[0]
+        if len(singletons):
+            S = A[singletons]
+            j, a = S.indices, S.data
+            borne = rhs[singletons] / a
+            s = sens[singletons]
+            haute = (s == SENS["eq"]) | ((s == SENS["le"]) & (a > 0)) | ((s == SENS["ge"]) & (a < 0))
+            basse = (s == SENS["eq"]) | ((s == SENS["le"]) & (a < 0)) | ((s == SENS["ge"]) & (a > 0))
+            np.minimum.at(ub, j[haute], np.floor(borne[haute] + 1e-6))
+            np.maximum.at(lb, j[basse], np.ceil(borne[basse] - 1e-6))
+            lignes[singletons] = False
+            compteurs["singletons"] += len(singletons)
+            if (lb > ub + TOL).any():
+                j = int(np.nonzero(lb > ub + TOL)[0][0])
+                raise ValueError(f"Presolve : bornes croisées sur la variable {j} ({lb[j]} > {ub[j]})")
+
+        # Doublons et lignes dominées
+        actives = np.nonzero(lignes)[0]
+        retirees = actives[_doublons(_masquer(A0, lignes, colonnes)[actives], rhs[actives], sens[actives])]
+        lignes[retirees] = False
+        compteurs["doublons"] += len(retirees)
+
+        if (int(colonnes.sum()), int(lignes.sum())) == avant:
+            break
+
+    infos = {
+        "n": n,
+        "colonnes": np.nonzero(colonnes)[0],
+        "valeurs": valeurs,
+        "relevees": np.nonzero(relevees & ~colonnes)[0],
+        "constante": float(c[~colonnes] @ valeurs[~colonnes]),
+        "A": A0, "rhs": rhs0, "sens": sens, "lb": mm["lb"], "ub": mm["ub"],
+        "compteurs": compteurs,
+        "avant": _taille(n, A0),
+    }
+    reduit = _modele_reduit(mm, A0, rhs, famille, rang, lignes, colonnes, lb, ub)
+    infos["apres"] = _taille(reduit["n"], sp.vstack([f["A"] for f in reduit["familles"]]) if reduit["familles"]
+                             else sp.csr_matrix((0, reduit["n"])))
+    return reduit, infos
+
+
+def _modele_reduit(mm, A0, rhs, famille, rang, lignes, colonnes, lb, ub):
+    """Modèle de même forme que mm, restreint aux lignes et colonnes gardées."""
+    gardees = np.nonzero(colonnes)[0]
+    index, offsets = {}, {}
+    debut = 0
+    for bloc in BLOCS:
+        d, f = mm["offsets"][bloc]
+        masque = colonnes[d:f]
+        index[bloc] = mm["index"][bloc][masque]
+        offsets[bloc] = (debut, debut + int(masque.sum()))
+        debut += int(masque.sum())
+
+    A = A0.tocsc()[:, gardees].tocsr()
+    familles = []
+    for k, fam in enumerate(mm["familles"]):
+        ids = np.nonzero(lignes & (famille == k))[0]
+        if not len(ids):
+            continue
+        familles.append({
+            "nom": fam["nom"],
+            "A": A[ids],
+            "sens": fam["sens"],
+            "rhs": rhs[ids],
+            "cles": fam["cles"][rang[ids]] if fam["cles"] is not None else None,
+            "format": fam["format"],
+        })
+
+    reduit = {k: v for k, v in mm.items() if k not in ("index", "offsets", "n", "lb", "ub", "binaire",
+                                                        "objectif", "familles", "profil")}
+    reduit.update({
+        "index": index,
+        "offsets": offsets,
+        "n": len(gardees),
+        "lb": lb[gardees],
+        "ub": ub[gardees],
+        "binaire": mm["binaire"][gardees],
+        "objectif": {q: mm["objectif"][q][gardees] for q in COMPOSANTES},
+        "familles": familles,
+    })
+    return reduit
+
+
+def postsolve(infos, x_reduit):
+    """Vecteur solution complet du modèle d'origine à partir de celui du modèle réduit.
+
+    Les variables relevées à leur borne haute (Z) sont ramenées à la plus petite valeur
+    entière qui satisfait leurs lignes d'origine, quand elles sont seules de leur
+    espèce sur chacune de ces lignes (sinon elles restent à leur borne haute).
+    """
+    x = infos["valeurs"].copy()
+    x[infos["colonnes"]] = x_reduit
+    relevees = infos["relevees"]
+    if not len(relevees):
+        return x
+
+    A = infos["A"].tocsc()
+    sens, rhs = infos["sens"], infos["rhs"]
+    R = A[:, relevees].tocsr()
+    compte = np.asarray((R != 0).sum(axis=1)).ravel()
+    reste = A @ x - R @ x[relevees]
+    besoin = np.full(len(relevees), -np.inf)
+    bloquees = np.zeros(len(relevees), dtype=bool)
+    Rc = R.tocsc()
+    for k in range(len(relevees)):
+        ids = Rc.indices[Rc.indptr[k]:Rc.indptr[k + 1]]
+        a = Rc.data[Rc.indptr[k]:Rc.indptr[k + 1]]
+        if (compte[ids] > 1).any():
+            bloquees[k] = True
+            continue
+        # a.x_j <= rhs - reste (<=, a < 0) ou a.x_j >= rhs - reste (>=, a > 0) : x_j >= (rhs - reste) / a
+        if len(ids):
+            besoin[k] = np.max((rhs[ids] - reste[ids]) / a)
+    lb = infos["lb"][relevees]
+    nouvelles = np.maximum(lb, np.ceil(besoin - 1e-6))
+    x[relevees] = np.where(bloquees, x[relevees], np.minimum(nouvelles, x[relevees]))
+    return x
+
+
+def postsolve_resultat(infos, resultat):
+    """Complète le résultat du modèle réduit : vecteur complet, objectif avec la constante.
+
+    Les tailles du résultat (variables, contraintes, nonzeros) redeviennent celles du
+    modèle d'origine, comme sans presolve ; celles du modèle réduit restent dans
+    lignes_rapport.
+    """
+    if resultat["x"] is not None:
+        resultat["x"] = postsolve(infos, resultat["x"])
+    if resultat["objectif"] is not None:
+        resultat["objectif"] += infos["constante"]
+    resultat.update(infos["avant"])
+    return resultat
+
+
+def lignes_rapport(infos):
+    """Lignes texte du rapport de taille avant / après presolve."""
+    av, ap, cpt = infos["avant"], infos["apres"], infos["compteurs"]
+    return [
+        f"Presolve : variables {av['variables']} -> {ap['variables']}, contraintes {av['contraintes']} -> "
+        f"{ap['contraintes']}, nonzeros {av['nonzeros']} -> {ap['nonzeros']}",
+        f"Presolve : {cpt['fixees']} variables fixées (dont {cpt['dominees']} dominées), "
+        f"{cpt['singletons']} lignes singletons, {cpt['redondantes']} redondantes, {cpt['doublons']} doublons",
+    ]
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+Solveurs.py
+-----------
+Couche de solveurs sous le modèle matriciel de CMS_Matrices.
+
+- "docplex" : CPLEX via docplex (Community Edition limitée à 1000 variables / 1000 contraintes) ;
+- "highs"   : HiGHS, via highspy si disponible (threads, itérations), sinon scipy.optimize.milp.
+
+STATUTS_PROUVES donne, par solveur, les statuts d'un optimum ou d'une infaisabilité prouvés.
+
+Chaque solveur renvoie le même dict de résultat (trouve, statut, objectif,
+iterations, noeuds, temps, x, variables, contraintes, nonzeros), écrit ensuite par
+CMS_Optimization.ecrire_resultats dans le même bloc de statistiques.
+"""
+import time
+
+import numpy as np
+import scipy.sparse as sp
+
+from CMS_Matrices import BLOCS, nombre_nonzeros, vecteur_objectif
+
+
+# --- 🔹 docplex ---
+def modele_docplex(mm, nom="CMS_Optimization"):
+    """Transmet le modèle matriciel à docplex en bloc (variables, objectif, familles de contraintes)."""
+    from docplex.mp.advmodel import AdvModel
+
+    mdl = AdvModel(name=nom)
+    dvars = []
+    variables = {}
+    for bloc in BLOCS:
+        d, f = mm["offsets"][bloc]
+        cles = [tuple(k) for k in mm["index"][bloc].tolist()]
+        if mm["binaire"][d:f].all():
+            vs = mdl.binary_var_list(cles, name=bloc)
+        else:
+            ub = [mdl.infinity if np.isinf(u) else u for u in mm["ub"][d:f].tolist()]
+            vs = mdl.integer_var_list(cles, lb=mm["lb"][d:f].tolist(), ub=ub, name=bloc)
+        variables[bloc] = dict(zip(cles, vs))
+        dvars.extend(vs)
+
+    mdl.minimize(mdl.scal_prod(dvars, vecteur_objectif(mm)))
+
+    contraintes = {}
+    for fam in mm["familles"]:
+        cts = mdl.matrix_constraints(fam["A"], dvars, fam["rhs"], fam["sens"])
+        noms = None
+        if fam["format"]:
+            noms = [fam["format"].format(*k) for k in fam["cles"].tolist()]
+        mdl.add_constraints(cts, names=noms)
+        contraintes[fam["nom"]] = cts
+    return mdl, dvars, variables, contraintes
+
+
+def resultat_docplex(mdl, solution, dvars, elapsed_time):
+    """Résumé d'une résolution docplex : statut, objectif, vecteur solution et statistiques."""
+    resultat = {
+        "trouve": bool(solution),
+        "statut": str(mdl.solve_details.status),
+        "objectif": mdl.objective_value if solution else None,
+        "iterations": mdl.solve_details.nb_iterations,
+        "noeuds": mdl.solve_details.nb_nodes_processed,
+        "temps": elapsed_time,
+        "x": np.array(solution.get_values(dvars), dtype=float) if solution else None,
+        "variables": mdl.number_of_variables,
+        "contraintes": mdl.number_of_constraints,
+    }
+    try:
+        resultat["nonzeros"] = mdl.number_of_nonzeros
+    except Exception:
+        pass
+    return resultat
+
+
+def resoudre_docplex(mm, threads=None, temps_limite=None, parametres=None, log_output=False):
+    mdl, dvars, _, _ = modele_docplex(mm)
+    if threads is not None:
+        mdl.parameters.threads = threads
+    if temps_limite is not None:
+        mdl.parameters.timelimit = temps_limite
+    # Paramètres CPLEX par chemin docplex, ex. {"mip.tolerances.mipgap": 1e-4}
+    for chemin, valeur in (parametres or {}).items():
+        param = mdl.parameters
+        for nom in chemin.split("."):
+            param = getattr(param, nom)
+        param.set(valeur)
+
+    start_time = time.time()
+    solution = mdl.solve(log_output=log_output)
+    elapsed_time = time.time() - start_time
+    return resultat_docplex(mdl, solution, dvars, elapsed_time)
+
+
+# --- 🔹 HiGHS ---
+def forme_lignes(mm):
+    """Toutes les familles empilées : (A csr, bornes basses, bornes hautes des lignes)."""
+    A = sp.vstack([fam["A"] for fam in mm["familles"]], format="csr")
+    bas, haut = [], []
+    for fam in mm["familles"]:
+        rhs = np.asarray(fam["rhs"], dtype=float)
+        inf = np.full(rhs.shape, np.inf)
+        bas.append(-inf if fam["sens"] == "le" else rhs)
+        haut.append(inf if fam["sens"] == "ge" else rhs)
+    return A, np.concatenate(bas), np.concatenate(haut)
+
+
+def _statistiques(mm, A):
+    return {"variables": mm["n"], "contraintes": A.shape[0], "nonzeros": nombre_nonzeros(mm)}
+
+
+def _resoudre_highspy(mm, threads, temps_limite, parametres, log_output):
+    import highspy
+
+    A, bas, haut = forme_lignes(mm)
+    A = A.tocsc()
+    inf = highspy.kHighsInf
+
+    lp = highspy.HighsLp()
+    lp.num_col_ = mm["n"]
+    lp.num_row_ = A.shape[0]
+    lp.col_cost_ = vecteur_objectif(mm)
+    lp.col_lower_ = mm["lb"]
+    lp.col_upper_ = np.where(np.isinf(mm["ub"]), inf, mm["ub"])
+    lp.row_lower_ = np.where(np.isinf(bas), -inf, bas)
+    lp.row_upper_ = np.where(np.isinf(haut), inf, haut)
+    lp.a_matrix_.format_ = highspy.MatrixFormat.kColwise
+    lp.a_matrix_.start_ = A.indptr
+    lp.a_matrix_.index_ = A.indices
+    lp.a_matrix_.value_ = A.data
+    # Toutes les variables du modèle CMS sont entières (Z binaire par ses bornes)
+    lp.integrality_ = [highspy.HighsVarType.kInteger] * mm["n"]
+
+    h = highspy.Highs()
+    h.setOptionValue("output_flag", bool(log_output))
+    if threads is not None:
+        h.setOptionValue("threads", int(threads))
+    if temps_limite is not None:
+        h.setOptionValue("time_limit", float(temps_limite))
+    for nom, valeur in (parametres or {}).items():
+        h.setOptionValue(nom, valeur)
+    h.passModel(lp)
+
+    start_time = time.time()
+    h.run()
+    elapsed_time = time.time() - start_time
+
+    info = h.getInfo()
+    trouve = info.primal_solution_status == 2  # kSolutionStatusFeasible
+    resultat = {
+        "trouve": trouve,
+        "statut": h.modelStatusToString(h.getModelStatus()),
+        "objectif": info.objective_function_value if trouve else None,
+        "iterations": int(info.simplex_iteration_count),
+        "noeuds": int(info.mip_node_count),
+        "temps": elapsed_time,
+        "x": np.array(h.getSolution().col_value, dtype=float) if trouve else None,
+    }
+    resultat.update(_statistiques(mm, A))
+    return resultat
+
+
+def _resoudre_scipy(mm, temps_limite, parametres, log_output):
+    from scipy.optimize import Bounds, LinearConstraint, milp
+
+    A, bas, haut = forme_lignes(mm)
+    options = {"disp": bool(log_output)}
+    if temps_limite is not None:
+        options["time_limit"] = float(temps_limite)
+    options.update(parametres or {})
+
+    start_time = time.time()
+    res = milp(
+        vecteur_objectif(mm),
+        constraints=LinearConstraint(A, bas, haut),
+        integrality=np.ones(mm["n"]),
+        bounds=Bounds(mm["lb"], mm["ub"]),
+        options=options,
+    )
+    elapsed_time = time.time() - start_time
+
+    trouve = res.x is not None
+    resultat = {
+        "trouve": trouve,
+        "statut": res.message,
+        "objectif": float(res.fun) if trouve else None,
+        "iterations": 0,  # non exposé par scipy.optimize.milp
+        "noeuds": int(getattr(res, "mip_node_count", 0) or 0),
+        "temps": elapsed_time,
+        "x": np.round(res.x) if trouve else None,
+    }
+    resultat.update(_statistiques(mm, A))
+    return resultat
+
+
+def resoudre_highs(mm, threads=None, temps_limite=None, parametres=None, log_output=False):
+    """HiGHS via highspy ; repli sur scipy.optimize.milp (sans contrôle des threads)."""
+    try:
+        import highspy  # noqa: F401
+    except ImportError:
+        if threads is not None:
+            print("[AVERTISSEMENT] highspy absent : scipy.optimize.milp ignore le nombre de threads")
+        return _resoudre_scipy(mm, temps_limite, parametres, log_output)
+    return _resoudre_highspy(mm, threads, temps_limite, parametres, log_output)
+
+
+SOLVEURS = {
+    "docplex": resoudre_docplex,
+    "highs": resoudre_highs,
+}
+
+# Statuts exacts d'un optimum ou d'une infaisabilité prouvés, par solveur ("highs" :
+# highspy puis son repli scipy.optimize.milp). "infeasible or unbounded" n'en est pas un.
+STATUTS_PROUVES = {
+    "docplex": frozenset({
+        "integer optimal solution",
+        "integer optimal, tolerance",
+        "integer infeasible",
+        "optimal",
+        "infeasible",
+    }),
+    "highs": frozenset({
+        "Optimal",
+        "Infeasible",
+        "Optimization terminated successfully. (HiGHS Status 7: Optimal)",
+        "The problem is infeasible. (HiGHS Status 8: model_status is Infeasible; primal_status is None)",
+    }),
+}
+
+
+def resoudre(mm, solveur="docplex", threads=None, temps_limite=None, parametres=None, log_output=False):
+    """Résout le modèle matriciel avec le solveur choisi et renvoie le dict de résultat commun."""
+    if solveur not in SOLVEURS:
+        raise ValueError(f"Solveur inconnu : {solveur} (disponibles : {', '.join(SOLVEURS)})")
+    return SOLVEURS[solveur](mm, threads=threads, temps_limite=temps_limite,
+                             parametres=parametres, log_output=log_output)
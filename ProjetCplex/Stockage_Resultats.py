@@ -0,0 +1,296 @@
+# -*- coding: utf-8 -*-
+"""
+Stockage_Resultats.py
+---------------------
+Base SQLite locale des résultats d'instances, indexée par (feuille, scénario, instance).
+
+- ajout d'une ligne : une insertion dans l'index, sans relire l'historique ;
+- instance suivante : une lecture de la dernière clé de l'index (O(log n)) ;
+- moyenne, variance, maximum, dernière valeur et quantiles p50/p95 (sketch P²)
+  de chaque indicateur suivi sont des agrégats glissants mis à jour à chaque ajout ;
+- le classeur Excel n'est plus relu ni réécrit à chaque exécution : il est
+  exporté à la demande en mode openpyxl write-only (écriture en flux).
+"""
+import json
+import os
+import sqlite3
+
+MOTS_CLES = ["OBJ", "PROD", "REPORT", "SOUS", "TEMPS", "EXECUTION", "OBJECTIVE", "FONCTION"]
+
+# Indicateurs suivis hors mots-clés
+COLONNES_SUIVIES = ["PRECESS TIME", "ITERATIONS"]
+QUANTILES = {"p50": 0.5, "p95": 0.95}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS resultats (
+    feuille  TEXT    NOT NULL,
+    scenario INTEGER NOT NULL,
+    instance INTEGER NOT NULL,
+    ligne    TEXT    NOT NULL,
+    PRIMARY KEY (feuille, scenario, instance)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS agregats (
+    feuille    TEXT NOT NULL,
+    indicateur TEXT NOT NULL,
+    etat       TEXT NOT NULL,
+    PRIMARY KEY (feuille, indicateur)
+) WITHOUT ROWID;
+"""
+
+
+# --- 🔹 Agrégats glissants (Welford) et quantiles P² ---
+def _p2_init(p):
+    """Estimateur P² (Jain & Chlamtac) d'un quantile p : 5 marqueurs, mémoire constante."""
+    return {"p": p, "q": [], "n": [], "np": [], "dn": []}
+
+
+def _p2_ajouter(e, x):
+    q, n = e["q"], e["n"]
+    if len(q) < 5:
+        q.append(x)
+        q.sort()
+        if len(q) == 5:
+            p = e["p"]
+            e["n"] = [1, 2, 3, 4, 5]
+            e["np"] = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+            e["dn"] = [0, p / 2, p, (1 + p) / 2, 1]
+        return
+
+    # Cellule k contenant x, mise à jour des extrêmes
+    if x < q[0]:
+        q[0] = x
+        k = 0
+    elif x >= q[4]:
+        q[4] = x
+        k = 3
+    else:
+        k = next(i for i in range(4) if q[i] <= x < q[i + 1])
+    for i in range(k + 1, 5):
+        n[i] += 1
+    for i in range(5):
+        e["np"][i] += e["dn"][i]
+
+    # Ajustement des marqueurs centraux (parabolique, sinon linéaire)
+    for i in (1, 2, 3):
+        d = e["np"][i] - n[i]
+        if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+            s = 1 if d > 0 else -1
+            qp = q[i] + s / (n[i + 1] - n[i - 1]) * (
+                (n[i] - n[i - 1] + s) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                + (n[i + 1] - n[i] - s) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+            )
+            if not q[i - 1] < qp < q[i + 1]:
+                qp = q[i] + s * (q[i + s] - q[i]) / (n[i + s] - n[i])
+            q[i] = qp
+            n[i] += s
+
+
+def _p2_valeur(e):
+    q = e["q"]
+    if not q:
+        return None
+    if len(q) < 5:
+        # Quantile exact sur les premières observations
+        return q[min(len(q) - 1, int(round(e["p"] * (len(q) - 1))))]
+    return q[2]
+
+
+def _etat_vide():
+    return {"n": 0, "moyenne": 0.0, "m2": 0.0, "max": None, "derniere": None,
+            "quantiles": {k: _p2_init(p) for k, p in QUANTILES.items()}}
+
+
+def _ajouter_valeur(etat, x):
+    etat["n"] += 1
+    delta = x - etat["moyenne"]
+    etat["moyenne"] += delta / etat["n"]
+    etat["m2"] += delta * (x - etat["moyenne"])
+    etat["max"] = x if etat["max"] is None else max(etat["max"], x)
+    etat["derniere"] = x
+    for sketch in etat["quantiles"].values():
+        _p2_ajouter(sketch, x)
+
+
+def colonnes_suivies(entetes):
+    return [
+        i for i, nom in enumerate(entetes)
+        if isinstance(nom, str) and (any(x in nom.upper() for x in MOTS_CLES) or nom in COLONNES_SUIVIES)
+    ]
+
+
+def _numerique(v):
+    """Valeur numérique d'une cellule (les résultats texte comme '0.0140' sont convertis)."""
+    if isinstance(v, bool) or v is None:
+        return None
+    if isinstance(v, (int, float)):
+        return v
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return None
+
+
+def _mettre_a_jour(etats, entetes, ligne):
+    for i in colonnes_suivies(entetes):
+        x = _numerique(ligne[i] if i < len(ligne) else None)
+        if x is not None:
+            _ajouter_valeur(etats.setdefault(entetes[i], _etat_vide()), x)
+
+
+def _lire_agregats(con, feuille):
+    return {
+        indicateur: json.loads(etat)
+        for indicateur, etat in con.execute(
+            "SELECT indicateur, etat FROM agregats WHERE feuille = ?", (feuille,)
+        )
+    }
+
+
+def _ecrire_agregats(con, feuille, etats):
+    con.executemany(
+        "INSERT OR REPLACE INTO agregats (feuille, indicateur, etat) VALUES (?, ?, ?)",
+        ((feuille, indicateur, json.dumps(etat)) for indicateur, etat in etats.items()),
+    )
+
+
+def ouvrir_base(db_path, feuilles=None):
+    """Ouvre (ou crée) la base ; reconstruit les agrégats d'une base qui n'en a pas encore."""
+    con = sqlite3.connect(db_path)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.executescript(_SCHEMA)
+    if feuilles and not base_vide(con) and con.execute("SELECT 1 FROM agregats LIMIT 1").fetchone() is None:
+        with con:
+            for feuille, entetes in feuilles.items():
+                etats = {}
+                for ligne in iter_lignes(con, feuille):
+                    _mettre_a_jour(etats, entetes, ligne)
+                _ecrire_agregats(con, feuille, etats)
+    return con
+
+
+def base_vide(con):
+    return con.execute("SELECT 1 FROM resultats LIMIT 1").fetchone() is None
+
+
+def ajouter_lignes(con, feuille, entetes, lignes):
+    """Ajoute des lignes Excel (colonnes 2 et 3 = SCENARIO, INSTANCE SCENARIO) en une transaction.
+
+    Les agrégats de la feuille sont mis à jour dans la même transaction, en O(1) par ligne.
+    Une ligne dont la clé existe déjà est ignorée (et n'est pas comptée deux fois).
+    """
+    with con:
+        etats = _lire_agregats(con, feuille)
+        for l in lignes:
+            cur = con.execute(
+                "INSERT OR IGNORE INTO resultats (feuille, scenario, instance, ligne) VALUES (?, ?, ?, ?)",
+                (feuille, int(l[1]), int(l[2]), json.dumps(l)),
+            )
+            if cur.rowcount == 1:
+                _mettre_a_jour(etats, entetes, l)
+        _ecrire_agregats(con, feuille, etats)
+
+
+def prochaine_instance(con, feuille, instances_par_scenario):
+    """(scénario, instance) suivant, lu sur la dernière clé de l'index."""
+    row = con.execute(
+        "SELECT scenario, instance FROM resultats WHERE feuille = ? "
+        "ORDER BY scenario DESC, instance DESC LIMIT 1",
+        (feuille,),
+    ).fetchone()
+    if row is None:
+        return 0, 1
+    scenario, instance = row
+    if instance >= instances_par_scenario:
+        return scenario + 1, 1
+    return scenario, instance + 1
+
+
+def iter_lignes(con, feuille):
+    """Lignes d'une feuille dans l'ordre (scénario, instance), sans tout charger en mémoire."""
+    for (ligne,) in con.execute(
+        "SELECT ligne FROM resultats WHERE feuille = ? ORDER BY scenario, instance", (feuille,)
+    ):
+        yield json.loads(ligne)
+
+
+def importer_classeur(con, xlsx_path, feuilles):
+    """Reprise unique de l'historique d'un classeur existant dans la base."""
+    from openpyxl import load_workbook
+
+    wb = load_workbook(xlsx_path, read_only=True)
+    nb = 0
+    for feuille, entetes in feuilles.items():
+        if feuille not in wb.sheetnames:
+            continue
+        lignes = [
+            list(r) for r in wb[feuille].iter_rows(min_row=2, values_only=True)
+            if r and r[1] is not None and r[2] is not None
+        ]
+        ajouter_lignes(con, feuille, entetes, lignes)
+        nb += len(lignes)
+    wb.close()
+    return nb
+
+
+ENTETES_SYNTHESE = ["Feuille - Indicateur", "Moyenne", "Maximum", "Dernière valeur",
+                    "Nombre", "Écart-type", "p50", "p95"]
+
+# Valeurs explicites en fin de synthèse : (libellé, colonne)
+_DERNIERES_VALEURS = {
+    "TXT_Resultats": [("Fonction objectif", "OBJ.VALUE"), ("Iterations", "ITERATIONS"),
+                      ("Process Time (s)", "PRECESS TIME")],
+    "LTF_Resultats": [("Objective value", "OBJ.VALUE"), ("Iterations", "ITERATIONS"),
+                      ("Process Time (s)", "PRECESS TIME")],
+}
+
+
+def lignes_synthese(con, feuilles):
+    """Lignes de l'onglet Synthese, lues dans les agrégats (aucun parcours de l'historique)."""
+    lignes = []
+    agregats = {feuille: _lire_agregats(con, feuille) for feuille in feuilles}
+    for feuille, entetes in feuilles.items():
+        for i in colonnes_suivies(entetes):
+            etat = agregats[feuille].get(entetes[i])
+            if not etat:
+                continue
+            n = etat["n"]
+            lignes.append([
+                f"{feuille} - {entetes[i]}",
+                round(etat["moyenne"], 3) if n > 1 else etat["derniere"],
+                round(etat["max"], 3),
+                round(etat["derniere"], 3),
+                n,
+                round((etat["m2"] / (n - 1)) ** 0.5, 3) if n > 1 else 0,
+                round(_p2_valeur(etat["quantiles"]["p50"]), 3),
+                round(_p2_valeur(etat["quantiles"]["p95"]), 3),
+            ])
+
+    for feuille in feuilles:
+        for libelle, colonne in _DERNIERES_VALEURS.get(feuille, ()):
+            etat = agregats[feuille].get(colonne)
+            lignes.append([f"{feuille} - {libelle}", "", "", etat["derniere"] if etat else None])
+    return lignes
+
+
+def exporter_excel(con, xlsx_path, feuilles):
+    """Export à la demande du classeur complet, écrit en flux (openpyxl write-only)."""
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    for feuille, entetes in feuilles.items():
+        ws = wb.create_sheet(feuille)
+        ws.append(entetes)
+        for ligne in iter_lignes(con, feuille):
+            ws.append(ligne)
+
+    synthese = [ENTETES_SYNTHESE] + lignes_synthese(con, feuilles)
+    ws_syn = wb.create_sheet("Synthese")
+    # Largeur de colonnes fixée avant l'écriture (impossible après en write-only)
+    for k, lettre in enumerate("ABCDEFGH"):
+        ws_syn.column_dimensions[lettre].width = max(len(str(l[k])) for l in synthese if k < len(l)) + 2
+    for ligne in synthese:
+        ws_syn.append(ligne)
+
+    tmp_path = xlsx_path + ".tmp"
+    wb.save(tmp_path)
+    os.replace(tmp_path, xlsx_path)
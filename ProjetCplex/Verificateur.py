@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""
+Verificateur.py
+---------------
+Vérification d'un plan (CPLEX, HiGHS, LINGO, heuristique) sans solveur : violation
+maximale de chaque famille de contraintes CMS et coûts Q1..Q7.
+
+Les contraintes évaluées sont celles du modèle matriciel de CMS_Matrices (big-M
+d'origine, non resserré), calculées famille par famille par un produit creux
+A.x, plus les contraintes portées par les bornes et les domaines :
+    MCIM (valeurs sur des routes interdites), Taille_lot (X <= tlot),
+    Pdef (B <= pdef), Bornes (positivité, Z <= 1), Integrite.
+
+La solution est un vecteur x complet, ou un dict {bloc: valeurs} où chaque
+bloc X, Z, Y, B, NAJ, NRE, MN est donné au choix :
+    - aligné sur mm["index"][bloc] (valeurs_<bloc> de l'artefact .npz),
+    - tenseur dense indexé par position dans les ensembles
+      (X et Z : P x M x M x C x C x T, Y : P x L x T, B : P x T, NAJ / NRE / MN : M x C x T),
+    - dict {clé (p, mi, ...): valeur} (solution de Horizon_Glissant).
+Un bloc absent vaut zéro.
+
+Le modèle de vérification est toujours la formulation tenseur : une solution de
+la formulation "arcs" (routes X / Z sous-ensemble des routes MCIM) s'y vérifie
+telle quelle, ses blocs X et Z étant passés par clé.
+
+Le modèle de vérification est gardé en mémoire par structure d'instance : auditer
+un lot dont les instances ne diffèrent que par la demande ne le construit qu'une fois.
+
+Usage : python Verificateur.py resultats_optimisation.npz [...] [--donnees DataFinal.json]
+"""
+import argparse
+import os
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from CMS_Matrices import BLOCS, COMPOSANTES, _position, construire_modele_matriciel
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+TOL = 1e-6
+TAILLE_CACHE_MODELES = 16
+
+# Ensembles indexant chaque bloc, dans l'ordre des colonnes de mm["index"][bloc]
+ENSEMBLES_BLOC = {
+    "X": ("P", "M", "M", "C", "C", "T"),
+    "Z": ("P", "M", "M", "C", "C", "T"),
+    "Y": ("P", "L", "T"),
+    "B": ("P", "T"),
+    "NAJ": ("M", "C", "T"),
+    "NRE": ("M", "C", "T"),
+    "MN": ("M", "C", "T"),
+}
+
+_MODELES = OrderedDict()
+
+
+def modele_verification(donnees, demande, etat_initial=None):
+    """Modèle matriciel non resserré de l'instance ; seule la demande est mise à jour d'un appel à l'autre.
+
+    Avec un état initial (fenêtre d'horizon glissant), le modèle est reconstruit.
+    """
+    from Cache_Modeles import appliquer_demande, empreinte_structure
+
+    if etat_initial is not None:
+        return construire_modele_matriciel(donnees, demande, etat_initial=etat_initial)
+    cle = empreinte_structure(donnees, resserrer=False)
+    if cle in _MODELES:
+        _MODELES.move_to_end(cle)
+        mm = _MODELES[cle]
+        appliquer_demande(mm, demande)
+        return mm
+    mm = construire_modele_matriciel(donnees, demande)
+    _MODELES[cle] = mm
+    if len(_MODELES) > TAILLE_CACHE_MODELES:
+        _MODELES.popitem(last=False)
+    return mm
+
+
+def _bloc_depuis_tenseur(mm, bloc, tenseur):
+    """Valeurs alignées sur l'index du bloc, et plus grande valeur hors index (routes interdites)."""
+    ensembles = mm["ensembles"]
+    index = mm["index"][bloc]
+    positions = tuple(_position(index[:, k], ensembles[e]) for k, e in enumerate(ENSEMBLES_BLOC[bloc]))
+    valeurs = tenseur[positions].astype(float)
+    reste = np.array(tenseur, dtype=float)
+    reste[positions] = 0.0
+    return valeurs, float(np.abs(reste).max()) if reste.size else 0.0
+
+
+def _bloc_depuis_dict(mm, bloc, valeurs_dict):
+    index = mm["index"][bloc]
+    cles = [tuple(k) for k in index.tolist()]
+    valeurs = np.array([valeurs_dict.get(k, 0.0) for k in cles], dtype=float)
+    connues = set(cles)
+    hors = [abs(v) for k, v in valeurs_dict.items() if tuple(k) not in connues]
+    return valeurs, max(hors, default=0.0)
+
+
+def vecteur_solution(mm, solution):
+    """(x, hors_index) : vecteur complet de la solution et plus grande valeur hors index (MCIM)."""
+    if isinstance(solution, np.ndarray):
+        if solution.shape != (mm["n"],):
+            raise ValueError(f"Vecteur solution de taille {solution.shape}, attendu ({mm['n']},)")
+        return solution.astype(float), 0.0
+    x = np.zeros(mm["n"])
+    hors_index = 0.0
+    for bloc in BLOCS:
+        d, f = mm["offsets"][bloc]
+        valeurs = solution.get(bloc)
+        if valeurs is None:
+            continue
+        hors = 0.0
+        if isinstance(valeurs, dict):
+            valeurs, hors = _bloc_depuis_dict(mm, bloc, valeurs)
+        else:
+            valeurs = np.asarray(valeurs)
+            if valeurs.ndim == len(ENSEMBLES_BLOC[bloc]) and valeurs.ndim > 1:
+                valeurs, hors = _bloc_depuis_tenseur(mm, bloc, valeurs)
+            elif valeurs.shape != (f - d,):
+                raise ValueError(f"Bloc {bloc} de forme {valeurs.shape}, attendu ({f - d},) ou tenseur dense")
+        x[d:f] = valeurs
+        hors_index = max(hors_index, hors)
+    return x, hors_index
+
+
+def _violation_famille(fam, x):
+    r = fam["A"] @ x - fam["rhs"]
+    if fam["sens"] == "le":
+        v = np.maximum(r, 0.0)
+    elif fam["sens"] == "ge":
+        v = np.maximum(-r, 0.0)
+    else:
+        v = np.abs(r)
+    if not len(v):
+        return 0.0, None
+    i = int(np.argmax(v))
+    cle = tuple(fam["cles"][i].tolist()) if fam["cles"] is not None else i
+    return float(v[i]), cle
+
+
+def _violation_bornes(mm, x, bloc):
+    """Dépassement de la borne supérieure du bloc (tlot pour X, pdef pour B)."""
+    d, f = mm["offsets"][bloc]
+    v = x[d:f] - mm["ub"][d:f]
+    if not len(v):
+        return 0.0, None
+    i = int(np.argmax(v))
+    return max(float(v[i]), 0.0), tuple(mm["index"][bloc][i].tolist())
+
+
+def verifier(donnees, solution, demande=None, etat_initial=None, tol=TOL):
+    """Violation maximale de chaque famille et coûts Q1..Q7 de `solution` pour l'instance `donnees`.
+
+    Renvoie {"faisable", "violations": {famille: max}, "pires": {famille: clé} (familles
+    violées seulement), "couts": {Q1..Q7}, "objectif", "temps"}.
+    """
+    from CMS_Optimization import charger_donnees, load_demande_from_json
+
+    start_time = time.perf_counter()
+    donnees = charger_donnees(donnees)
+    if demande is None:
+        demande = load_demande_from_json(donnees.get("params", {}), donnees["periods"])
+    mm = modele_verification(donnees, demande, etat_initial)
+    x, hors_index = vecteur_solution(mm, solution)
+
+    violations, pires = {}, {}
+    violations["MCIM"], pires["MCIM"] = hors_index, None
+    violations["Taille_lot"], pires["Taille_lot"] = _violation_bornes(mm, x, "X")
+    violations["Pdef"], pires["Pdef"] = _violation_bornes(mm, x, "B")
+    for fam in mm["familles"]:
+        violations[fam["nom"]], pires[fam["nom"]] = _violation_famille(fam, x)
+
+    # Positivité de toutes les variables, Z <= 1, intégrité (Z binaire, le reste entier)
+    dZ, fZ = mm["offsets"]["Z"]
+    bornes = [float(np.max(mm["lb"] - x, initial=0.0)), float(np.max(x[dZ:fZ] - 1.0, initial=0.0))]
+    violations["Bornes"], pires["Bornes"] = max(bornes), None
+    violations["Integrite"] = float(np.max(np.abs(x - np.round(x)), initial=0.0))
+    pires["Integrite"] = None
+
+    couts = {q: float(mm["objectif"][q] @ x) for q in COMPOSANTES}
+    return {
+        "faisable": all(v <= tol for v in violations.values()),
+        "violations": violations,
+        "pires": {k: pires[k] for k, v in violations.items() if v > tol},
+        "couts": couts,
+        "objectif": sum(couts.values()),
+        "temps": time.perf_counter() - start_time,
+    }
+
+
+def verifier_artefact(donnees, npz_path, tol=TOL):
+    """Vérifie l'artefact .npz de CMS_Optimization (demande et valeurs lues dans l'artefact)."""
+    from Lecture_Resultats import lire_artefact
+
+    a = lire_artefact(npz_path)
+    demande = {(int(p), int(t)): v for p, t, v in a["demande"].tolist()}
+    solution = {bloc: a[f"valeurs_{bloc}"] for bloc in BLOCS if len(a[f"valeurs_{bloc}"])}
+    if a.get("formulation", "tenseur") != "tenseur":
+        # Routes de la formulation "arcs" : alignées par clé sur l'index tenseur
+        for bloc in ("X", "Z"):
+            if bloc in solution:
+                solution[bloc] = dict(zip(map(tuple, a[f"index_{bloc}"].tolist()), solution[bloc].tolist()))
+    rapport = verifier(donnees, solution, demande=demande, tol=tol)
+    rapport["objectif_annonce"] = a["objectif"]
+    return rapport
+
+
+def afficher_rapport(rapport, nom=""):
+    etat = "faisable" if rapport["faisable"] else "INFAISABLE"
+    print(f"[OK] {nom} : {etat}, objectif recalculé {rapport['objectif']:.4f} "
+          f"({1000 * rapport['temps']:.2f} ms)")
+    if "objectif_annonce" in rapport and rapport["objectif_annonce"] == rapport["objectif_annonce"]:
+        ecart = rapport["objectif"] - rapport["objectif_annonce"]
+        if abs(ecart) > TOL * max(1.0, abs(rapport["objectif_annonce"])):
+            print(f"[AVERTISSEMENT] Objectif annoncé {rapport['objectif_annonce']:.4f} (écart {ecart:+.4f})")
+    for famille, cle in rapport["pires"].items():
+        suffixe = f" en {cle}" if cle is not None else ""
+        print(f"     {famille} : violation {rapport['violations'][famille]:.6g}{suffixe}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vérification de solutions CMS sans solveur")
+    parser.add_argument("artefacts", nargs="+", help="fichiers resultats_optimisation.npz")
+    parser.add_argument("--donnees", default=None,
+                        help="instance .json / .dat (défaut : DataFinal.json à côté de chaque artefact)")
+    parser.add_argument("--tol", type=float, default=TOL)
+    args = parser.parse_args()
+
+    infaisables = 0
+    start_time = time.perf_counter()
+    for npz_path in args.artefacts:
+        donnees = args.donnees or os.path.join(os.path.dirname(os.path.abspath(npz_path)), "DataFinal.json")
+        rapport = verifier_artefact(donnees, npz_path, tol=args.tol)
+        afficher_rapport(rapport, npz_path)
+        infaisables += not rapport["faisable"]
+    print(f"[OK] {len(args.artefacts)} solutions vérifiées en {time.perf_counter() - start_time:.3f} s, "
+          f"{infaisables} infaisables")
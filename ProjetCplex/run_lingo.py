@@ -1,40 +1,163 @@
-import subprocess
+# -*- coding: utf-8 -*-
+"""
+run_lingo.py
+------------
+Lancement du solveur externe LINGO, en asyncio.
+
+Chaque job exécute `<exécutable> <fichier de commandes>` dans son propre dossier
+(le modèle .lng lit DataFinal.dat depuis le dossier courant). Les jobs démarrent
+en parallèle sous un sémaphore (`max_paralleles`), leur sortie est copiée au fil
+de l'eau dans un journal par instance, et un job qui dépasse `timeout` est
+arrêté (terminate, puis kill après DELAI_ARRET secondes).
+
+`executer_avec(fonction, jobs)` fait tourner une résolution en processus
+(CPLEX / HiGHS) dans un thread pendant que les jobs LINGO s'exécutent.
+
+L'exécutable vient de l'argument `executable`, sinon de la variable
+d'environnement LINGO_EXE, sinon du chemin d'installation par défaut : un script
+quelconque peut remplacer Lingo64_19.exe pour les tests.
+
+Usage : python run_lingo.py [dossier ...] [--paralleles N] [--timeout S] [--exe chemin]
+"""
+import argparse
+import asyncio
 import os
+import shutil
+import time
 
-lingo_executable = r"C:\LINGO64_19\Lingo64_19.exe" 
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+lingo_executable = r"C:\LINGO64_19\Lingo64_19.exe"
 lingo_command_file = "ModelLINGO2.lng"
+JOURNAL = "Lingo_output_console.txt"
+DELAI_DEFAUT = 600
+DELAI_ARRET = 5
+
+
+def executable_lingo(executable=None):
+    return executable or os.environ.get("LINGO_EXE") or lingo_executable
+
+
+def preparer_job(dossier, executable=None, nom=None, donnees=None):
+    """Job LINGO pour le DataFinal.dat de `dossier` (le modèle .lng y est copié au besoin).
 
-def run_lingo_model():
-    """Exécute automatiquement le modèle LINGO et enregistre les résultats."""
+    Avec `donnees` (dict JSON de l'instance), le DataFinal.dat est d'abord écrit par Format_Dat.
+    """
+    dossier = os.path.abspath(dossier)
+    if donnees is not None:
+        from Format_Dat import ecrire_dat
+
+        ecrire_dat(os.path.join(dossier, "DataFinal.dat"), donnees)
+    modele = os.path.join(dossier, lingo_command_file)
+    if not os.path.exists(modele):
+        shutil.copyfile(os.path.join(BASE_DIR, lingo_command_file), modele)
+    return {
+        "nom": nom or os.path.basename(os.path.normpath(dossier)),
+        "commande": [executable_lingo(executable), modele],
+        "cwd": dossier,
+        "log": os.path.join(dossier, JOURNAL),
+    }
+
+
+# --- 🔹 Exécution asynchrone ---
+async def _copier_sortie(flux, f):
+    async for ligne in flux:
+        f.write(ligne)
+        f.flush()
+
+
+async def _arreter(process):
+    """Arrêt propre : terminate, puis kill si le processus ne s'arrête pas."""
+    if process.returncode is not None:
+        return
+    process.terminate()
     try:
-        current_directory = os.path.dirname(os.path.abspath(__file__))
-        command = [lingo_executable, os.path.join(current_directory, lingo_command_file)]
-        
-        # Rediriger la sortie standard et d'erreur pour éviter les blocages
-        process = subprocess.Popen(command, cwd=current_directory, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        process.wait(timeout=600)
-
-    except subprocess.TimeoutExpired:
+        await asyncio.wait_for(process.wait(), DELAI_ARRET)
+    except asyncio.TimeoutError:
         process.kill()
-        print("ERREUR : Le processus LINGO a dépassé le délai et a été interrompu.")
-    except Exception as e:
-        print(f"Une erreur est survenue : {e}")
-        
-
-        if process.returncode == 0:
-            print("✅ LINGO terminé avec succès !")
-        else:
-            print(f"❌ Erreur : LINGO s'est terminé avec le code {process.returncode}")
-
-        # Optionnel : sauvegarder la sortie brute dans un fichier texte
-        with open("Lingo_output_console.txt", "w", encoding="utf-8") as f:
-            f.write(process.stdout)
-            if process.stderr:
-                f.write("\n--- ERREURS ---\n")
-                f.write(process.stderr)
-
-    except subprocess.TimeoutExpired:
-        print("⏰ Temps d'exécution dépassé (LINGO a été arrêté automatiquement).")
-    except Exception as e:
-        print(f"⚠️ Erreur lors de l'exécution du modèle LINGO : {e}")
+        await process.wait()
+
+
+async def executer_job(job, semaphore, timeout=DELAI_DEFAUT):
+    """Exécute un job sous le sémaphore ; renvoie {nom, statut, code, temps, log}."""
+    async with semaphore:
+        start_time = time.perf_counter()
+        rapport = {"nom": job["nom"], "statut": "succès", "code": None, "log": job["log"]}
+        with open(job["log"], "wb") as f:
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    *job["commande"], cwd=job["cwd"],
+                    stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+                )
+            except OSError as e:
+                f.write(f"--- ERREURS ---\n{e}\n".encode("utf-8"))
+                rapport.update(statut="introuvable", temps=time.perf_counter() - start_time)
+                return rapport
+
+            copie = asyncio.ensure_future(_copier_sortie(process.stdout, f))
+            try:
+                await asyncio.wait_for(process.wait(), timeout)
+            except asyncio.TimeoutError:
+                rapport["statut"] = "délai dépassé"
+            finally:
+                # Aussi sur annulation : aucun processus LINGO ne doit survivre
+                await _arreter(process)
+                try:
+                    # Un petit-fils qui hérite de la sortie peut garder le tube ouvert
+                    await asyncio.wait_for(copie, DELAI_ARRET)
+                except asyncio.TimeoutError:
+                    pass
+            rapport["code"] = process.returncode
+            if rapport["statut"] == "succès" and process.returncode != 0:
+                rapport["statut"] = "échec"
+        rapport["temps"] = time.perf_counter() - start_time
+        return rapport
+
+
+async def executer_jobs(jobs, max_paralleles=2, timeout=DELAI_DEFAUT):
+    """Exécute tous les jobs, au plus `max_paralleles` à la fois ; rapports dans l'ordre des jobs."""
+    semaphore = asyncio.Semaphore(max_paralleles)
+    return await asyncio.gather(*(executer_job(job, semaphore, timeout) for job in jobs))
+
+
+def executer_lingo(jobs, max_paralleles=2, timeout=DELAI_DEFAUT):
+    return asyncio.run(executer_jobs(jobs, max_paralleles, timeout))
+
+
+def executer_avec(fonction, jobs, max_paralleles=2, timeout=DELAI_DEFAUT):
+    """Appelle `fonction()` dans un thread pendant l'exécution des jobs ; renvoie (résultat, rapports)."""
+    async def _tout():
+        return await asyncio.gather(asyncio.to_thread(fonction), executer_jobs(jobs, max_paralleles, timeout))
+
+    resultat, rapports = asyncio.run(_tout())
+    return resultat, rapports
+
+
+def afficher_rapport(rapport):
+    if rapport["statut"] == "succès":
+        print(f"[OK] LINGO {rapport['nom']} terminé avec succès ({rapport['temps']:.2f} s)")
+    elif rapport["statut"] == "délai dépassé":
+        print(f"[ERREUR] LINGO {rapport['nom']} : délai dépassé, processus arrêté ({rapport['log']})")
+    elif rapport["statut"] == "introuvable":
+        print(f"[ERREUR] LINGO {rapport['nom']} : exécutable introuvable ({rapport['log']})")
+    else:
+        print(f"[ERREUR] LINGO {rapport['nom']} terminé avec le code {rapport['code']} ({rapport['log']})")
+
+
+def run_lingo_model(executable=None, timeout=DELAI_DEFAUT):
+    """Exécute le modèle LINGO sur DataFinal.dat du dossier du projet ; renvoie le rapport du job."""
+    rapport = executer_lingo([preparer_job(BASE_DIR, executable, nom="DataFinal")], 1, timeout)[0]
+    afficher_rapport(rapport)
+    return rapport
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lancement parallèle de LINGO")
+    parser.add_argument("dossiers", nargs="*", help="dossiers contenant DataFinal.dat (défaut : le projet)")
+    parser.add_argument("--paralleles", type=int, default=2)
+    parser.add_argument("--timeout", type=float, default=DELAI_DEFAUT, help="par job, en secondes")
+    parser.add_argument("--exe", default=None, help="exécutable LINGO (défaut : $LINGO_EXE)")
+    args = parser.parse_args()
 
+    jobs = [preparer_job(d, args.exe) for d in (args.dossiers or [BASE_DIR])]
+    for rapport in executer_lingo(jobs, args.paralleles, args.timeout):
+        afficher_rapport(rapport)
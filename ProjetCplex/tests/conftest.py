@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""Fixtures communes : instance de démonstration (DataFinal.json) et son modèle matriciel."""
+import os
+import sys
+
+import pytest
+
+PROJET = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJET)
+
+from CMS_Matrices import construire_modele_matriciel, resserrer_big_m  # noqa: E402
+from CMS_Optimization import charger_donnees, load_demande_from_json  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def donnees():
+    return charger_donnees(os.path.join(PROJET, "DataFinal.json"))
+
+
+@pytest.fixture(scope="session")
+def demande(donnees):
+    return load_demande_from_json(donnees["params"], donnees["periods"])
+
+
+@pytest.fixture
+def modele(donnees, demande):
+    """Modèle matriciel resserré, tel que transmis au solveur par run_cms_optimization."""
+    mm = construire_modele_matriciel(donnees, demande)
+    resserrer_big_m(mm, donnees)
+    return mm
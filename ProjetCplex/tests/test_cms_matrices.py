@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from CMS_Matrices import casser_symetrie_cellules
+from Solveurs import resoudre
+
+
+def test_symetrie_cellules_garde_objectif(donnees, modele):
+    reference = resoudre(modele, "highs")["objectif"]
+    infos = casser_symetrie_cellules(modele, donnees)
+    assert infos["lignes"] > 0
+    assert resoudre(modele, "highs")["objectif"] == pytest.approx(reference, rel=1e-4)
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+
+from conftest import PROJET
+from Format_Dat import ecrire_dat, iter_sections, lire_dat
+
+DAT = os.path.join(PROJET, "DataFinal.dat")
+
+
+def _sections(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return dict(iter_sections(f))
+
+
+def test_aller_retour_dat_json_dat(tmp_path):
+    donnees = json.loads(json.dumps(lire_dat(DAT)))
+    sortie = tmp_path / "aller_retour.dat"
+    ecrire_dat(sortie, donnees)
+
+    assert _sections(sortie) == _sections(DAT)
+    assert lire_dat(sortie) == donnees
+
+
+def test_aller_retour_json_dat_json(tmp_path, donnees):
+    sortie = tmp_path / "instance.dat"
+    ecrire_dat(sortie, donnees)
+    ecarts_types = [donnees["params"][f"P{p}"]["ecart_type"] for p in donnees["products"]]
+    relu = lire_dat(sortie, cellules=len(donnees["cells"]), ecarts_types=ecarts_types)
+    assert relu == donnees
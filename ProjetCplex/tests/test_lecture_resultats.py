@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""Les lecteurs en flux de Lecture_Resultats rendent les mêmes tuples que les
+lecteurs regex historiques de MainPrincipale, recopiés ici comme référence."""
+import os
+import re
+
+import pytest
+
+from conftest import PROJET
+from Lecture_Resultats import process_ltf, process_txt
+
+TXT = os.path.join(PROJET, "resultats_optimisation.txt")
+LTF = os.path.join(PROJET, "DataFinal.ltf")
+
+
+def process_txt_historique(file_path):
+    Demande_values = {}
+    lp_value = cl_value = ""
+    total_nonzeros = 0
+    sum_X = sum_Y = sum_B = sum_NAJ = sum_NRE = 0
+    iterations = None
+    specific_results = {}
+    tol = 1e-6
+
+    with open(file_path, 'r', encoding='utf-8') as f:
+        lines = f.readlines()
+
+    in_dem_section = False
+    for line in lines:
+        line = line.strip()
+
+        if line.startswith("Demande :"):
+            in_dem_section = True
+            continue
+        if in_dem_section:
+            if line == "" or not line.startswith("("):
+                in_dem_section = False
+            else:
+                match = re.search(r"\((\d+),\s*(\d+)\)\s+([\d\.]+)", line)
+                if match:
+                    key = f"d{match.group(1)}{match.group(2)}"
+                    Demande_values[key] = int(round(float(match.group(3))))
+
+        for var_type, regex in [
+            ("X", r"X\(([\d,\s]+)\)\s*=\s*([\d\.]+)"),
+            ("Y", r"Y\(([\d,\s]+)\)\s*=\s*([\d\.]+)"),
+            ("B", r"B\(([\d,\s]+)\)\s*=\s*([\d\.]+)"),
+            ("NAJ", r"NAJ\(([\d,\s]+)\)\s*=\s*([\d\.]+)"),
+            ("NRE", r"NRE\(([\d,\s]+)\)\s*=\s*([\d\.]+)")
+        ]:
+            m = re.search(regex, line)
+            if m:
+                val = float(m.group(2))
+                if abs(val) > tol:
+                    if var_type == "X": sum_X += val
+                    elif var_type == "Y": sum_Y += val
+                    elif var_type == "B": sum_B += val
+                    elif var_type == "NAJ": sum_NAJ += val
+                    elif var_type == "NRE": sum_NRE += val
+
+        patterns = {
+            "Fonction objectif": r"Fonction objectif\s*[:=]\s*([-+]?\d*\.\d+|\d+)",
+            "Variables totales": r"Variables totales\s*:\s*(\d+)",
+            "Nombre d'itérations": r"(?i)Nombre\s+d'itérations\s*[:=]?\s*(\d+)",
+            "Contraintes totales": r"Contraintes totales\s*:\s*(\d+)",
+            "Temps d'exécution": r"Temps d'exécution\s*[:=]?\s*(\d*\.\d+|\d+)",
+            "nonzeros": r"nonzeros\s*[:=]?\s*(\d+)",
+            "LP": r"LP\s*[:=]\s*([\d\.]+)",
+            "CL": r"CL\s*[:=]\s*([\d\.]+)"
+        }
+
+        for key, pattern in patterns.items():
+            m = re.search(pattern, line)
+            if m:
+                val = m.group(1)
+                if key == "LP":
+                    lp_value = val
+                elif key == "CL":
+                    cl_value = val
+                elif key == "nonzeros":
+                    total_nonzeros = int(val)
+                elif key.lower() == "nombre d'itérations":
+                    iterations = int(val)
+                else:
+                    specific_results[key] = val
+
+    if iterations is None:
+        iterations = 0
+
+    return Demande_values, lp_value, cl_value, total_nonzeros, sum_X, sum_Y, sum_B, sum_NAJ, sum_NRE, iterations, specific_results
+
+
+def process_ltf_historique(file_path):
+    sum_X = sum_Y = sum_B = sum_NAJ = sum_NRE = 0
+    lp_value = ""
+    cl_value = ""
+    total_nonzeros = 0
+    specific_results = {}
+    dem_values = {}
+
+    with open(file_path, 'r', encoding='latin-1') as f:
+        lines = f.readlines()
+
+    for line in lines:
+        match = re.search(r"DEM\(\s*(\d+),\s*(\d+)\)\s+(\d+\.\d+)\s+\d+\.\d+", line)
+        if match:
+            key = f"d{match.group(1)}{match.group(2)}"
+            dem_values[key] = round(float(match.group(3)))
+
+        for var_type, regex in [
+            ("X", r"X\(\s*\d+,\s*\d+,\s*\d+,\s*\d+,\s*\d+,\s*\d+\)\s+(\d+\.\d+)"),
+            ("Y", r"Y\(\s*\d+,\s*\d+,\s*\d+\)\s+(\d+\.\d+)"),
+            ("B", r"B\(\s*\d+,\s*\d+\)\s+(\d+\.\d+)"),
+            ("NAJ", r"NAJ\(\s*\d+,\s*\d+,\s*\d+\)\s+(\d+\.\d+)"),
+            ("NRE", r"NRE\(\s*\d+,\s*\d+,\s*\d+\)\s+(\d+\.\d+)"),
+            ("MN", r"MN\(\s*\d+,\s*\d+,\s*\d+\)\s+(\d+\.\d+)")
+        ]:
+            m = re.search(regex, line)
+            if m:
+                val = float(m.group(1))
+                if var_type == "X": sum_X += val
+                elif var_type == "Y": sum_Y += val
+                elif var_type == "B": sum_B += val
+                elif var_type == "NAJ": sum_NAJ += val
+                elif var_type == "NRE": sum_NRE += val
+
+        patterns = {
+            "Objective value": r"Objective value:\s+([-+]?\d+\.\d+)",
+            "Objective bound": r"Objective bound:\s+([-+]?\d+\.\d+)",
+            "Total variables": r"Total variables:\s+(\d+)",
+            "Integer variables": r"Integer variables:\s+(\d+)",
+            "Total solver iterations": r"Total solver iterations:\s+(\d+)",
+            "Total constraints": r"Total constraints:\s+(\d+)",
+            "Elapsed runtime (s)": r"Elapsed runtime seconds:\s+(\d+\.\d+)",
+            "Total nonzeros": r"Total nonzeros:\s+(\d+)",
+            "LP": r"LP\s+(\d+\.\d+)",
+            "CL": r"CL\s+(\d+\.\d+)"
+        }
+
+        for key, regex in patterns.items():
+            m = re.search(regex, line)
+            if m:
+                val = m.group(1)
+                if key == "Total nonzeros": total_nonzeros = val
+                elif key == "LP": lp_value = val
+                elif key == "CL": cl_value = val
+                else: specific_results[key] = val
+
+    return dem_values, lp_value, cl_value, total_nonzeros, sum_X, sum_Y, sum_B, sum_NAJ, sum_NRE, specific_results
+
+
+@pytest.mark.parametrize("mmap_mode", [False, True])
+def test_process_txt_identique_historique(mmap_mode):
+    assert process_txt(TXT, mmap_mode=mmap_mode) == process_txt_historique(TXT)
+
+
+@pytest.mark.parametrize("mmap_mode", [False, True])
+def test_process_ltf_identique_historique(mmap_mode):
+    assert process_ltf(LTF, mmap_mode=mmap_mode) == process_ltf_historique(LTF)
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from Portefeuille import _concluant
+from Solveurs import resoudre
+
+
+def test_optimum_highs_concluant(modele):
+    assert _concluant(resoudre(modele, "highs"), "highs")
+
+
+@pytest.mark.parametrize("solveur, statut", [
+    ("docplex", "integer optimal solution"),
+    ("docplex", "integer infeasible"),
+    ("highs", "Optimal"),
+    ("highs", "Infeasible"),
+])
+def test_statuts_prouves(solveur, statut):
+    assert _concluant({"statut": statut}, solveur)
+
+
+@pytest.mark.parametrize("solveur, statut", [
+    ("docplex", "time limit exceeded"),
+    ("docplex", "time limit exceeded, no integer solution"),
+    ("docplex", "integer infeasible or unbounded"),
+    ("highs", "Time limit reached"),
+    ("highs", "Primal infeasible or unbounded"),
+    ("highs", "The problem is unbounded or infeasible. (HiGHS Status 9: model_status is "
+              "Primal infeasible or unbounded; primal_status is None)"),
+    ("highs", "integer optimal solution"),
+])
+def test_statuts_non_concluants(solveur, statut):
+    assert not _concluant({"statut": statut}, solveur)
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from Presolve import postsolve_resultat, presolve
+from Solveurs import resoudre
+from Verificateur import verifier
+
+
+def test_presolve_garde_optimum_et_plan_faisable(donnees, demande, modele):
+    reference = resoudre(modele, "highs")
+    mm_reduit, infos = presolve(modele)
+    assert mm_reduit["n"] < modele["n"]
+
+    resultat = postsolve_resultat(infos, resoudre(mm_reduit, "highs"))
+    assert resultat["objectif"] == pytest.approx(reference["objectif"], rel=1e-4)
+    assert resultat["variables"] == reference["variables"]
+    assert resultat["contraintes"] == reference["contraintes"]
+
+    rapport = verifier(donnees, resultat["x"], demande=demande)
+    assert rapport["faisable"], rapport["pires"]
+    assert rapport["objectif"] == pytest.approx(resultat["objectif"], rel=1e-6)
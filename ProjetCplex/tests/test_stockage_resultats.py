@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+from Stockage_Resultats import QUANTILES, _ajouter_valeur, _etat_vide, _p2_valeur
+
+
+def test_quantiles_p2_proches_de_numpy():
+    echantillon = np.random.default_rng(0).lognormal(mean=0.0, sigma=0.5, size=5000)
+    etat = _etat_vide()
+    for x in echantillon:
+        _ajouter_valeur(etat, float(x))
+
+    assert etat["moyenne"] == pytest.approx(echantillon.mean())
+    assert etat["m2"] / (etat["n"] - 1) == pytest.approx(echantillon.var(ddof=1))
+    for nom, p in QUANTILES.items():
+        assert _p2_valeur(etat["quantiles"][nom]) == pytest.approx(np.percentile(echantillon, 100 * p), rel=0.01)
+
+
+def test_quantiles_exacts_sous_cinq_valeurs():
+    etat = _etat_vide()
+    for x in (3.0, 1.0, 2.0):
+        _ajouter_valeur(etat, x)
+    assert _p2_valeur(etat["quantiles"]["p50"]) == 2.0
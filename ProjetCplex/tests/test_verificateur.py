@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+from Solveurs import resoudre
+from Verificateur import verifier
+
+
+def test_plan_optimal_faisable_et_plan_modifie_infaisable(donnees, demande, modele):
+    resultat = resoudre(modele, "highs")
+    assert verifier(donnees, resultat["x"], demande=demande)["faisable"]
+
+    # Plus aucune machine installée : équilibre du parc (NAJ - NRE + parc précédent = MN)
+    # et capacité des machines utilisées violés ; LP vaut 0 dans DataFinal.json, donc
+    # ni LP ni CL ne sont touchées
+    x = resultat["x"].copy()
+    d, f = modele["offsets"]["MN"]
+    x[d:f] = 0
+    rapport = verifier(donnees, x, demande=demande)
+    assert not rapport["faisable"]
+    assert rapport["violations"]["Equilibrage_init"] > 0
+    assert rapport["violations"]["MachineUtilization"] > 0
+    assert rapport["violations"]["LP"] == 0
+    assert rapport["violations"]["CL"] == 0
+    assert {"Equilibrage_init", "MachineUtilization"} <= set(rapport["pires"])
+
+
+def test_plan_fractionnaire_infaisable(donnees, demande, modele):
+    x = resoudre(modele, "highs")["x"].copy()
+    d, _ = modele["offsets"]["NAJ"]
+    x[d] += 0.5
+    rapport = verifier(donnees, x, demande=demande)
+    assert not rapport["faisable"]
+    assert rapport["violations"]["Integrite"] == 0.5
@@ -5,6 +5,8 @@ os.environ['CPLEX_STUDIO_DIR2211'] = r"C:\Program Files\IBM\ILOG\CPLEX_Studio_Co
 
 
 from docplex.mp.model import Model
+from docplex.mp.relax_linear import LinearRelaxer
+from docplex.mp.utils import DOcplexLimitsExceeded
 
 
 # from docplex.mp.data import DataReader
@@ -54,6 +56,14 @@ INT = {1: 5, 2: 7, 3: 4}
 CL = 30  # Capacité maximale
 LP = 10  # Production minimale
 
+# Cassage des symétries entre copies machineN interchangeables
+CASSER_SYMETRIE = False
+# Copies f >= SEUIL_COPIES forcées à zéro (anciennes familles constraint_x / constraint_Z
+# "f >= 4", "f >= 5", "f >= 7", les deux dernières impliquées par la première) :
+# leurs variables ne sont plus créées
+SEUIL_COPIES = 4
+copies = [f for f in machineN if f < SEUIL_COPIES]
+
 # Paramètres MCIM et OP
 MCIM = {
     (1, 1): 1, (1, 2): 1, (1, 3): 1,
@@ -83,22 +93,20 @@ NAJ = model.integer_var_dict(((m, c, t) for m in machines for c in cells for t i
                              name='NAJ')  # Machine ajoutée
 NRE = model.integer_var_dict(((m, c, t) for m in machines for c in cells for t in periods),
                              name='NRE')  # Machine retirée
+# Pas de variable Z : sans coût et présente seulement dans x <= Z * BigM, elle était redondante
 x = model.continuous_var_dict(
-    ((o, p, m, f, c, t) for o in operations for p in products for m in machines for f in machineN for c in cells for t
+    ((o, p, m, f, c, t) for o in operations for p in products for m in machines for f in copies for c in cells for t
      in periods), name='x')
-Z = model.continuous_var_dict(
-    ((o, p, m, f, c, t) for o in operations for p in products for m in machines for f in machineN for c in cells for t
-     in periods), name='Z')
 MN = model.integer_var_dict(((m, c, t) for m in machines for c in cells for t in periods),
                             name='MN')  # Machine existante
 
 # Fonction objectif : Minimiser les coûts
 Q1 = model.sum(setup_cost[m] / Tlot[p] * x[o, p, m, f, c, t]
-               for c in cells for t in periods for m in machines for f in machineN for p in products for o in
+               for c in cells for t in periods for m in machines for f in copies for p in products for o in
                operations)
 
 Q2 = model.sum(operation_cost[p, m, o] * x[o, p, m, f, c, t]
-               for c in cells for t in periods for m in machines for f in machineN for p in products for o in
+               for c in cells for t in periods for m in machines for f in copies for p in products for o in
                operations)
 
 Q3 = model.sum((Mcost[m] * NAJ[m, c, t]) - (SalCost[m] * NRE[m, c, t])
@@ -109,34 +117,15 @@ Q4 = model.sum(B[p, t] * HoldCost[p] for p in products for t in periods)
 Q5 = model.sum(Y[p, l, t] * SubCapacity[l] for p in products for l in subcontractors for t in periods)
 
 Q6 = model.sum(
-    IntrCost[p] * x[o, p, m, f, c, t] for c in cells for t in periods for m in machines for f in machineN for p in
+    IntrCost[p] * x[o, p, m, f, c, t] for c in cells for t in periods for m in machines for f in copies for p in
     products for o in operations if o < 3)
 
 Q7 = model.sum(
-    InterCost[p] * x[o, p, m, f, c, t] for c in cells for t in periods for m in machines for f in machineN for p in
+    InterCost[p] * x[o, p, m, f, c, t] for c in cells for t in periods for m in machines for f in copies for p in
     products for o in operations if o < 3)
 
 model.minimize(Q1 + Q2 + Q3 + Q4 + Q5 + Q6 + Q7)
 
-for t in periods[1:]:  # Pour t >= 2
-    for p in products:
-        denom = sum(MCIM[p, m] for m in machines)  # pré-calculé une fois
-
-        model.add_constraint(
-            model.sum(
-                x.get((o, p, m, f, c, t), 0)
-                for o in operations
-                for m in machines
-                for f in machineN
-                for c in cells
-            ) / denom
-            + model.sum(Y[p, l, t] for l in subcontractors)
-            + B[p, t] - B[p, 1]
-            >= demand[p, t],
-            f"DemandConstraint_t{t}_p{p}"
-        )
-
-
 # Contrainte de demande pour les périodes t >= 2
 for t in periods[1:]:
     for p in products:
@@ -150,7 +139,7 @@ for t in periods[1:]:
                 x[o, p, m, f, c, t]
                 for o in operations
                 for m in machines
-                for f in machineN
+                for f in copies
                 for c in cells
             ) / denom
             + model.sum(Y[p, l, t] for l in subcontractors)
@@ -162,7 +151,7 @@ for t in periods[1:]:
 
 # Contraintes de capacités des machines
 for m in machines:
-    for f in machineN:
+    for f in copies:
         for c in cells:
             for t in periods:
                 model.add_constraint(
@@ -170,11 +159,17 @@ for m in machines:
                     f"MachineCapacityConstraint_m{m}_f{f}_c{c}_t{t}"
                 )
 
+# Big-M resserrés : x[o, p, m, f, c, t] est déjà borné par Tlot[p] et par la capacité machine
+M_lien = {(p, m): min(BigM, Tlot[p], machine_capacity[m]) for p in products for m in machines}
+M_usage = {p: min(BigM, sum(M_lien[p, m] for m in machines)) for p in products}
+print(f"Big-M resserré : {BigM} -> max {max(M_usage.values())} (utilisation machine)")
+liens = {}  # contrainte MachineUsage -> (NAJ, p)
+
 # Contraintes sur les quantités produites
 for o in operations:
     for p in products:
         for m in machines:
-            for f in machineN:
+            for f in copies:
                 for c in cells:
                     for t in periods:
                         model.add_constraint(
@@ -182,11 +177,6 @@ for o in operations:
                             f"TlotConstraint_o{o}_p{p}_m{m}_f{f}_c{c}_t{t}"
                         )
 
-                        model.add_constraint(
-                            x[o, p, m, f, c, t] <= Z[o, p, m, f, c, t] * BigM,
-                            f"BigMConstraint_o{o}_p{p}_m{m}_f{f}_c{c}_t{t}"
-                        )
-
 # Capacités des sous-traitants
 for l in subcontractors:
     for t in periods:
@@ -206,64 +196,29 @@ for p in products:
 # Contraintes sur les machines
 for o in operations:
     for p in products:
-        for f in machineN:
+        for f in copies:
             for c in cells:
                 for t in periods:
-                    model.add_constraint(
-                        model.sum(x[o, p, m, f, c, t] for m in machines) <= NAJ[m, c, t] * BigM,
+                    ct = model.add_constraint(
+                        model.sum(x[o, p, m, f, c, t] for m in machines) <= NAJ[m, c, t] * M_usage[p],
                         f"MachineUsageConstraint_o{o}_p{p}_f{f}_c{c}_t{t}"
                     )
-# Contrainte sur l'utilisation de x
-for o in operations:
-    for p in products:
-        for m in machines:
-            for c in cells:
-                for t in periods:
-                    model.add_constraint(
-                        model.sum(
-                            x[o, p, m, f, c, t] for f in machineN if f >= 5
-                        ) == 0, ctname=f"constraint_x_{o}_{p}_{m}_{c}_{t}_f_ge_5"
-                    )
-
-                for t in periods:
-                    model.add_constraint(
-                        model.sum(
-                            x[o, p, m, f, c, t] for f in machineN if f >= 7
-                        ) == 0, ctname=f"constraint_x_{o}_{p}_{m}_{c}_{t}_f_ge_7"
-                    )
-
-                for t in periods:
-                    model.add_constraint(
-                        model.sum(
-                            x[o, p, m, f, c, t] for f in machineN if f >= 4
-                        ) == 0, ctname=f"constraint_x_{o}_{p}_{m}_{c}_{t}_f_ge_4"
-                    )
-
-# Contrainte sur Z
-for o in operations:
-    for p in products:
-        for m in machines:
-            for c in cells:
-                for t in periods:
-                    model.add_constraint(
-                        model.sum(
-                            Z[o, p, m, f, c, t] for f in machineN if f >= 5
-                        ) == 0, ctname=f"constraint_Z_{o}_{p}_{m}_{c}_{t}_f_ge_5"
-                    )
-
-                for t in periods:
-                    model.add_constraint(
-                        model.sum(
-                            Z[o, p, m, f, c, t] for f in machineN if f >= 7
-                        ) == 0, ctname=f"constraint_Z_{o}_{p}_{m}_{c}_{t}_f_ge_7"
-                    )
-
-                for t in periods:
-                    model.add_constraint(
-                        model.sum(
-                            Z[o, p, m, f, c, t] for f in machineN if f >= 4
-                        ) == 0, ctname=f"constraint_Z_{o}_{p}_{m}_{c}_{t}_f_ge_4"
-                    )
+                    liens[ct] = (NAJ[m, c, t], p)
+# Ordre de charge entre copies : MachineUsage couple les machines d'une même copie f,
+# seule une permutation des copies commune à toutes les machines (par cellule et
+# période) est une symétrie ; elle ramène toute solution à une charge décroissante.
+if CASSER_SYMETRIE:
+    nb_symetrie = 0
+    for f, g in zip(copies, copies[1:]):
+        for c in cells:
+            for t in periods:
+                model.add_constraint(
+                    model.sum(x[o, p, m, f, c, t] for o in operations for p in products for m in machines)
+                    >= model.sum(x[o, p, m, g, c, t] for o in operations for p in products for m in machines),
+                    ctname=f"symetrie_copies_f{f}_f{g}_c{c}_t{t}"
+                )
+                nb_symetrie += 1
+    print(f"Symétrie machineN : {nb_symetrie} contraintes d'ordre")
 
 # Contrainte sur les machines existantes
 for c in cells:
@@ -306,11 +261,44 @@ for m in machines:
                         model.sum(
                             x[o, p, m, f, c, t] for o in operations
                         ) for p in products
-                    ) for f in machineN
+                    ) for f in copies
                 ) for c in cells
             ) <= machine_capacity[m] * model.sum(MN[m, c, t] for c in cells)
         )
 
+# Taille du modèle, comparée à la version qui créait Z, les copies f >= SEUIL_COPIES,
+# le bloc de demande en double et les familles f >= 4 / 5 / 7
+nb_routes = len(operations) * len(products) * len(machines) * len(cells) * len(periods)
+nb_copies_retirees = len(machineN) - len(copies)
+variables_retirees = nb_routes * nb_copies_retirees + nb_routes * len(machineN)
+contraintes_retirees = (len(products) * (len(periods) - 1)  # demande en double
+                        + nb_routes * len(machineN)  # liaison x <= Z * BigM
+                        + 6 * nb_routes  # familles f >= 4 / 5 / 7 sur x et Z
+                        + nb_routes * nb_copies_retirees  # Tlot des copies retirées
+                        + len(machines) * nb_copies_retirees * len(cells) * len(periods)  # capacité machine
+                        + len(operations) * len(products) * nb_copies_retirees * len(cells) * len(periods))
+print(f"Taille du modèle : variables {model.number_of_variables + variables_retirees} -> {model.number_of_variables}, "
+      f"contraintes {model.number_of_constraints + contraintes_retirees} -> {model.number_of_constraints}")
+
+# Borne LP racine (relaxation continue) avec BigM, puis avec le big-M resserré
+def lier(M):
+    for ct, (naj, p) in liens.items():
+        ct.right_expr = naj * M[p]
+
+def borne_lp():
+    relaxe = LinearRelaxer.make_relaxed_model(model)
+    return relaxe.objective_value if relaxe.solve() else None
+
+try:
+    lier(dict.fromkeys(M_usage, BigM))
+    borne_avant = borne_lp()
+    lier(M_usage)
+    print(f"Borne LP racine : {borne_avant} -> {borne_lp()} (big-M resserré)")
+except DOcplexLimitsExceeded:
+    print("[AVERTISSEMENT] Borne LP racine non mesurée : modèle au-delà des limites de CPLEX Community Edition")
+finally:
+    lier(M_usage)
+
 # Résoudre le modèle
 solution = model.solve()
 